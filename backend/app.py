@@ -1,11 +1,19 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
-import threading
-import json
-from datetime import datetime
-import tempfile
+import sys
+import zlib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_store import ResultStore, store_path_for
+from card_filters import CardFilter
+from job_manager import JobManager
+from browser_pool import WarmBrowserPool
+from work_queue import create_work_queue
+from coordinator import DistributedCoordinator
+from metrics import REGISTRY, QUEUE_DEPTH, ACTIVE_WORKERS
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
@@ -15,8 +23,39 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-scraper_thread = None
-scraper_status = {
+# Largest page served by the results API
+MAX_RESULTS_PAGE = 1000
+# Row deltas sent per resume_rows request
+ROW_REPLAY_BATCH = 1000
+
+# Browsers launched at server start for the next jobs (0 = launch per job)
+browser_pool = WarmBrowserPool(
+    size=int(os.environ.get('WARM_BROWSERS', 0)),
+    browser=os.environ.get('WARM_BROWSER', 'chrome'),
+    headless=os.environ.get('WARM_HEADLESS', '0') == '1'
+)
+
+job_manager = JobManager(
+    socketio,
+    OUTPUT_DIR,
+    max_jobs=int(os.environ.get('MAX_JOBS', 0)) or None,
+    stage1_concurrency=int(os.environ.get('STAGE1_CONCURRENCY', 1)),
+    stage2_concurrency=int(os.environ.get('STAGE2_CONCURRENCY', 2)),
+    emit_interval=float(os.environ.get('EMIT_INTERVAL', 0.25)),
+    browser_pool=browser_pool if browser_pool.size else None
+)
+
+coordinator = DistributedCoordinator(
+    socketio,
+    job_manager,
+    lambda: create_work_queue(os.environ.get('WORK_QUEUE_URL', f"sqlite:///{os.path.join(OUTPUT_DIR, 'work_queue.db')}")),
+    enrich_batch_size=int(os.environ.get('ENRICH_BATCH_SIZE', 50)),
+    lease_seconds=int(os.environ.get('LEASE_SECONDS', 300))
+)
+
+IDLE_STATUS = {
+    'job_id': None,
+    'state': None,
     'running': False,
     'stage': None,
     'progress': 0,
@@ -27,135 +66,272 @@ scraper_status = {
         'maps_scraped': 0,
         'websites_scraped': 0,
         'emails_found': 0,
-        'owners_found': 0
+        'owners_found': 0,
+        'filter_rejections': {},
+        'driver_restarts': 0,
+        'driver_recycles': 0,
+        'driver_rss_mb': None,
+        'blocks': {},
+        'blocks_last_hour': 0,
+        'empty_feeds': 0
     }
 }
 
-class ProgressEmitter:
-    """Helper class to emit progress updates via WebSocket"""
-    
-    @staticmethod
-    def emit_progress(data):
-        """Emit progress update to all connected clients"""
-        socketio.emit('progress', data, namespace='/')
-    
-    @staticmethod
-    def emit_log(message, level='info'):
-        """Emit log message to all connected clients"""
-        socketio.emit('log', {
-            'message': message,
-            'level': level,
-            'timestamp': datetime.now().isoformat()
-        }, namespace='/')
-    
-    @staticmethod
-    def update_status(stage=None, progress=None, total=None, current_item=None, stats=None):
-        """Update scraper status and emit to clients"""
-        global scraper_status
-        
-        if stage is not None:
-            scraper_status['stage'] = stage
-        if progress is not None:
-            scraper_status['progress'] = progress
-        if total is not None:
-            scraper_status['total'] = total
-        if current_item is not None:
-            scraper_status['current_item'] = current_item
-        if stats is not None:
-            scraper_status['stats'].update(stats)
-        
-        socketio.emit('status', scraper_status, namespace='/')
+def validate_config(config):
+    """Return an error message if the job configuration is invalid, else None"""
+    if not isinstance(config, dict):
+        return 'Job configuration must be an object'
+    required_fields = ['cities', 'entries_per_city']
+    for field in required_fields:
+        if field not in config:
+            return f'Missing required field: {field}'
+    if not config.get('search_term') and not config.get('search_terms'):
+        return 'Missing required field: search_term'
+    try:
+        CardFilter(config.get('filters'))
+    except (TypeError, ValueError) as e:
+        return f'Invalid filters: {e}'
+    # Imported here: loading Selenium and requests would slow down server start
+    from maps_scraper_configurable import MapMiner
+    from http_transport import TRANSPORTS
+    from proxy_pool import ProxyPool
+    if config.get('http_transport', 'requests') not in TRANSPORTS:
+        return f"Unknown http_transport: {config['http_transport']}"
+    try:
+        ProxyPool.from_config(config.get('proxies'))
+    except (TypeError, ValueError) as e:
+        return f'Invalid proxies: {e}'
+    strategy = config.get('extraction_strategy', 'find_element')
+    if strategy not in MapMiner.EXTRACTION_STRATEGIES:
+        return f'Unknown extraction_strategy: {strategy}'
+    return None
+
+def latest_status():
+    """Status of the most recently submitted job (legacy single-job view)"""
+    job = job_manager.latest()
+    return job.snapshot() if job else IDLE_STATUS
 
-def run_scraper(config):
-    """Run the scraper with given configuration"""
-    global scraper_status
+@app.route('/api/jobs', methods=['POST'])
+def create_jobs():
+    """Queue one job (object body) or several jobs (list body)"""
+    payload = request.json
+    configs = payload if isinstance(payload, list) else [payload]
     
-    try:
-        scraper_status['running'] = True
-        ProgressEmitter.emit_log('🚀 Starting scraper...', 'info')
-        
-        # Create output directory relative to backend folder
-        backend_dir = os.path.dirname(os.path.abspath(__file__))
-        output_dir = os.path.join(backend_dir, 'output')
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Generate filename with search_term + timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        search_term = config.get('search_term', 'results').replace(' ', '_')
-        output_path = os.path.join(output_dir, f'{search_term}_{timestamp}.csv')
-        config['output_path'] = output_path
-        
-        # Import scrapers
-        from scraper_orchestrator import ScraperOrchestrator
-        
-        # Create orchestrator
-        orchestrator = ScraperOrchestrator(
-            config=config,
-            progress_callback=ProgressEmitter
-        )
-        
-        # Run the scraping process
-        orchestrator.run()
-        
-        # Store CSV path and emit completion event
-        scraper_status['csv_path'] = output_path
-        ProgressEmitter.emit_log('✅ Scraping completed successfully!', 'success')
-        socketio.emit('scraping_complete', {'csv_path': output_path}, namespace='/')
-        
-    except Exception as e:
-        ProgressEmitter.emit_log(f'❌ Error: {str(e)}', 'error')
-    finally:
-        scraper_status['running'] = False
-        scraper_status['stage'] = None
-        ProgressEmitter.update_status()
+    for config in configs:
+        error = validate_config(config)
+        if error:
+            return jsonify({'error': error}), 400
+    
+    jobs = [job_manager.submit(config) for config in configs]
+    return jsonify({'jobs': [job.snapshot() for job in jobs]}), 201
 
-@app.route('/api/start', methods=['POST'])
-def start_scraper():
-    """Start the scraper with provided configuration"""
-    global scraper_thread
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List all jobs with their status"""
+    return jsonify({
+        'jobs': job_manager.list_jobs(),
+        'queued': job_manager.queue_depth(),
+        'running': job_manager.active_count()
+    }), 200
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status of one job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.snapshot()), 200
+
+@app.route('/api/jobs/<job_id>/logs', methods=['GET'])
+def get_job_logs(job_id):
+    """Get the recent log lines of one job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'logs': list(job.logs)}), 200
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.state not in ('queued', 'running'):
+        return jsonify({'error': f'Job is already {job.state}'}), 400
+    
+    job_manager.cancel(job_id)
+    return jsonify({'message': 'Job stop requested', 'job': job.snapshot()}), 200
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+def download_job(job_id):
+    """Download the results of one job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return export_response(job.output_path)
+
+@app.route('/api/distributed/jobs', methods=['POST'])
+def create_distributed_job():
+    """Shard a job into tasks for distributed workers"""
+    config = request.json
+    error = validate_config(config)
+    if error:
+        return jsonify({'error': error}), 400
     
-    if scraper_status['running']:
-        return jsonify({'error': 'Scraper is already running'}), 400
+    job = coordinator.submit(config)
+    return jsonify(job.snapshot()), 201
+
+@app.route('/api/distributed/queue', methods=['GET'])
+def get_work_queue():
+    """Task counts on the shared work queue"""
+    return jsonify(coordinator.queue_counts()), 200
+
+@app.route('/api/workers/lease', methods=['POST'])
+def lease_task():
+    """Hand the next task to a worker (204 if the queue is empty)"""
+    data = request.json or {}
+    if not data.get('worker_id'):
+        return jsonify({'error': 'Missing required field: worker_id'}), 400
     
+    task = coordinator.lease(data['worker_id'], kinds=data.get('kinds'), lease_seconds=data.get('lease_seconds'))
+    if task is None:
+        return '', 204
+    return jsonify(task), 200
+
+@app.route('/api/workers/tasks/<int:task_id>/heartbeat', methods=['POST'])
+def task_heartbeat(task_id):
+    """Extend a worker's lease on a task"""
+    data = request.json or {}
+    if not coordinator.heartbeat(task_id, data.get('worker_id'), data.get('lease_seconds')):
+        return jsonify({'error': 'Lease not held'}), 409
+    return jsonify({'message': 'Lease extended'}), 200
+
+@app.route('/api/workers/tasks/<int:task_id>/result', methods=['POST'])
+def task_result(task_id):
+    """Accept the rows (and follow-up Maps units) a worker produced for a task"""
+    data = request.json or {}
+    if not coordinator.report_result(task_id, data.get('worker_id'), data.get('rows') or [],
+                                     units=data.get('units') or []):
+        return jsonify({'error': 'Lease not held'}), 409
+    return jsonify({'message': 'Result stored'}), 200
+
+@app.route('/api/workers/tasks/<int:task_id>/fail', methods=['POST'])
+def task_failed(task_id):
+    """Release a task a worker could not finish"""
+    data = request.json or {}
+    if not coordinator.report_failure(task_id, data.get('worker_id'), data.get('error', '')):
+        return jsonify({'error': 'Lease not held'}), 409
+    return jsonify({'message': 'Task released'}), 200
+
+@app.route('/api/workers/tasks/<int:task_id>/release', methods=['POST'])
+def task_blocked(task_id):
+    """Take back a task Google blocked, without counting it as a failed attempt"""
+    data = request.json or {}
+    if not coordinator.report_block(task_id, data.get('worker_id'), data.get('error', '')):
+        return jsonify({'error': 'Lease not held'}), 409
+    return jsonify({'message': 'Task released'}), 200
+
+@app.route('/api/start', methods=['POST'])
+def start_scraper():
+    """Queue a scraper job with provided configuration"""
     config = request.json
     
     # Validate configuration (output_path no longer required)
-    required_fields = ['search_term', 'cities', 'entries_per_city']
-    for field in required_fields:
-        if field not in config:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
-    
-    # Reset stats
-    scraper_status['stats'] = {
-        'maps_scraped': 0,
-        'websites_scraped': 0,
-        'emails_found': 0,
-        'owners_found': 0
-    }
+    error = validate_config(config)
+    if error:
+        return jsonify({'error': error}), 400
     
-    # Start scraper in background thread
-    scraper_thread = threading.Thread(target=run_scraper, args=(config,))
-    scraper_thread.daemon = True
-    scraper_thread.start()
+    job = job_manager.submit(config)
     
-    return jsonify({'message': 'Scraper started successfully'}), 200
+    return jsonify({'message': 'Scraper started successfully', 'job_id': job.id}), 200
 
 @app.route('/api/stop', methods=['POST'])
 def stop_scraper():
-    """Stop the running scraper"""
-    if not scraper_status['running']:
+    """Stop a job (the given job_id, or the most recent one)"""
+    job_id = (request.get_json(silent=True) or {}).get('job_id')
+    job = job_manager.get(job_id) if job_id else job_manager.latest()
+    
+    if job is None or job.state not in ('queued', 'running'):
         return jsonify({'error': 'Scraper is not running'}), 400
     
-    # TODO: Implement graceful shutdown
-    scraper_status['running'] = False
-    ProgressEmitter.emit_log('⏹️ Scraper stopped by user', 'warning')
+    job_manager.cancel(job.id)
     
-    return jsonify({'message': 'Scraper stop requested'}), 200
+    return jsonify({'message': 'Scraper stop requested', 'job_id': job.id}), 200
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
-    """Get current scraper status"""
-    return jsonify(scraper_status), 200
+    """Get status of the most recent job"""
+    return jsonify(latest_status()), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text-format metrics for both stages and the job queues"""
+    QUEUE_DEPTH.labels(queue='jobs').set(job_manager.queue_depth())
+    ACTIVE_WORKERS.labels(kind='jobs').set(job_manager.active_count())
+    task_counts = coordinator.queue_counts()
+    QUEUE_DEPTH.labels(queue='distributed_tasks').set(task_counts['pending'])
+    ACTIVE_WORKERS.labels(kind='distributed_tasks').set(task_counts['leased'])
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def result_filters(args):
+    """Result filters from query parameters (has_email, city, min_rating)"""
+    filters = {}
+    if args.get('has_email', '').lower() in ('1', 'true', 'yes'):
+        filters['has_email'] = True
+    if args.get('city'):
+        filters['city'] = args['city']
+    if args.get('min_rating'):
+        filters['min_rating'] = float(args['min_rating'].replace(',', '.'))
+    return filters
+
+def result_fields(args):
+    """Columns requested with ?fields=name,email (None = all)"""
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    return fields or None
+
+def results_response(file_path):
+    """One page of a job's results as JSON"""
+    store_path = store_path_for(file_path)
+    if not os.path.exists(store_path):
+        return jsonify({'error': 'Results not found'}), 404
+    
+    try:
+        filters = result_filters(request.args)
+        cursor = int(request.args.get('cursor') or 0)
+        limit = min(max(int(request.args.get('limit', 100)), 1), MAX_RESULTS_PAGE)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    
+    store = ResultStore(store_path, read_only=True)
+    try:
+        rows, next_cursor = store.page(result_fields(request.args), cursor, limit, filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        store.close()
+    return jsonify({'rows': rows, 'next_cursor': next_cursor, 'limit': limit}), 200
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """Browse the results of one job page by page"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return results_response(job.output_path)
+
+@app.route('/api/results', methods=['GET'])
+def results():
+    """Browse results by job_id or output path (?cursor=&limit=&fields=&has_email=&city=&min_rating=)"""
+    job_id = request.args.get('job_id')
+    if job_id:
+        return job_results(job_id)
+    
+    file_path = request.args.get('path')
+    if not file_path:
+        return jsonify({'error': 'No job_id or path provided'}), 400
+    if not file_path.startswith(OUTPUT_DIR):
+        return jsonify({'error': 'Invalid file path'}), 403
+    return results_response(file_path)
 
 @app.route('/api/download', methods=['GET'])
 def download_file():
@@ -169,18 +345,132 @@ def download_file():
     if not file_path.startswith(OUTPUT_DIR):
         return jsonify({'error': 'Invalid file path'}), 403
     
-    # Check if file exists
-    if not os.path.exists(file_path):
+    return export_response(file_path)
+
+def gzip_stream(chunks):
+    """Gzip text chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def read_file_chunks(file_path, chunk_size=65536):
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def export_response(file_path):
+    """Stream the results behind a job's CSV path in the requested format"""
+    filename = os.path.basename(file_path)
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'jsonl'):
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    compress = request.args.get('compress', '')
+    if compress not in ('', 'gzip'):
+        return jsonify({'error': f'Unsupported compression: {compress}'}), 400
+    
+    # Results live in a SQLite store next to the CSV path; export is streamed from it
+    store_path = store_path_for(file_path)
+    if os.path.exists(store_path):
+        store = ResultStore(store_path, read_only=True)
+        try:
+            fields = store.check_fields(result_fields(request.args))
+            filters = result_filters(request.args)
+        except ValueError as e:
+            store.close()
+            return jsonify({'error': str(e)}), 400
+        
+        def generate():
+            try:
+                if export_format == 'jsonl':
+                    chunks = store.iter_jsonl(fields=fields, filters=filters)
+                else:
+                    chunks = store.iter_csv(fields=fields, filters=filters)
+                for chunk in chunks:
+                    yield chunk
+            finally:
+                store.close()
+        
+        chunks = generate()
+        if export_format == 'jsonl':
+            filename = os.path.splitext(filename)[0] + '.jsonl'
+            mimetype = 'application/x-ndjson'
+        else:
+            mimetype = 'text/csv'
+    elif os.path.exists(file_path):
+        if not compress:
+            return send_file(file_path, as_attachment=True, download_name=filename)
+        chunks = read_file_chunks(file_path)
+        mimetype = 'text/csv'
+    else:
         return jsonify({'error': 'File not found'}), 404
     
-    filename = os.path.basename(file_path)
-    return send_file(file_path, as_attachment=True, download_name=filename)
+    if compress == 'gzip':
+        chunks = gzip_stream(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     print('Client connected')
-    emit('status', scraper_status)
+    emit('status', latest_status())
+
+@socketio.on('join_job')
+def handle_join_job(data):
+    """Subscribe the client to a job's status and log events"""
+    job = job_manager.get((data or {}).get('job_id'))
+    if job is None:
+        emit('job_error', {'error': 'Job not found'})
+        return
+    join_room(job.room)
+    emit('status', job.snapshot())
+    # Replay the job's ring buffer so late joiners see its recent history
+    emit('log_batch', {'logs': list(job.logs), 'dropped': 0, 'replay': True})
+
+@socketio.on('resume_rows')
+def handle_resume_rows(data):
+    """Send a client the result rows that changed after the last sequence number it has"""
+    data = data or {}
+    job = job_manager.get(data.get('job_id'))
+    if job is None:
+        emit('job_error', {'error': 'Job not found'})
+        return
+    
+    store_path = store_path_for(job.output_path)
+    if not os.path.exists(store_path):
+        emit('row_delta', {'rows': [], 'last_seq': 0, 'more': False, 'replay': True})
+        return
+    
+    store = ResultStore(store_path, read_only=True)
+    try:
+        after_seq = int(data.get('after_seq') or 0)
+        deltas, more = store.changes_since(after_seq, limit=ROW_REPLAY_BATCH)
+    finally:
+        store.close()
+    emit('row_delta', {
+        'rows': deltas,
+        'last_seq': deltas[-1]['seq'] if deltas else after_seq,
+        'more': more,
+        'replay': True
+    })
+
+@socketio.on('leave_job')
+def handle_leave_job(data):
+    """Unsubscribe the client from a job's events"""
+    job = job_manager.get((data or {}).get('job_id'))
+    if job is not None:
+        leave_room(job.room)
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -188,4 +478,8 @@ def handle_disconnect():
     print('Client disconnected')
 
 if __name__ == '__main__':
+    # With the debug reloader this file runs in a watcher process too; only the serving child warms up
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        browser_pool.start()
+        job_manager.preload()
     socketio.run(app, host='0.0.0.0', port=5001, debug=True, allow_unsafe_werkzeug=True)
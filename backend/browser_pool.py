@@ -0,0 +1,134 @@
+"""
+Browsers launched ahead of time for Stage 1
+
+Launching Chrome or Edge (and importing Selenium the first time) costs
+several seconds before a job's first search. The app starts a
+WarmBrowserPool at server start: a background thread launches `size`
+browsers and refills the pool whenever a job takes one, so jobs (and
+browser restarts) usually start on a running browser. Browsers are never
+returned: a job's browser holds its cookies and memory growth, so the pool
+only hands out fresh ones. Safari allows one WebDriver session at a time
+and is not pooled.
+"""
+import threading
+import time
+
+from metrics import BROWSERS_OPEN, WARM_BROWSER_REQUESTS
+
+
+class WarmBrowserPool:
+    """Pre-launched Chrome/Edge WebDrivers handed to Stage 1 scrapers"""
+
+    def __init__(self, size=1, browser='chrome', headless=False, log=print):
+        """
+        Args:
+            size: Browsers kept ready
+            browser: 'chrome' or 'edge'; jobs using another browser start their own
+            headless: Whether the pooled browsers run headless; jobs must match
+            log: Callable for progress messages
+        """
+        if browser not in ('chrome', 'edge'):
+            raise ValueError(f'Only Chrome and Edge can be pooled, not {browser}')
+        self.size = size
+        self.browser = browser
+        self.headless = headless
+        self.log = log
+        self.idle = []
+        self.lock = threading.Lock()
+        self.wanted = threading.Event()
+        self.closed = False
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+        self.launch_seconds = None
+
+    def start(self):
+        """Start filling the pool in the background"""
+        if self.size > 0 and self.thread is None:
+            self.thread = threading.Thread(target=self._fill_loop, name='warm-browser-pool')
+            self.thread.daemon = True
+            self.thread.start()
+            self.wanted.set()
+        return self
+
+    def _fill_loop(self):
+        # Imported here so the app boots without loading Selenium
+        from maps_scraper_configurable import launch_driver
+
+        failures = 0
+        while not self.closed:
+            self.wanted.wait()
+            with self.lock:
+                missing = self.size - len(self.idle)
+                if missing <= 0 or self.closed:
+                    self.wanted.clear()
+                    continue
+            started = time.perf_counter()
+            try:
+                driver = launch_driver(self.browser, self.headless)
+            except Exception as e:
+                failures += 1
+                self.log(f'⚠️ Warm browser failed to start: {str(e).splitlines()[0]}')
+                # Back off instead of spinning on a browser that can't start
+                time.sleep(min(300, 5 * 2 ** failures))
+                continue
+            failures = 0
+            self.launch_seconds = time.perf_counter() - started
+            BROWSERS_OPEN.inc()
+            with self.lock:
+                if not self.closed:
+                    self.idle.append(driver)
+                    driver = None
+            if driver is not None:
+                self._quit(driver)
+            else:
+                self.log(f'🔥 Warm {self.browser} browser ready ({self.launch_seconds:.1f}s to launch)')
+
+    def acquire(self, browser, headless):
+        """
+        A running browser matching the job's settings, or None to start one
+
+        The caller owns the returned driver (and counts it in BROWSERS_OPEN).
+        """
+        if browser != self.browser or bool(headless) != bool(self.headless):
+            return None
+        while True:
+            with self.lock:
+                driver = self.idle.pop() if self.idle else None
+            if driver is None:
+                self.misses += 1
+                WARM_BROWSER_REQUESTS.labels(outcome='miss').inc()
+                self.wanted.set()
+                return None
+            self.wanted.set()
+            BROWSERS_OPEN.dec()
+            try:
+                # Browsers can die while idle
+                driver.title
+            except Exception:
+                self._quit(driver, counted=False)
+                continue
+            self.hits += 1
+            WARM_BROWSER_REQUESTS.labels(outcome='hit').inc()
+            return driver
+
+    def _quit(self, driver, counted=True):
+        if counted:
+            BROWSERS_OPEN.dec()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.lock:
+            idle = len(self.idle)
+        return {'idle': idle, 'hits': self.hits, 'misses': self.misses, 'launch_seconds': self.launch_seconds}
+
+    def close(self):
+        self.closed = True
+        self.wanted.set()
+        with self.lock:
+            drivers, self.idle = self.idle, []
+        for driver in drivers:
+            self._quit(driver)
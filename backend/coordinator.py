@@ -0,0 +1,277 @@
+import threading
+import time
+
+from job_manager import Job
+from result_store import ResultStore, store_path_for
+from work_queue import TASK_STATUSES
+
+
+class DistributedCoordinator:
+    """
+    Splits jobs into tasks on a shared work queue and merges worker results
+
+    Stage 1 is sharded into one 'maps' task per work unit (city, or map tile
+    with tiling; capped tiles come back with quadrants to queue). Once every
+    Maps task of a job has finished, the job's businesses with a website are
+    split into 'enrich' batches for Stage 2. Workers lease tasks over the
+    HTTP API and report rows back; the coordinator writes them into the job's
+    result store.
+    """
+
+    def __init__(self, socketio, job_manager, work_queue, enrich_batch_size=50, lease_seconds=300):
+        """
+        Args:
+            socketio: Flask-SocketIO server used to emit job events
+            job_manager: JobManager that lists distributed jobs next to local ones
+            work_queue: WorkQueue shared with the workers, or a callable that
+                opens it on first use
+            enrich_batch_size: Businesses per Stage 2 task
+            lease_seconds: Default lease length handed to workers
+        """
+        self.socketio = socketio
+        self.job_manager = job_manager
+        self._queue = None if callable(work_queue) else work_queue
+        self._open_queue = work_queue if callable(work_queue) else None
+        self.enrich_batch_size = enrich_batch_size
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.queue_lock = threading.Lock()
+        self.jobs = {}
+
+    @property
+    def queue(self):
+        """The work queue, opened on first use so importing the app creates no files"""
+        if self._queue is None:
+            with self.queue_lock:
+                if self._queue is None:
+                    self._queue = self._open_queue()
+        return self._queue
+
+    def queue_counts(self):
+        """Task counts by status, all zero while the queue hasn't been opened (so reading them creates nothing)"""
+        if self._queue is None:
+            return dict.fromkeys(TASK_STATUSES, 0)
+        return self._queue.counts()
+
+    def submit(self, config):
+        """Create a distributed job and queue its Stage 1 tasks"""
+        # Import scrapers
+        from scraper_orchestrator import plan_maps_units
+
+        job = Job(config, self.job_manager.output_dir)
+        emitter = self.emitter(job)
+        units = plan_maps_units(job.config, log=emitter.emit_log)
+        task_config = {key: value for key, value in job.config.items() if key != 'output_path'}
+        # Worker rows land here; the store streams them to the job room like a local job's
+        store = ResultStore(store_path_for(job.output_path))
+        store.add_listener(emitter.emit_row)
+
+        with self.lock:
+            self.jobs[job.id] = {
+                'job': job,
+                'store': store,
+                'run_stage_2': job.config.get('run_stage_2', True),
+                'phase': 'maps'
+            }
+        with job.lock:
+            job.status['state'] = 'running'
+            job.status['running'] = True
+            job.status['started_at'] = time.time()
+            job.status['stage'] = 'maps_scraping'
+            job.status['total'] = len(units)
+        self.job_manager.track(job)
+
+        for unit in units:
+            self.queue.put(job.id, 'maps', {'config': task_config, 'unit': unit})
+        job.cancel_token.on_cancel(lambda: self.cancel(job.id))
+
+        self.emitter(job).emit_log(f'🛰️ Distributed job queued: {len(units)} Maps tasks', 'info')
+        return job
+
+    def emitter(self, job):
+        return self.job_manager.emitter(job)
+
+    def lease(self, worker_id, kinds=None, lease_seconds=None):
+        """Lease a task for a worker, settling jobs whose tasks expired for good"""
+        for job_id in self.queue.requeue_expired():
+            self._advance(job_id)
+        return self.queue.lease(worker_id, kinds=kinds, lease_seconds=lease_seconds or self.lease_seconds)
+
+    def heartbeat(self, task_id, worker_id, lease_seconds=None):
+        return self.queue.heartbeat(task_id, worker_id, lease_seconds or self.lease_seconds)
+
+    def report_result(self, task_id, worker_id, rows, units=None):
+        """Store the rows a worker produced for a task and mark it done"""
+        task = self.queue.get(task_id)
+        entry = self._entry(task['job_id']) if task else None
+        if entry is None:
+            return False
+        job = entry['job']
+        # Follow-up units are queued under the lock so _advance never sees the
+        # phase drained between completing the task and queueing them
+        with self.lock:
+            if not self.queue.complete(task_id, worker_id):
+                # Lease expired and the task was handed to another worker
+                return False
+            for unit in units or []:
+                self.queue.put(job.id, 'maps', {'config': task['payload']['config'], 'unit': unit})
+        if units:
+            counts = self.queue.counts(job.id)
+            self.emitter(job).emit_log(
+                f"🧩 {task['payload']['unit']['query']}: split into {len(units)} tiles", 'info'
+            )
+            self.emitter(job).update_status(total=counts['pending'] + counts['leased'] + counts['done'] + counts['failed'])
+
+        store = entry['store']
+        if task['kind'] == 'maps':
+            saved = sum(1 for row in rows if store.add_business(row))
+            self.emitter(job).emit_log(
+                f"✓ {task['payload']['unit']['search_term']} {task['payload']['unit']['city']}: "
+                f"{saved} listings from worker {worker_id}", 'success'
+            )
+            self.emitter(job).update_status(stats={'maps_scraped': store.count()})
+        else:
+            for row in rows:
+                store.update_business(row)
+            with job.lock:
+                stats = job.status['stats']
+                stats['websites_scraped'] += len(rows)
+                stats['emails_found'] += sum(1 for row in rows if row.get('email'))
+                stats['owners_found'] += sum(1 for row in rows if row.get('owner'))
+            self.emitter(job).emit_log(f'✓ Enriched {len(rows)} businesses on worker {worker_id}', 'success')
+
+        self._advance(task['job_id'])
+        return True
+
+    def report_failure(self, task_id, worker_id, error):
+        """Release a failed task for retry"""
+        task = self.queue.get(task_id)
+        if task is None or not self.queue.fail(task_id, worker_id, error):
+            return False
+        entry = self._entry(task['job_id'])
+        if entry:
+            self.emitter(entry['job']).emit_log(f'⚠️ Task {task_id} failed on {worker_id}: {error}', 'warning')
+        self._advance(task['job_id'])
+        return True
+
+    def report_block(self, task_id, worker_id, error):
+        """Take back a task Google blocked, without using up one of its attempts"""
+        task = self.queue.get(task_id)
+        if task is None:
+            return False
+        max_blocks = task['payload'].get('config', {}).get('max_block_retries', 3)
+        if not self.queue.release(task_id, worker_id, error, max_blocks=max_blocks):
+            return False
+        entry = self._entry(task['job_id'])
+        if entry:
+            if task['blocks'] < max_blocks:
+                self.emitter(entry['job']).emit_log(
+                    f"🚧 Task {task_id} blocked on {worker_id}, requeued "
+                    f"(attempt {task['blocks'] + 2}/{max_blocks + 1})", 'warning'
+                )
+            else:
+                self.emitter(entry['job']).emit_log(
+                    f"❌ Task {task_id} still blocked after {task['blocks'] + 1} attempts, giving up", 'error'
+                )
+        self._advance(task['job_id'])
+        return True
+
+    def cancel(self, job_id):
+        """Drop a job's unfinished tasks; workers holding them lose their lease"""
+        entry = self._entry(job_id)
+        if entry is None:
+            return
+        with self.lock:
+            if entry['phase'] == 'done':
+                return
+            entry['phase'] = 'done'
+        dropped = self.queue.cancel_job(job_id)
+        self.emitter(entry['job']).emit_log(f'⏹️ Cancelled {dropped} unfinished tasks', 'warning')
+        self._finish(entry, self.queue.counts(job_id))
+
+    def _entry(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _advance(self, job_id):
+        """Update progress and move the job to its next phase when a phase drains"""
+        entry = self._entry(job_id)
+        if entry is None:
+            return
+        job = entry['job']
+        counts = self.queue.counts(job_id)
+        finished = counts['done'] + counts['failed']
+        self.emitter(job).update_status(progress=finished)
+        if counts['pending'] or counts['leased']:
+            return
+
+        with self.lock:
+            # Re-check: report_result may have queued follow-up tiles meanwhile
+            counts = self.queue.counts(job_id)
+            if counts['pending'] or counts['leased']:
+                return
+            phase = entry['phase']
+            next_phase = 'enrich' if phase == 'maps' and entry['run_stage_2'] else 'done'
+            if phase == next_phase or phase == 'done':
+                return
+            entry['phase'] = next_phase
+
+        if next_phase == 'enrich' and self._queue_enrichment(entry, counts):
+            return
+        self._finish(entry, counts)
+
+    def _queue_enrichment(self, entry, counts):
+        """Queue Stage 2 batches; returns False if there is nothing to enrich"""
+        job = entry['job']
+        task_config = {key: value for key, value in job.config.items() if key != 'output_path'}
+        batch = []
+        batches = 0
+        for row in entry['store'].iter_rows():
+            if not row.get('website'):
+                continue
+            batch.append(row)
+            if len(batch) >= self.enrich_batch_size:
+                self.queue.put(job.id, 'enrich', {'config': task_config, 'rows': batch})
+                batches += 1
+                batch = []
+        if batch:
+            self.queue.put(job.id, 'enrich', {'config': task_config, 'rows': batch})
+            batches += 1
+
+        if not batches:
+            return False
+        self.emitter(job).emit_log(f'🌐 Stage 2: queued {batches} enrichment batches', 'info')
+        self.emitter(job).update_status(
+            stage='website_enrichment',
+            total=counts['done'] + counts['failed'] + batches
+        )
+        return True
+
+    def _finish(self, entry, counts):
+        job = entry['job']
+        with job.lock:
+            if job.cancel_token.cancelled:
+                job.status['state'] = 'cancelled'
+            else:
+                job.status['state'] = 'completed' if not counts['failed'] else 'failed'
+            job.status['error'] = f"{counts['failed']} tasks failed" if counts['failed'] else None
+            job.status['csv_path'] = job.output_path
+            job.status['running'] = False
+            job.status['stage'] = None
+            job.status['finished_at'] = time.time()
+        entry['store'].close()
+        # Late reports for this job's tasks find no entry and are rejected
+        with self.lock:
+            self.jobs.pop(job.id, None)
+        cancelled = job.cancel_token.cancelled
+        if cancelled:
+            self.emitter(job).emit_log('⏹️ Distributed job stopped, partial results saved', 'warning')
+        else:
+            self.emitter(job).emit_log('✅ Distributed job finished', 'success')
+        self.emitter(job).emit_final_snapshot()
+        self.socketio.emit(
+            'scraping_cancelled' if cancelled else 'scraping_complete',
+            {'job_id': job.id, 'csv_path': job.output_path},
+            to=job.room,
+            namespace='/'
+        )
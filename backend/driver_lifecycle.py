@@ -0,0 +1,142 @@
+"""
+Browser lifecycle for long Stage 1 runs
+
+Chrome's memory grows over hours of Maps browsing and a session
+occasionally hangs. DriverLifecycle owns a job's MapMiner: it recycles the
+browser after a number of work units or listings or once its processes use
+too much memory, and when the browser stops answering (every WebDriver call
+has a timeout, see MapMiner's command_timeout) it restarts it and retries
+the current work unit. Places saved before the failure are skipped on the
+retry, so nothing is clicked twice.
+
+When Google serves a captcha or throttling page (MapsBlocked), the browser
+cools off for the time its AdaptiveThrottle asks for (after a captcha with
+a fresh browser) and the block is passed on so the caller can requeue the
+work unit.
+"""
+from maps_blocks import MapsBlocked
+from maps_scraper_configurable import DriverUnresponsive, is_driver_failure
+from metrics import STAGE1_DRIVER_RESTARTS
+
+
+class DriverLifecycle:
+    """Creates, recycles and restarts the Stage 1 browser of a job"""
+
+    def __init__(self, factory, cancel_token, recycle_after_units=20, recycle_after_listings=0,
+                 max_rss_mb=2048, max_retries=1, log=print):
+        """
+        Args:
+            factory: Callable returning a new MapMiner
+            cancel_token: The job's CancellationToken
+            recycle_after_units: Restart the browser after this many work units (0 = never)
+            recycle_after_listings: Restart after this many saved listings (0 = never)
+            max_rss_mb: Restart once browser and driver processes use more memory (0 = never)
+            max_retries: Restarts and retries of a work unit whose browser hung or died
+            log: Callable(message, level) for progress messages
+        """
+        self.factory = factory
+        self.cancel_token = cancel_token
+        self.recycle_after_units = recycle_after_units
+        self.recycle_after_listings = recycle_after_listings
+        self.max_rss_mb = max_rss_mb
+        self.max_retries = max_retries
+        self.log = log
+        self.scraper = None
+        self.units = 0
+        self.listings = 0
+        self.restarts = 0
+        self.recycles = 0
+        self.rss_mb = None
+
+    def start(self):
+        """Start the browser if it isn't running yet and return the scraper"""
+        if self.scraper is None:
+            self.scraper = self.factory()
+        return self.scraper
+
+    def run(self, unit_fn):
+        """
+        Run `unit_fn(scraper, saved)` for one work unit, restarting and retrying on a browser failure
+
+        `saved` is the number of listings earlier failed attempts of this
+        unit already saved, so a retry can lower its target. unit_fn returns
+        (results, follow_ups) like scrape_work_unit. Listings saved by a
+        failed attempt are added to the returned results.
+        """
+        self.start()
+        self._maybe_recycle()
+        saved = []
+        attempt = 0
+        while True:
+            try:
+                results, follow_ups = unit_fn(self.scraper, len(saved))
+                break
+            except MapsBlocked as e:
+                e.results = saved + e.results
+                self._cool_off(e)
+                raise
+            except Exception as e:
+                self.cancel_token.raise_if_cancelled()
+                if not isinstance(e, DriverUnresponsive) and not is_driver_failure(e):
+                    raise
+                saved.extend(getattr(e, 'results', []))
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.log(f'🔁 Browser stopped responding ({str(e).splitlines()[0][:120]}), restarting and retrying', 'warning')
+                self._restart('hung')
+                self.restarts += 1
+
+        self.scraper.throttle.success()
+        self.units += 1
+        self.listings += len(saved) + len(results)
+        return saved + results, follow_ups
+
+    def _cool_off(self, blocked):
+        """Pause this browser after a block page, with a fresh browser after a captcha"""
+        throttle = self.scraper.throttle
+        cooloff = throttle.cooloff()
+        self.log(f'🚧 Google served a {blocked.kind} page: cooling off {cooloff:.0f}s, '
+                 f'then {throttle.slowdown:.1f}x slower ({throttle.blocks_last_hour()} blocks in the last hour)',
+                 'warning')
+        if blocked.kind == 'captcha':
+            # The session's cookies are flagged; don't keep using them
+            self._restart('blocked')
+            self.restarts += 1
+        self.cancel_token.sleep(cooloff)
+
+    def _maybe_recycle(self):
+        """Restart the browser before a unit if it has done enough work or grown too large"""
+        reason = None
+        if self.recycle_after_units and self.units >= self.recycle_after_units:
+            reason = f'{self.units} searches'
+        elif self.recycle_after_listings and self.listings >= self.recycle_after_listings:
+            reason = f'{self.listings} listings'
+        else:
+            self.rss_mb = self.scraper.driver_rss_mb()
+            if self.max_rss_mb and self.rss_mb and self.rss_mb > self.max_rss_mb:
+                reason = f'{self.rss_mb:.0f} MB browser memory'
+        if reason is None:
+            return
+        self.log(f'♻️ Recycling browser after {reason}', 'info')
+        self._restart('recycle')
+        self.recycles += 1
+
+    def _restart(self, reason):
+        STAGE1_DRIVER_RESTARTS.labels(reason=reason).inc()
+        self.scraper.restart()
+        self.units = 0
+        self.listings = 0
+        self.rss_mb = self.scraper.driver_rss_mb()
+
+    def stats(self):
+        return {
+            'driver_restarts': self.restarts,
+            'driver_recycles': self.recycles,
+            'driver_rss_mb': round(self.rss_mb) if self.rss_mb else None,
+            **(self.scraper.throttle.stats() if self.scraper is not None else {})
+        }
+
+    def close(self):
+        if self.scraper is not None:
+            self.scraper.close()
@@ -0,0 +1,360 @@
+import os
+import threading
+import queue
+import uuid
+import time
+from collections import deque
+from datetime import datetime
+
+from cancellation import CancellationToken
+from progress_emitter import CoalescingEmitter
+from metrics import JOB_TIME_TO_FIRST_RESULT
+
+
+class Job:
+    """A single scraping job with its own status and log history"""
+
+    STATES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+
+    def __init__(self, config, output_dir):
+        self.id = uuid.uuid4().hex[:12]
+        self.config = dict(config)
+        self.lock = threading.Lock()
+        self.logs = deque(maxlen=500)
+        self.cancel_token = CancellationToken()
+
+        # Output path: search term + timestamp + job id so parallel jobs never collide
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        search_term = self.config.get('search_terms') or self.config.get('search_term') or 'results'
+        if isinstance(search_term, (list, tuple)):
+            search_term = '+'.join(search_term)
+        search_term = str(search_term).replace(', ', '+').replace(',', '+').replace(' ', '_')[:80]
+        self.output_path = os.path.join(output_dir, f'{search_term}_{timestamp}_{self.id}.csv')
+        self.config['output_path'] = self.output_path
+
+        self.status = {
+            'job_id': self.id,
+            'state': 'queued',
+            'running': False,
+            'stage': None,
+            'progress': 0,
+            'total': 0,
+            'current_item': '',
+            'csv_path': None,
+            'search_term': self.config.get('search_terms') or self.config.get('search_term'),
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'time_to_first_result': None,
+            'error': None,
+            'stats': {
+                'maps_scraped': 0,
+                'websites_scraped': 0,
+                'emails_found': 0,
+                'owners_found': 0,
+                'filter_rejections': {},
+                'driver_restarts': 0,
+                'driver_recycles': 0,
+                'driver_rss_mb': None,
+                'blocks': {},
+                'blocks_last_hour': 0,
+                'empty_feeds': 0,
+                'render_recovered': 0
+            }
+        }
+
+    @property
+    def room(self):
+        """Socket.IO room that receives this job's events"""
+        return f'job_{self.id}'
+
+    @property
+    def state(self):
+        return self.status['state']
+
+    def snapshot(self):
+        """Copy of the job status safe to serialize from another thread"""
+        with self.lock:
+            status = dict(self.status)
+            status['stats'] = dict(self.status['stats'])
+            return status
+
+
+class JobProgressEmitter:
+    """
+    Progress callback for one job
+
+    Log lines go to the job's ring buffer (replayed to late joiners) and,
+    like status changes and result row deltas, are handed to the
+    CoalescingEmitter, which sends them to the job's room in batches.
+    """
+
+    def __init__(self, batcher, job):
+        self.batcher = batcher
+        self.job = job
+
+    def emit_log(self, message, level='info'):
+        """Record a log line for the job and queue it for the job's room"""
+        entry = {
+            'job_id': self.job.id,
+            'message': message,
+            'level': level,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.job.logs.append(entry)
+        self.batcher.log(self.job.room, entry)
+
+    def update_status(self, stage=None, progress=None, total=None, current_item=None, stats=None):
+        """Update the job status and queue the changed fields for the job's room"""
+        delta = {}
+        with self.job.lock:
+            status = self.job.status
+            if stage is not None:
+                status['stage'] = delta['stage'] = stage
+            if progress is not None:
+                status['progress'] = delta['progress'] = progress
+            if total is not None:
+                status['total'] = delta['total'] = total
+            if current_item is not None:
+                status['current_item'] = delta['current_item'] = current_item
+            if stats is not None:
+                status['stats'].update(stats)
+                delta['stats'] = dict(stats)
+        if delta:
+            delta['job_id'] = self.job.id
+            self.batcher.status(self.job.room, delta)
+
+    def emit_row(self, delta):
+        """Queue a result row delta ({'id', 'seq', 'row'}) for the job's room"""
+        first = False
+        with self.job.lock:
+            status = self.job.status
+            if status['time_to_first_result'] is None and status['started_at']:
+                status['time_to_first_result'] = round(time.time() - status['started_at'], 1)
+                first = True
+        if first:
+            JOB_TIME_TO_FIRST_RESULT.observe(status['time_to_first_result'])
+            self.emit_log(f"⏱️ First result after {status['time_to_first_result']:.1f}s", 'info')
+            self.batcher.status(self.job.room, {
+                'job_id': self.job.id, 'time_to_first_result': status['time_to_first_result']
+            })
+        self.batcher.row(self.job.room, delta)
+
+    def emit_snapshot(self):
+        """Flush pending events, then send the full job status (used on state changes)"""
+        self.batcher.flush(self.job.room)
+        self._send_snapshot(self.batcher.counters(self.job.room))
+
+    def emit_final_snapshot(self):
+        """Send everything still pending and the final job status, then release the job's channel"""
+        counters = self.batcher.close(self.job.room)
+        if counters is not None:
+            with self.job.lock:
+                self.job.status['emitter'] = counters
+        self._send_snapshot(counters)
+
+    def _send_snapshot(self, counters):
+        status = self.job.snapshot()
+        if counters is not None:
+            status['emitter'] = counters
+        self.batcher.socketio.emit('status', status, to=self.job.room, namespace='/')
+
+
+class JobManager:
+    """
+    Queues scraping jobs and runs them on a bounded set of worker threads
+
+    Stage 1 (a browser per job) and Stage 2 (network-bound) are gated by
+    separate semaphores, so a job that finished its Maps stage frees its
+    browser slot for the next job while it enriches websites.
+    """
+
+    def __init__(self, socketio, output_dir, max_jobs=None, stage1_concurrency=1, stage2_concurrency=2,
+                 emit_interval=0.25, browser_pool=None):
+        """
+        Args:
+            socketio: Flask-SocketIO server used to emit job events
+            output_dir: Directory for job output files
+            max_jobs: Jobs that may run at once (default: stage1 + stage2 limits)
+            stage1_concurrency: Jobs allowed in Stage 1 (browser) at the same time
+            stage2_concurrency: Jobs allowed in Stage 2 (websites) at the same time
+            emit_interval: Seconds between batched log/status emissions
+            browser_pool: Optional WarmBrowserPool jobs take their Stage 1 browser from
+        """
+        self.socketio = socketio
+        self.batcher = CoalescingEmitter(socketio, interval=emit_interval)
+        self.output_dir = output_dir
+        self.browser_pool = browser_pool
+        self.stage1_concurrency = stage1_concurrency
+        self.stage2_concurrency = stage2_concurrency
+        self.max_jobs = max_jobs or (stage1_concurrency + stage2_concurrency)
+        self.stage_slots = {
+            'maps': threading.BoundedSemaphore(stage1_concurrency),
+            'website': threading.BoundedSemaphore(stage2_concurrency)
+        }
+
+        self.jobs = {}
+        self.order = []
+        self.lock = threading.Lock()
+        self.pending = queue.Queue()
+
+        for i in range(self.max_jobs):
+            worker = threading.Thread(target=self._worker_loop, name=f'job-worker-{i}')
+            worker.daemon = True
+            worker.start()
+
+    def preload(self):
+        """
+        Import the scraper modules in the background
+
+        They pull in Selenium, BeautifulSoup and requests, which the server
+        doesn't need to boot; loading them now spares the first job the wait.
+        """
+        def load():
+            started = time.perf_counter()
+            import scraper_orchestrator  # noqa: F401
+            print(f'📦 Scraper modules loaded in {time.perf_counter() - started:.1f}s')
+
+        thread = threading.Thread(target=load, name='preload-scrapers')
+        thread.daemon = True
+        thread.start()
+
+    def submit(self, config):
+        """Queue a new job and return it"""
+        job = Job(config, self.output_dir)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.order.append(job.id)
+        self.pending.put(job.id)
+        self.emitter(job).emit_log(
+            f'🕒 Job queued ({self.queue_depth()} waiting)', 'info'
+        )
+        self.socketio.emit('job_queued', job.snapshot(), namespace='/')
+        return job
+
+    def emitter(self, job):
+        """Progress callback that reports into the given job"""
+        return JobProgressEmitter(self.batcher, job)
+
+    def track(self, job):
+        """List a job that runs elsewhere (e.g. on distributed workers) without queueing it"""
+        with self.lock:
+            self.jobs[job.id] = job
+            self.order.append(job.id)
+        self.socketio.emit('job_queued', job.snapshot(), namespace='/')
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def latest(self):
+        """Most recently submitted job, or None"""
+        with self.lock:
+            return self.jobs[self.order[-1]] if self.order else None
+
+    def list_jobs(self):
+        with self.lock:
+            jobs = [self.jobs[job_id] for job_id in self.order]
+        return [job.snapshot() for job in jobs]
+
+    def queue_depth(self):
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job.state == 'queued')
+
+    def active_count(self):
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if job.state == 'running')
+
+    def cancel(self, job_id):
+        """
+        Cancel a job
+
+        Queued jobs are dropped before they start. Running jobs have their
+        cancellation token fired, which stops the browser, pending website
+        lookups and sleeps; the job ends in the 'cancelled' state.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+
+        emitter = self.emitter(job)
+        with job.lock:
+            dequeued = job.status['state'] == 'queued'
+            if dequeued:
+                job.status['state'] = 'cancelled'
+                job.status['finished_at'] = time.time()
+        emitter.emit_log('⏹️ Job stop requested by user', 'warning')
+        job.cancel_token.cancel('stopped by user')
+        if dequeued:
+            # The job never runs, so this is its last update
+            emitter.emit_final_snapshot()
+        else:
+            emitter.emit_snapshot()
+        return job
+
+    def _worker_loop(self):
+        """Take queued jobs one at a time and run them"""
+        while True:
+            job_id = self.pending.get()
+            job = self.get(job_id)
+            if job is None:
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job):
+        """Run one job through the orchestrator"""
+        emitter = self.emitter(job)
+        with job.lock:
+            # Cancelled while waiting in the queue
+            if job.status['state'] != 'queued':
+                return
+            job.status['state'] = 'running'
+            job.status['running'] = True
+            job.status['started_at'] = time.time()
+
+        try:
+            emitter.emit_log('🚀 Starting scraper...', 'info')
+
+            # Import scrapers
+            from scraper_orchestrator import ScraperOrchestrator
+
+            orchestrator = ScraperOrchestrator(
+                config=job.config,
+                progress_callback=emitter,
+                stage_slots=self.stage_slots,
+                cancel_token=job.cancel_token,
+                browser_pool=self.browser_pool
+            )
+            orchestrator.run()
+
+            cancelled = job.cancel_token.cancelled
+            with job.lock:
+                job.status['state'] = 'cancelled' if cancelled else 'completed'
+                job.status['csv_path'] = job.output_path
+            if cancelled:
+                emitter.emit_log('⏹️ Scraping stopped, partial results saved', 'warning')
+            else:
+                emitter.emit_log('✅ Scraping completed successfully!', 'success')
+            terminal_event = 'scraping_cancelled' if cancelled else 'scraping_complete'
+
+        except Exception as e:
+            terminal_event = None
+            with job.lock:
+                job.status['state'] = 'failed'
+                job.status['error'] = str(e)
+            emitter.emit_log(f'❌ Error: {str(e)}', 'error')
+        finally:
+            with job.lock:
+                job.status['running'] = False
+                job.status['stage'] = None
+                job.status['finished_at'] = time.time()
+            emitter.emit_final_snapshot()
+
+        # Sent after the final flush, so clients have the last logs and rows by then
+        if terminal_event:
+            self.socketio.emit(
+                terminal_event,
+                {'job_id': job.id, 'csv_path': job.output_path},
+                to=job.room,
+                namespace='/'
+            )
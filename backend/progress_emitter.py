@@ -0,0 +1,204 @@
+import math
+import threading
+import time
+
+
+class _Channel:
+    """Pending events and counters for one Socket.IO room"""
+
+    def __init__(self):
+        self.logs = []
+        self.status = {}
+        self.status_updates = 0
+        self.logs_emitted = 0
+        self.logs_dropped = 0
+        self.status_merged = 0
+        self.rows = []
+        self.rows_emitted = 0
+        self.resync_after = None
+
+
+class CoalescingEmitter:
+    """
+    Batches log lines and status changes per room and emits them on a timer
+
+    Instead of one Socket.IO message per log line and per status change, each
+    room gets at most one 'log_batch' and one 'status_delta' per interval.
+    When more log lines arrive in an interval than fit the batch budget,
+    warning/error/success lines are kept first and info lines are sampled
+    evenly to fill the rest; a burst of more priority lines than the budget
+    is sampled the same way. The skipped lines are counted as dropped.
+
+    Result row deltas are sent as 'row_delta' batches of at most
+    max_rows_per_batch; the rest carries over to the next flush. If a room
+    falls more than max_pending_rows behind, its pending deltas are dropped
+    and the next batch asks clients to resync from the last sequence number
+    they have (see the 'resume_rows' Socket.IO event). A finished job's
+    room is close()d: everything pending goes out and its channel is dropped.
+    """
+
+    PRIORITY_LEVELS = ('error', 'warning', 'success')
+
+    def __init__(self, socketio, interval=0.25, max_logs_per_batch=50, max_rows_per_batch=500,
+                 max_pending_rows=5000):
+        """
+        Args:
+            socketio: Flask-SocketIO server
+            interval: Seconds between flushes
+            max_logs_per_batch: Log lines per room and flush before sampling kicks in
+            max_rows_per_batch: Row deltas per room and flush
+            max_pending_rows: Row deltas a room may fall behind before it is told to resync
+        """
+        self.socketio = socketio
+        self.interval = interval
+        self.max_logs_per_batch = max_logs_per_batch
+        self.max_rows_per_batch = max_rows_per_batch
+        self.max_pending_rows = max_pending_rows
+        self.lock = threading.Lock()
+        self.channels = {}
+
+        flusher = threading.Thread(target=self._flush_loop, name='progress-flusher')
+        flusher.daemon = True
+        flusher.start()
+
+    def _channel(self, room):
+        channel = self.channels.get(room)
+        if channel is None:
+            channel = self.channels[room] = _Channel()
+        return channel
+
+    def log(self, room, entry):
+        """Queue a log entry for the room"""
+        with self.lock:
+            self._channel(room).logs.append(entry)
+
+    def status(self, room, delta):
+        """Merge a status change into the room's pending delta"""
+        with self.lock:
+            channel = self._channel(room)
+            for key, value in delta.items():
+                if key == 'stats' and isinstance(value, dict):
+                    channel.status.setdefault('stats', {}).update(value)
+                else:
+                    channel.status[key] = value
+            channel.status_updates += 1
+
+    def row(self, room, delta):
+        """Queue a result row delta ({'id', 'seq', 'row'}) for the room"""
+        with self.lock:
+            channel = self._channel(room)
+            if channel.resync_after is not None:
+                return
+            if len(channel.rows) >= self.max_pending_rows:
+                # Clients re-read everything after the last delta they got
+                channel.resync_after = channel.rows[0]['seq'] - 1
+                channel.rows = []
+                return
+            channel.rows.append(delta)
+
+    def counters(self, room):
+        """Emitted/dropped/merged counts for a room, or None if it has no channel (e.g. closed)"""
+        with self.lock:
+            channel = self.channels.get(room)
+            return self._counters(channel) if channel is not None else None
+
+    def _counters(self, channel):
+        return {
+            'logs_emitted': channel.logs_emitted,
+            'logs_dropped': channel.logs_dropped,
+            'status_merged': channel.status_merged
+        }
+
+    def close(self, room):
+        """Emit everything pending for a room, row deltas beyond one batch included, and drop its channel"""
+        while True:
+            self.flush(room)
+            with self.lock:
+                channel = self.channels.get(room)
+                if channel is None:
+                    return None
+                if not channel.rows and channel.resync_after is None and not channel.logs and not channel.status:
+                    del self.channels[room]
+                    return self._counters(channel)
+
+    def _sample(self, logs):
+        """Trim a batch to the budget, keeping priority levels first; returns (kept, dropped)"""
+        if len(logs) <= self.max_logs_per_batch:
+            return logs, 0
+
+        priority = [entry['level'] in self.PRIORITY_LEVELS for entry in logs]
+        priority_count = sum(priority)
+        # More priority lines than fit are sampled too, leaving no room for info lines
+        priority_step = math.ceil(priority_count / self.max_logs_per_batch) if priority_count else 1
+        budget = max(0, self.max_logs_per_batch - math.ceil(priority_count / priority_step))
+        info_count = len(logs) - priority_count
+        step = math.ceil(info_count / budget) if budget else None
+
+        kept = []
+        priority_index = 0
+        info_index = 0
+        for entry, is_priority in zip(logs, priority):
+            if is_priority:
+                if priority_index % priority_step == 0:
+                    kept.append(entry)
+                priority_index += 1
+                continue
+            if step and info_index % step == 0:
+                kept.append(entry)
+            info_index += 1
+        return kept, len(logs) - len(kept)
+
+    def flush(self, room=None):
+        """Emit pending events now, for one room or for all rooms"""
+        with self.lock:
+            rooms = [room] if room is not None else list(self.channels)
+            batches = []
+            for name in rooms:
+                channel = self.channels.get(name)
+                if channel is None or (not channel.logs and not channel.status and not channel.rows
+                                       and channel.resync_after is None):
+                    continue
+                logs, dropped = self._sample(channel.logs)
+                channel.logs_emitted += len(logs)
+                channel.logs_dropped += dropped
+                if channel.status_updates > 1:
+                    channel.status_merged += channel.status_updates - 1
+                batches.append((name, logs, channel.status, self._counters(channel), dropped,
+                                self._take_rows(channel)))
+                channel.logs = []
+                channel.status = {}
+                channel.status_updates = 0
+
+        for name, logs, status, counters, dropped, rows in batches:
+            if logs:
+                self.socketio.emit('log_batch', {
+                    'logs': logs,
+                    'dropped': dropped,
+                    'counters': counters
+                }, to=name, namespace='/')
+            if status:
+                status['emitter'] = counters
+                self.socketio.emit('status_delta', status, to=name, namespace='/')
+            if rows:
+                self.socketio.emit('row_delta', rows, to=name, namespace='/')
+
+    def _take_rows(self, channel):
+        """Next row_delta payload for a channel (called with the lock held), or None"""
+        if channel.resync_after is not None:
+            payload = {'rows': [], 'resync_after': channel.resync_after}
+            channel.resync_after = None
+            return payload
+        if not channel.rows:
+            return None
+        rows = channel.rows[:self.max_rows_per_batch]
+        channel.rows = channel.rows[self.max_rows_per_batch:]
+        channel.rows_emitted += len(rows)
+        return {'rows': rows, 'last_seq': rows[-1]['seq']}
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f'⚠️ Progress flush failed: {e}')
@@ -0,0 +1,143 @@
+"""
+Geographic query planning for Stage 1
+
+Google Maps returns at most ~120 results per search, so a single
+"Autohaus Berlin" query covers a small town completely but only a fraction
+of a large city. The planner turns a city into map viewport tiles: it starts
+with the city's bounding box and, whenever a tile's results hit the cap,
+splits it into four quadrants that are searched in turn, down to a maximum
+depth. Overlapping results are skipped by place identity in MapMiner.
+"""
+import math
+import threading
+
+import requests
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+
+# Approximate width of the map area next to the results list, in pixels
+VIEWPORT_PX = 800
+
+
+class Tile:
+    """A rectangular map viewport (degrees) at a subdivision depth"""
+
+    def __init__(self, south, west, north, east, depth=0):
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.depth = depth
+
+    @property
+    def center(self):
+        return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+    @property
+    def zoom(self):
+        """Smallest integer zoom at which the tile fills the viewport"""
+        lat = self.center[0]
+        # Mercator stretches latitude by 1/cos(lat); compare both spans in longitude degrees
+        span = max(self.east - self.west, (self.north - self.south) / math.cos(math.radians(lat)))
+        zoom = math.floor(math.log2(360 * VIEWPORT_PX / (256 * max(span, 1e-6))))
+        return max(3, min(20, zoom))
+
+    def split(self):
+        """The four quadrants of this tile"""
+        mid_lat, mid_lng = self.center
+        depth = self.depth + 1
+        return [
+            Tile(mid_lat, self.west, self.north, mid_lng, depth),
+            Tile(mid_lat, mid_lng, self.north, self.east, depth),
+            Tile(self.south, self.west, mid_lat, mid_lng, depth),
+            Tile(self.south, mid_lng, mid_lat, self.east, depth)
+        ]
+
+    def to_dict(self):
+        return {
+            'south': self.south,
+            'west': self.west,
+            'north': self.north,
+            'east': self.east,
+            'depth': self.depth
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['south'], data['west'], data['north'], data['east'], data.get('depth', 0))
+
+
+class CityGeocoder:
+    """
+    Bounding boxes of cities, from the job config or OpenStreetMap Nominatim
+
+    Lookups are cached per process; Nominatim's usage policy allows about one
+    request per second, which a handful of cities per job stays well under.
+    """
+
+    def __init__(self, overrides=None, country='Deutschland'):
+        """
+        Args:
+            overrides: Optional {city: [south, west, north, east]} from the job config
+            country: Country appended to the lookup
+        """
+        self.overrides = overrides or {}
+        self.country = country
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def bounds(self, city):
+        """(south, west, north, east) of a city; raises ValueError if it can't be found"""
+        if city in self.overrides:
+            return tuple(float(value) for value in self.overrides[city])
+
+        with self.lock:
+            if city in self.cache:
+                return self.cache[city]
+
+        response = requests.get(
+            NOMINATIM_URL,
+            params={'q': f'{city}, {self.country}', 'format': 'json', 'limit': 1},
+            headers={'User-Agent': 'MapMiner query planner'},
+            timeout=15
+        )
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            raise ValueError(f'City not found: {city}')
+
+        # Nominatim orders the box as [south, north, west, east]
+        south, north, west, east = (float(value) for value in results[0]['boundingbox'])
+        with self.lock:
+            self.cache[city] = (south, west, north, east)
+        return self.cache[city]
+
+
+def tile_unit(search_term, city, tile):
+    """Stage 1 work unit for one tile of a city"""
+    lat, lng = tile.center
+    return {
+        'search_term': search_term,
+        'city': city,
+        'query': f'{search_term} {city} [tile d{tile.depth} @{lat:.4f},{lng:.4f}]',
+        'tile': tile.to_dict()
+    }
+
+
+def plan_city(search_term, city, geocoder):
+    """Initial tiled work unit covering the whole city"""
+    south, west, north, east = geocoder.bounds(city)
+    return tile_unit(search_term, city, Tile(south, west, north, east))
+
+
+def split_unit(unit, cards, reached_end, cap=100, max_depth=4):
+    """
+    Child units for a tile whose results hit the per-query cap, else []
+
+    A tile counts as capped when it loaded at least `cap` cards and Maps did
+    not report the end of the list.
+    """
+    tile = Tile.from_dict(unit['tile'])
+    if reached_end or cards < cap or tile.depth >= max_depth:
+        return []
+    return [tile_unit(unit['search_term'], unit['city'], child) for child in tile.split()]
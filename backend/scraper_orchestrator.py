@@ -5,23 +5,94 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from maps_scraper_configurable import MapMiner
+from maps_blocks import AdaptiveThrottle, MapsBlocked
 from website_scraper_configurable import WebsiteScraperConfigurable
+from result_store import ResultStore, store_path_for
+from cancellation import CancellationToken, ScrapeCancelled
+from maps_replay import MapsRecorder
+from tracing import Tracer, NullTracer, JobProfiler, NullProfiler, export_chrome_trace
+from query_planner import CityGeocoder, Tile, plan_city, split_unit
+from card_filters import CardFilter
+from driver_lifecycle import DriverLifecycle
+from page_archive import PageArchive
+from render_pool import BrowserRenderPool
+from proxy_pool import ProxyPool
 import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def config_cities(config):
+    """Cities of a job config (list or comma-separated string)"""
+    if isinstance(config['cities'], str):
+        return [city.strip() for city in config['cities'].split(',') if city.strip()]
+    return config['cities']
+
+
+def config_search_terms(config):
+    """Search terms of a job config (search_terms or search_term; list or comma-separated string)"""
+    search_terms = config.get('search_terms') or config['search_term']
+    if isinstance(search_terms, str):
+        return [term.strip() for term in search_terms.split(',') if term.strip()]
+    return list(search_terms)
+
+
+def plan_maps_units(config, geocoder=None, log=None):
+    """
+    Stage 1 work units of a job config: one Maps query per city and search term
+    
+    Units are grouped by city, so the searches of one city run back to
+    back. With tiling, each city starts as one tile covering its bounding
+    box; scrape_work_unit returns the quadrants of tiles that hit the cap.
+    Cities that can't be geocoded fall back to a plain query.
+    
+    Args:
+        config: Job configuration (cities, search_term(s), tiling, city_bounds)
+        geocoder: CityGeocoder to reuse (default: one for the config's city_bounds)
+        log: Callable(message, level) for cities that fall back to a plain query
+    """
+    tiling = config.get('tiling', False)
+    if tiling and geocoder is None:
+        geocoder = CityGeocoder(config.get('city_bounds'))
+    units = []
+    for city in config_cities(config):
+        tiled = tiling
+        for search_term in config_search_terms(config):
+            if tiled:
+                try:
+                    units.append(plan_city(search_term, city, geocoder))
+                    continue
+                except Exception as e:
+                    if log:
+                        log(f'⚠️ No bounds for {city}, searching without tiling: {str(e)}', 'warning')
+                    tiled = False
+            units.append({
+                'search_term': search_term,
+                'city': city,
+                'query': f"{search_term} {city}, Deutschland"
+            })
+    return units
+
 
 class ScraperOrchestrator:
     """Orchestrates the two-stage scraping process"""
     
-    def __init__(self, config, progress_callback=None):
+    def __init__(self, config, progress_callback=None, stage_slots=None, cancel_token=None, browser_pool=None):
         """
         Initialize orchestrator with configuration
         
         Args:
             config: Dictionary containing:
-                - search_term: Search term (e.g., "Autohaus")
+                - search_term: Search term (e.g., "Autohaus"); a list or a comma-separated
+                  string searches every term in every city (also accepted as search_terms)
                 - cities: List of cities or comma-separated string
-                - entries_per_city: Max results per city
+                - entries_per_city: Max results per search term and city
                 - required_words: Words that must be in company name (comma-separated)
-                - output_path: Where to save CSV
+                - filters: Rules checked on each result card before clicking
+                  (required_words, excluded_words, min_rating, min_reviews,
+                  categories, exclude_categories, skip_closed; see card_filters.py)
+                - output_path: CSV path of the job; results are stored in a SQLite
+                  database next to it and exported to CSV/JSONL on download
                 - delay_min: Minimum delay between requests (default: 2)
                 - delay_max: Maximum delay between requests (default: 5)
                 - scroll_delay_min: Min scroll delay (default: 3)
@@ -31,17 +102,63 @@ class ScraperOrchestrator:
                 - headless: Run browser in headless mode (default: False)
                 - use_chrome: Use Chrome instead of Edge (default: False)
                 - max_workers: Max parallel workers for website scraping (default: 10)
+                - stage2_window: Businesses queued or running at once in Stage 2
+                  (default: 4 × max_workers)
+                - page_archive: Keep every page Stage 2 fetches in this compressed archive
+                  directory (true = page_archive/ next to the output) for reextract.py
+                - http_transport: Stage 2 HTTP client: 'requests' (default) or 'httpx'
+                  (shared client with HTTP/2 and brotli; pip install 'httpx[http2,brotli]')
+                - http2: Negotiate HTTP/2 with the httpx transport (default: True)
+                - js_fallback: Look up businesses without results on script-rendered
+                  websites again in headless browsers (default: False)
+                - render_workers: Headless browsers of the JS fallback (default: 2)
                 - run_stage_2: Whether to run website enrichment (default: True)
+                - trace: Write a span tree per business to <output>.trace.jsonl (default: False)
+                - trace_chrome: Also convert the trace to <output>.trace.json for
+                  chrome://tracing / Perfetto (default: False)
+                - profile: Run cProfile over the job's threads and save <output>.prof (default: False)
+                - extraction_strategy: How Stage 1 reads the details panel:
+                  'find_element', 'script' or 'page_source' (default: 'find_element')
+                - record_dir: Save Maps feed/details snapshots here for offline replay
+                - maps_url: Maps start page (default: Google Maps; a replay server URL offline)
+                - command_timeout: Seconds before a hung WebDriver call is abandoned (default: 60)
+                - recycle_after_units: Restart the browser after this many searches (default: 20, 0 = never)
+                - recycle_after_listings: Restart the browser after this many saved listings (default: 0 = never)
+                - max_driver_rss_mb: Restart the browser above this memory use (default: 2048, 0 = never)
+                - unit_retries: Browser restarts and retries of a search whose browser hung (default: 1)
+                - block_cooloff: Seconds a browser pauses after a captcha or throttling
+                  page, doubling per further block in a row (default: 120)
+                - max_slowdown: Largest factor a blocked browser's waits grow by (default: 8)
+                - max_block_retries: Times a blocked search is requeued (default: 3)
+                - proxies: Proxy URLs (list or comma-separated) for the Maps browser
+                  and Stage 2 requests (default: none, direct connections)
+                - proxy_eject_after: Failures in a row that take a proxy out of rotation (default: 5)
+                - proxy_readmit_after: Seconds until an ejected proxy is tried again (default: 60)
+                - detail_tabs: Place pages Stage 1 loads at once in tabs of its browser
+                  instead of clicking each card (default: 1 = click)
+                - tiling: Search each city as map tiles, splitting tiles whose results
+                  hit the Maps cap into quadrants (default: False)
+                - tile_cap: Loaded cards at which a tile counts as capped (default: 100)
+                - max_tile_depth: Maximum number of quadrant splits (default: 4)
+                - city_bounds: Optional {city: [south, west, north, east]} overriding
+                  the OpenStreetMap lookup used for tiling
             progress_callback: Callback object with emit methods for progress updates
+            stage_slots: Optional dict with 'maps' and 'website' semaphores
+                acquired around Stage 1 and Stage 2
+            cancel_token: Optional CancellationToken used to stop the job early
+            browser_pool: Optional WarmBrowserPool the Stage 1 browser is taken from
+        
+        All search terms × cities run on one browser. A business found by
+        several searches is clicked and saved once, under the query that
+        found it first (the 'query' column).
         """
         self.config = config
         self.progress = progress_callback
+        self.stage_slots = stage_slots or {}
+        self.cancel_token = cancel_token or CancellationToken()
+        self.browser_pool = browser_pool
         
-        # Parse cities if string
-        if isinstance(config['cities'], str):
-            self.cities = [city.strip() for city in config['cities'].split(',') if city.strip()]
-        else:
-            self.cities = config['cities']
+        self.cities = config_cities(config)
         
         # Parse required_words if string
         required_words_str = config.get('required_words', '')
@@ -49,14 +166,58 @@ class ScraperOrchestrator:
             self.required_words = [word.strip() for word in required_words_str.split(',') if word.strip()]
         else:
             self.required_words = []
+        self.card_filter = CardFilter(config.get('filters'), required_words=self.required_words)
         
-        self.search_term = config['search_term']
+        self.search_terms = config_search_terms(config)
+        self.search_term = ', '.join(self.search_terms)
         self.entries_per_city = config.get('entries_per_city', 20)
         self.output_path = config['output_path']
+        self.store_path = store_path_for(self.output_path)
+        self.store = ResultStore(self.store_path)
+        self.store.add_listener(self.emit_row)
         self.browser = config.get('browser', 'safari')
         self.max_workers = config.get('max_workers', 10)
+        self.stage2_window = config.get('stage2_window')
+        archive_dir = config.get('page_archive')
+        if archive_dir is True:
+            archive_dir = os.path.join(os.path.dirname(os.path.abspath(self.output_path)), 'page_archive')
+        self.archive_dir = archive_dir or None
+        self.archive = None
+        self.http_transport = config.get('http_transport', 'requests')
+        self.http2 = config.get('http2', True)
+        self.js_fallback = config.get('js_fallback', False)
+        self.render_workers = config.get('render_workers', 2)
         self.run_stage_2 = config.get('run_stage_2', True)
         self.require_website = config.get('require_website', True)
+        self.headless = config.get('headless', False)
+        self.extraction_strategy = config.get('extraction_strategy', 'find_element')
+        self.maps_url = config.get('maps_url')
+        self.record_dir = config.get('record_dir')
+        self.command_timeout = config.get('command_timeout', 60)
+        self.block_cooloff = config.get('block_cooloff', 120)
+        self.max_slowdown = config.get('max_slowdown', 8.0)
+        self.max_block_retries = config.get('max_block_retries', 3)
+        self.detail_tabs = config.get('detail_tabs', 1)
+        self.proxy_pool = ProxyPool.from_config(
+            config.get('proxies'),
+            eject_after=config.get('proxy_eject_after', 5),
+            readmit_after=config.get('proxy_readmit_after', 60),
+            log=lambda message: self.log(message, 'warning')
+        )
+        
+        # Geographic tiling (off unless requested)
+        self.tiling = config.get('tiling', False)
+        self.tile_cap = config.get('tile_cap', 100)
+        self.max_tile_depth = config.get('max_tile_depth', 4)
+        self.geocoder = CityGeocoder(config.get('city_bounds'))
+        
+        # Tracing and profiling (off unless requested)
+        output_base = os.path.splitext(self.output_path)[0]
+        self.trace_path = output_base + '.trace.jsonl' if config.get('trace') else None
+        self.trace_chrome = config.get('trace_chrome', False)
+        self.profile_path = output_base + '.prof' if config.get('profile') else None
+        self.tracer = Tracer(self.trace_path) if self.trace_path else NullTracer()
+        self.profiler = JobProfiler() if self.profile_path else NullProfiler()
         
         # Delays configuration
         self.delays = {
@@ -80,116 +241,327 @@ class ScraperOrchestrator:
         if self.progress:
             self.progress.update_status(**kwargs)
     
+    def emit_row(self, delta):
+        """Forward a saved or enriched business to the progress callback"""
+        if self.progress:
+            self.progress.emit_row(delta)
+    
+    @contextmanager
+    def stage_slot(self, stage):
+        """Hold a concurrency slot for the given stage; waiting for it can be cancelled"""
+        slot = self.stage_slots.get(stage)
+        if slot is None:
+            yield
+            return
+        
+        while not slot.acquire(timeout=0.5):
+            self.cancel_token.raise_if_cancelled()
+        try:
+            yield
+        finally:
+            slot.release()
+    
+    def log_proxy_stats(self):
+        """Log the traffic and health of each proxy and add them to the job stats"""
+        if self.proxy_pool is None:
+            return
+        proxies = self.proxy_pool.stats()
+        for proxy in proxies:
+            latency = f"{proxy['latency'] * 1000:.0f}ms" if proxy['latency'] is not None else 'n/a'
+            self.log(
+                f"🔌 {proxy['proxy']}: {proxy['successes']} ok, {proxy['failures']} failed, {latency}, "
+                f"{proxy['bytes'] / 1e6:.1f} MB{'' if proxy['healthy'] else ' (ejected)'}",
+                'info'
+            )
+        self.update_status(stats={'proxies': proxies})
+    
+    def maps_work_units(self):
+        """Stage 1 work units of this job (see plan_maps_units)"""
+        return plan_maps_units(self.config, self.geocoder, self.log)
+    
+    def create_maps_scraper(self):
+        """Start a MapMiner browser configured for this job"""
+        return MapMiner(
+            csv_filename=self.output_path,
+            browser=self.browser,
+            delays=self.delays,
+            required_words=self.required_words,
+            require_website=self.require_website,
+            store=self.store,
+            cancel_token=self.cancel_token,
+            tracer=self.tracer,
+            headless=self.headless,
+            maps_url=self.maps_url,
+            extraction_strategy=self.extraction_strategy,
+            recorder=MapsRecorder(self.record_dir) if self.record_dir else None,
+            card_filter=self.card_filter,
+            command_timeout=self.command_timeout,
+            browser_pool=self.browser_pool,
+            throttle=AdaptiveThrottle(max_slowdown=self.max_slowdown, base_cooloff=self.block_cooloff),
+            proxy_pool=self.proxy_pool,
+            detail_tabs=self.detail_tabs
+        )
+    
+    def create_driver_lifecycle(self):
+        """Lifecycle manager that recycles and restarts this job's Stage 1 browser"""
+        return DriverLifecycle(
+            self.create_maps_scraper,
+            self.cancel_token,
+            recycle_after_units=self.config.get('recycle_after_units', 20),
+            recycle_after_listings=self.config.get('recycle_after_listings', 0),
+            max_rss_mb=self.config.get('max_driver_rss_mb', 2048),
+            max_retries=self.config.get('unit_retries', 1),
+            log=self.log
+        )
+    
+    def scrape_work_unit(self, scraper, unit, max_results=None):
+        """
+        Run one Stage 1 work unit on a scraper
+        
+        Args:
+            scraper: MapMiner to run the unit on
+            unit: Work unit from maps_work_units (or a follow-up tile)
+            max_results: Listings to save (default: entries_per_city)
+        
+        Returns:
+            (saved listings, follow-up units); follow-ups are the quadrants of a
+            capped tile, which is then not scraped itself
+        """
+        tile = unit.get('tile')
+        scraper.query_label = f"{unit['search_term']} {unit['city']}"
+        with self.tracer.span('maps_search', query=unit['query']) as span:
+            if tile is None:
+                # Search location
+                with self.tracer.span('search'):
+                    scraper.search_location(unit['query'])
+                
+                # Scroll to load more results
+                with self.tracer.span('scroll'):
+                    scraper.scroll_results(max_scrolls=5)
+            else:
+                # Search the tile's viewport and load its whole result list
+                lat, lng = Tile.from_dict(tile).center
+                with self.tracer.span('search'):
+                    scraper.search_area(unit['search_term'], lat, lng, Tile.from_dict(tile).zoom)
+                with self.tracer.span('scroll'):
+                    loaded = scraper.scroll_results(max_scrolls=30, until_end=True)
+                
+                children = split_unit(unit, loaded['cards'], loaded['reached_end'],
+                                      cap=self.tile_cap, max_depth=self.max_tile_depth)
+                span.set(cards=loaded['cards'], split=bool(children))
+                if children:
+                    self.log(f'🧩 {unit["query"]}: {loaded["cards"]}+ results, splitting into {len(children)} tiles', 'info')
+                    return [], children
+        
+        # Scrape listings
+        if max_results is None:
+            max_results = self.entries_per_city
+        return scraper.scrape_listings(max_results=max_results), []
+    
     def run_stage_1_maps_scraping(self):
         """Stage 1: Scrape Google Maps for basic business information"""
         self.log('📍 Stage 1: Starting Google Maps scraping...', 'info')
-        self.update_status(stage='maps_scraping', progress=0, total=len(self.cities))
+        units = deque(self.maps_work_units())
+        self.update_status(stage='maps_scraping', progress=0, total=len(units))
         
+        browser = self.create_driver_lifecycle()
         try:
             # Initialize MapMiner scraper
-            scraper = MapMiner(
-                csv_filename=self.output_path,
-                browser=self.browser,
-                delays=self.delays,
-                required_words=self.required_words,
-                require_website=self.require_website
-            )
+            scraper = browser.start()
             
-            self.log(f'✓ Browser initialized: {self.browser.capitalize()}', 'info')
+            start_kind = 'warm' if scraper.warm_start else 'cold start'
+            self.log(f'✓ Browser initialized: {self.browser.capitalize()} ({start_kind}, {scraper.startup_seconds:.1f}s)', 'info')
+            self.update_status(stats={'browser_startup_seconds': round(scraper.startup_seconds, 1)})
             
             total_scraped = 0
+            # Listings saved per search, so tiles of one search share entries_per_city
+            unit_scraped = {}
+            idx = 0
             
-            for idx, city in enumerate(self.cities, 1):
+            while units:
+                unit = units.popleft()
+                idx += 1
+                total = idx + len(units)
+                self.cancel_token.raise_if_cancelled()
+                city = unit['city']
+                key = (unit['search_term'], city)
+                remaining = self.entries_per_city - unit_scraped.get(key, 0)
+                if remaining <= 0:
+                    continue
                 self.update_status(
                     progress=idx,
+                    total=total,
                     current_item=f'Scraping {city}'
                 )
                 
-                query = f"{self.search_term} {city}, Deutschland"
-                self.log(f'🔍 [{idx}/{len(self.cities)}] Searching: {query}', 'info')
-                
-                # Search location
-                scraper.search_location(query)
+                self.log(f'🔍 [{idx}/{total}] Searching: {unit["query"]}', 'info')
                 
-                # Scroll to load more results
-                scraper.scroll_results(max_scrolls=5)
-                
-                # Scrape listings
-                results = scraper.scrape_listings(max_results=self.entries_per_city)
+                blocked = False
+                try:
+                    results, follow_ups = browser.run(
+                        lambda scraper, saved: self.scrape_work_unit(scraper, unit, max_results=remaining - saved)
+                    )
+                except MapsBlocked as e:
+                    # The browser has cooled off; search this city again later instead of losing it
+                    results, follow_ups = e.results, []
+                    blocked = True
+                    block_retries = unit.get('block_retries', 0)
+                    if block_retries < self.max_block_retries:
+                        units.append(dict(unit, block_retries=block_retries + 1))
+                        self.log(f'🚧 [{idx}/{total}] {unit["query"]}: blocked, requeued '
+                                 f'(attempt {block_retries + 2}/{self.max_block_retries + 1})', 'warning')
+                    else:
+                        self.log(f'❌ [{idx}/{total}] {unit["query"]}: still blocked after '
+                                 f'{block_retries + 1} attempts, giving up', 'error')
+                units.extend(follow_ups)
                 total_scraped += len(results)
+                unit_scraped[key] = unit_scraped.get(key, 0) + len(results)
                 
-                self.log(f'✓ [{idx}/{len(self.cities)}] {city}: Scraped {len(results)} listings', 'success')
-                self.update_status(stats={'maps_scraped': total_scraped})
+                if not follow_ups and not blocked:
+                    self.log(f'✓ [{idx}/{total}] {unit["search_term"]} {city}: Scraped {len(results)} listings', 'success')
+                self.update_status(stats=dict(
+                    browser.stats(),
+                    maps_scraped=total_scraped,
+                    filter_rejections=self.card_filter.stats(),
+                    tab_timing=browser.scraper.tab_stats()
+                ))
                 
-                # Delay between cities
-                if idx < len(self.cities):
-                    time.sleep(self.delays['delay_min'])
-            
-            # Close browser
-            scraper.close()
+                # Delay between searches, longer while Google is pushing back
+                if units:
+                    self.cancel_token.sleep(self.delays['delay_min'] * browser.scraper.throttle.slowdown)
             
             self.log(f'✅ Stage 1 completed: {total_scraped} total listings scraped', 'success')
+            rejections = self.card_filter.stats()
+            if rejections:
+                self.log(
+                    f'⊘ Filtered out: {", ".join(f"{rule} {count}" for rule, count in sorted(rejections.items()))}',
+                    'info'
+                )
+            if browser.restarts or browser.recycles:
+                self.log(f'🔁 Browser restarts: {browser.restarts} after hangs, {browser.recycles} recycled', 'info')
+            tab_timing = browser.scraper.tab_stats()
+            if tab_timing:
+                per_tab = ', '.join(
+                    f"#{tab} {timing['loads']}× {timing['avg_load_seconds']}s" for tab, timing in tab_timing.items()
+                )
+                self.log(f'🗂️ Details tabs (places loaded × average load time): {per_tab}', 'info')
+            self.log_proxy_stats()
+            throttle_stats = browser.scraper.throttle.stats()
+            blocks = throttle_stats['blocks']
+            if blocks:
+                self.log(
+                    f'🚧 Google blocks: {", ".join(f"{kind} {count}" for kind, count in sorted(blocks.items()))}',
+                    'info'
+                )
+            if throttle_stats['empty_feeds']:
+                self.log(f"🔍 {throttle_stats['empty_feeds']} searches stayed empty without a \"no results\" message",
+                         'info')
             return total_scraped
             
+        except ScrapeCancelled:
+            raise
         except Exception as e:
+            # A browser quit by the cancel callback surfaces as a WebDriver error
+            self.cancel_token.raise_if_cancelled()
             self.log(f'❌ Stage 1 error: {str(e)}', 'error')
             raise
+        finally:
+            # Close browser
+            browser.close()
     
     def run_stage_2_website_enrichment(self):
         """Stage 2: Enrich data with email and owner information from websites"""
         self.log('🌐 Stage 2: Starting website enrichment...', 'info')
         self.update_status(stage='website_enrichment', progress=0, total=0)
         
+        render_pool = None
+        scraper = None
         try:
             # Initialize Website scraper
+            if self.archive_dir and self.archive is None:
+                self.archive = PageArchive(self.archive_dir)
+            if self.js_fallback:
+                render_pool = BrowserRenderPool(
+                    size=self.render_workers,
+                    browser='edge' if self.browser == 'edge' else 'chrome',
+                    log=self.log
+                )
             scraper = WebsiteScraperConfigurable(
                 csv_filename=self.output_path,
                 max_workers=self.max_workers,
                 delays=self.delays,
-                progress_callback=self.progress
+                progress_callback=self.progress,
+                store=self.store,
+                cancel_token=self.cancel_token,
+                tracer=self.tracer,
+                profiler=self.profiler,
+                max_in_flight=self.stage2_window,
+                archive=self.archive,
+                render_pool=render_pool,
+                transport=self.http_transport,
+                http2=self.http2,
+                proxy_pool=self.proxy_pool
             )
             
-            self.log(f'✓ Website scraper initialized ({self.max_workers} parallel workers)', 'info')
+            self.log(f'✓ Website scraper initialized ({self.max_workers} parallel workers, {self.http_transport})', 'info')
+            if render_pool is not None:
+                self.log(f'🖥️ JS fallback enabled ({self.render_workers} headless browsers)', 'info')
+            if self.proxy_pool is not None:
+                self.log(f'🔌 Requests spread over {len(self.proxy_pool.proxies)} proxies', 'info')
             
             # Process businesses
             stats = scraper.process_businesses()
+            self.cancel_token.raise_if_cancelled()
             
             self.log(f'✅ Stage 2 completed: {stats["processed"]} websites processed', 'success')
             self.update_status(stats={
                 'websites_scraped': stats['processed'],
                 'emails_found': stats.get('emails_found', 0),
-                'owners_found': stats.get('owners_found', 0)
+                'owners_found': stats.get('owners_found', 0),
+                'render_recovered': stats.get('render_recovered', 0)
             })
+            self.log_proxy_stats()
             
             return stats
             
+        except ScrapeCancelled:
+            raise
         except Exception as e:
             self.log(f'❌ Stage 2 error: {str(e)}', 'error')
             raise
+        finally:
+            if scraper is not None:
+                scraper.close()
+            if render_pool is not None:
+                render_pool.close()
     
     def run(self):
         """Run the complete two-stage scraping process"""
         self.log('🚀 Starting two-stage scraping process...', 'info')
         self.log('Configuration:', 'info')
-        self.log(f'   Search term: {self.search_term}', 'info')
+        self.log(f'   Search terms: {self.search_term}', 'info')
         self.log(f'   Cities: {", ".join(self.cities)}', 'info')
-        self.log(f'   Entries per city: {self.entries_per_city}', 'info')
+        self.log(f'   Entries per city: {self.entries_per_city} (per search term)', 'info')
         if self.required_words:
             self.log(f'   Required words filter: {", ".join(self.required_words)}', 'info')
+        if self.config.get('filters'):
+            self.log(f'   Card filters: {self.config["filters"]}', 'info')
         self.log(f'   Require website: {self.require_website}', 'info')
-        self.log(f'   Output: {self.output_path}', 'info')
+        self.log(f'   Output: {self.store_path}', 'info')
         self.log(f'   Browser: {self.browser.capitalize()}', 'info')
         self.log(f'   Run Stage 2: {self.run_stage_2}', 'info')
         
         try:
             # Stage 1: Google Maps scraping
-            maps_count = self.run_stage_1_maps_scraping()
+            with self.stage_slot('maps'), self.profiler.thread():
+                maps_count = self.run_stage_1_maps_scraping()
             
             # Stage 2: Website enrichment (if enabled)
             if self.run_stage_2:
                 self.log('⏳ Waiting 3 seconds before starting Stage 2...', 'info')
-                time.sleep(3)
-                website_stats = self.run_stage_2_website_enrichment()
+                self.cancel_token.sleep(3)
+                with self.stage_slot('website'):
+                    website_stats = self.run_stage_2_website_enrichment()
             else:
                 self.log('⏭️ Stage 2 skipped (disabled in configuration)', 'info')
             
@@ -203,14 +575,45 @@ class ScraperOrchestrator:
                 self.log(f'🌐 Websites processed: {website_stats["processed"]}', 'success')
                 self.log(f'📧 Emails found: {website_stats.get("emails_found", 0)}', 'success')
                 self.log(f'👤 Owners found: {website_stats.get("owners_found", 0)}', 'success')
-            self.log(f'💾 Data saved to: {self.output_path}', 'success')
+                if self.js_fallback:
+                    self.log(f'🖥️ Recovered by JS fallback: {website_stats.get("render_recovered", 0)} '
+                             f'({website_stats.get("render_seconds", 0)}s render time)', 'success')
+                if website_stats.get('peak_rss_mb'):
+                    self.log(f'💾 Peak memory: {website_stats["peak_rss_mb"]:.0f} MB', 'success')
+            self.log(f'💾 Data saved to: {self.store_path} ({self.store.count()} rows)', 'success')
             
             self.update_status(stage='completed')
             
         except KeyboardInterrupt:
             self.log('⏹️ Scraping interrupted by user', 'warning')
             self.update_status(stage='stopped')
+        except ScrapeCancelled:
+            time_to_stop = self.cancel_token.seconds_since_cancel() or 0
+            self.log(f'⏹️ Scraping stopped {time_to_stop:.1f}s after stop request', 'warning')
+            self.log(f'💾 Partial results kept: {self.store.count()} rows in {self.store_path}', 'info')
+            self.update_status(stage='stopped')
         except Exception as e:
             self.log(f'❌ Fatal error: {str(e)}', 'error')
             self.update_status(stage='error')
             raise
+        finally:
+            self.close()
+    
+    def close(self):
+        """Close the result store and write out trace/profile files"""
+        self.store.close()
+        self.tracer.close()
+        if self.archive is not None:
+            self.archive.close()
+            self.log(f'🗄️ Pages archived to: {self.archive_dir}', 'info')
+        if self.trace_path and self.trace_chrome and os.path.exists(self.trace_path):
+            chrome_path = os.path.splitext(self.trace_path)[0] + '.json'
+            export_chrome_trace(self.trace_path, chrome_path)
+            self.log(f'🧭 Trace written to: {chrome_path}', 'info')
+        elif self.trace_path:
+            self.log(f'🧭 Trace written to: {self.trace_path}', 'info')
+        if self.profile_path and self.profiler.save(self.profile_path):
+            self.log(f'⏱️ Profile written to: {self.profile_path}', 'info')
+            if self.profiler.skipped:
+                self.log(f'⏱️ {self.profiler.skipped} blocks ran unprofiled (Python 3.12+ profiles '
+                         f'one thread at a time)', 'info')
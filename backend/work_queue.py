@@ -0,0 +1,267 @@
+import sqlite3
+import threading
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+
+# Every status a task can be in, as reported by WorkQueue.counts
+TASK_STATUSES = ('pending', 'leased', 'done', 'failed', 'cancelled')
+
+
+class WorkQueue(ABC):
+    """
+    Shared task queue used by the coordinator and distributed workers
+
+    Tasks are leased rather than popped: a worker holds a task until it
+    completes or fails it, or until the lease expires (e.g. the worker
+    crashed), at which point the task becomes available again.
+    """
+
+    @abstractmethod
+    def put(self, job_id, kind, payload, max_attempts=3):
+        """Add a task and return its ID"""
+
+    @abstractmethod
+    def lease(self, worker_id, kinds=None, lease_seconds=300):
+        """Lease the oldest available task of the given kinds, or return None"""
+
+    @abstractmethod
+    def heartbeat(self, task_id, worker_id, lease_seconds=300):
+        """Extend a lease; returns False if the worker no longer holds the task"""
+
+    @abstractmethod
+    def complete(self, task_id, worker_id):
+        """Mark a leased task as done; returns False if the lease was lost"""
+
+    @abstractmethod
+    def fail(self, task_id, worker_id, error=''):
+        """Release a leased task for retry (or fail it after max attempts)"""
+
+    @abstractmethod
+    def release(self, task_id, worker_id, error='', max_blocks=3):
+        """
+        Hand a blocked task back without using up an attempt
+
+        Blocks are counted per task; the release after `max_blocks` fails
+        the task. Returns False if the lease was lost.
+        """
+
+    @abstractmethod
+    def cancel_job(self, job_id):
+        """Cancel all unfinished tasks of a job; returns the number cancelled"""
+
+    @abstractmethod
+    def requeue_expired(self):
+        """Return tasks with expired leases to the queue; returns affected job IDs"""
+
+    @abstractmethod
+    def counts(self, job_id=None):
+        """Task counts by status, optionally for a single job"""
+
+    @abstractmethod
+    def get(self, task_id):
+        """Return a task as a dict, or None"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue backed by a SQLite file, for a coordinator on a single box"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'job_id TEXT NOT NULL, '
+            'kind TEXT NOT NULL, '
+            'payload TEXT NOT NULL, '
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            'worker_id TEXT, '
+            'lease_expires REAL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, '
+            'max_attempts INTEGER NOT NULL DEFAULT 3, '
+            'error TEXT, '
+            'blocks INTEGER NOT NULL DEFAULT 0, '
+            'created_at REAL NOT NULL, '
+            'updated_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, kind, id)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks(job_id, status)')
+        # Older queues predate the block counter
+        if 'blocks' not in {row['name'] for row in self.conn.execute('PRAGMA table_info(tasks)')}:
+            self.conn.execute('ALTER TABLE tasks ADD COLUMN blocks INTEGER NOT NULL DEFAULT 0')
+
+    def _row_to_task(self, row):
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'])
+        return task
+
+    def put(self, job_id, kind, payload, max_attempts=3):
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT INTO tasks (job_id, kind, payload, max_attempts, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload), max_attempts, now, now)
+            )
+        return cursor.lastrowid
+
+    def _requeue_expired_locked(self, now):
+        expired = self.conn.execute(
+            "SELECT id, job_id, attempts, max_attempts FROM tasks "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,)
+        ).fetchall()
+        for row in expired:
+            status = 'failed' if row['attempts'] >= row['max_attempts'] else 'pending'
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, worker_id = NULL, lease_expires = NULL, "
+                "error = 'lease expired', updated_at = ? WHERE id = ?",
+                (status, now, row['id'])
+            )
+        return {row['job_id'] for row in expired}
+
+    def requeue_expired(self):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                job_ids = self._requeue_expired_locked(time.time())
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return job_ids
+
+    def lease(self, worker_id, kinds=None, lease_seconds=300):
+        now = time.time()
+        query = "SELECT * FROM tasks WHERE status = 'pending'"
+        params = []
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        query += ' ORDER BY id LIMIT 1'
+
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._requeue_expired_locked(now)
+                row = self.conn.execute(query, params).fetchone()
+                if row is None:
+                    self.conn.execute('COMMIT')
+                    return None
+                self.conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, now, row['id'])
+                )
+                row = self.conn.execute('SELECT * FROM tasks WHERE id = ?', (row['id'],)).fetchone()
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return self._row_to_task(row)
+
+    def heartbeat(self, task_id, worker_id, lease_seconds=300):
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (now + lease_seconds, now, task_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, worker_id):
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET status = 'done', lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (time.time(), task_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error=''):
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                "worker_id = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (error, time.time(), task_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, task_id, worker_id, error='', max_blocks=3):
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET status = CASE WHEN blocks >= ? THEN 'failed' ELSE 'pending' END, "
+                "attempts = CASE WHEN blocks >= ? THEN attempts ELSE attempts - 1 END, blocks = blocks + 1, "
+                "worker_id = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (max_blocks, max_blocks, error, time.time(), task_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def cancel_job(self, job_id):
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET status = 'cancelled', worker_id = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status IN ('pending', 'leased')",
+                (time.time(), job_id)
+            )
+        return cursor.rowcount
+
+    def counts(self, job_id=None):
+        query = 'SELECT status, COUNT(*) AS n FROM tasks'
+        params = ()
+        if job_id is not None:
+            query += ' WHERE job_id = ?'
+            params = (job_id,)
+        query += ' GROUP BY status'
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        counts = dict.fromkeys(TASK_STATUSES, 0)
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def get(self, task_id):
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+
+# Relative SQLite paths are resolved against the backend directory
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _sqlite_path(location):
+    """
+    File path for the part of a SQLite URL after '://'
+
+    As with SQLAlchemy, 'sqlite:///output/queue.db' is relative (here to the
+    backend directory) and 'sqlite:////var/lib/queue.db' is absolute.
+    """
+    path = location[1:] if location.startswith('/') else location
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
+# Queue backends by URL scheme; other deployments can register their own
+QUEUE_BACKENDS = {
+    'sqlite': lambda location: SQLiteWorkQueue(_sqlite_path(location))
+}
+
+
+def register_queue_backend(scheme, factory):
+    """Register a factory that builds a WorkQueue from the part of the URL after '://'"""
+    QUEUE_BACKENDS[scheme] = factory
+
+
+def create_work_queue(url):
+    """Create a work queue from a URL such as 'sqlite:///output/work_queue.db'"""
+    scheme, sep, location = url.partition('://')
+    if not sep or scheme not in QUEUE_BACKENDS:
+        raise ValueError(f'Unsupported work queue URL: {url}')
+    return QUEUE_BACKENDS[scheme](location)
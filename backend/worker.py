@@ -0,0 +1,246 @@
+"""
+Distributed scrape worker
+
+Leases Stage 1 (Maps) and Stage 2 (enrichment) tasks from the coordinator
+running in app.py, executes them with the regular scrapers and reports the
+resulting rows back. Run one per scrape node:
+
+    python worker.py --coordinator http://coordinator:5001 --kinds maps,enrich
+"""
+import argparse
+import glob
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+
+from scraper_orchestrator import ScraperOrchestrator
+from cancellation import CancellationToken
+from maps_blocks import MapsBlocked
+
+
+class Worker:
+    """Pulls tasks from the coordinator until stopped"""
+
+    def __init__(self, coordinator_url, kinds=None, lease_seconds=300, poll_interval=5, worker_id=None):
+        """
+        Args:
+            coordinator_url: Base URL of the backend acting as coordinator
+            kinds: Task kinds to accept ('maps', 'enrich'); default both
+            lease_seconds: Lease length requested for each task
+            poll_interval: Seconds to wait when the queue is empty
+            worker_id: Stable worker name (default: hostname + random suffix)
+        """
+        self.coordinator_url = coordinator_url.rstrip('/')
+        self.kinds = kinds or ['maps', 'enrich']
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f'{socket.gethostname()}-{uuid.uuid4().hex[:6]}'
+        self.session = requests.Session()
+        self.work_dir = tempfile.mkdtemp(prefix='mapminer_worker_')
+        self.scrapers = {}
+        # Places seen per job, so a worker skips businesses other units of the job already found
+        self.seen_places = {}
+        # Block slowdown of this node, kept when a browser is replaced
+        self.throttle = None
+        # Proxy pools by job setting, so proxy health carries over between tasks
+        self.proxy_pools = {}
+        self.running = True
+
+    def log(self, message):
+        print(f'[{self.worker_id}] {message}')
+
+    def _post(self, path, payload):
+        payload = dict(payload, worker_id=self.worker_id)
+        return self.session.post(f'{self.coordinator_url}{path}', json=payload, timeout=30)
+
+    def lease(self):
+        """Lease the next task, or return None if the queue is empty"""
+        response = self._post('/api/workers/lease', {'kinds': self.kinds, 'lease_seconds': self.lease_seconds})
+        if response.status_code == 204:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _heartbeat_loop(self, task_id, done, cancel_token):
+        """Keep extending the lease while the task runs; stop the task if the lease is lost"""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                response = self._post(f'/api/workers/tasks/{task_id}/heartbeat', {'lease_seconds': self.lease_seconds})
+                if response.status_code != 200:
+                    self.log(f'⚠️ Lost lease on task {task_id}, stopping it')
+                    cancel_token.cancel('lease lost')
+                    return
+            except requests.RequestException as e:
+                self.log(f'⚠️ Heartbeat failed for task {task_id}: {e}')
+
+    def _orchestrator(self, task, cancel_token):
+        """Orchestrator for a task, writing into a worker-local result store"""
+        config = dict(task['payload']['config'])
+        config['output_path'] = os.path.join(self.work_dir, f"task_{task['id']}.csv")
+        orchestrator = ScraperOrchestrator(config=config, cancel_token=cancel_token)
+        if orchestrator.proxy_pool is not None:
+            orchestrator.proxy_pool = self.proxy_pools.setdefault(repr(config.get('proxies')), orchestrator.proxy_pool)
+        return orchestrator
+
+    def run_maps_task(self, task, cancel_token):
+        """
+        Scrape one Maps work unit, reusing this worker's browser across tasks
+        
+        Returns the saved rows and the follow-up units (quadrants of a capped tile).
+        """
+        orchestrator = self._orchestrator(task, cancel_token)
+        try:
+            scraper = self.scrapers.get(orchestrator.browser)
+            if scraper is None:
+                scraper = orchestrator.create_maps_scraper()
+                self.scrapers[orchestrator.browser] = scraper
+                if self.throttle is None:
+                    self.throttle = scraper.throttle
+                scraper.throttle = self.throttle
+            scraper.store = orchestrator.store
+            scraper.tracer = orchestrator.tracer
+            scraper.card_filter = orchestrator.card_filter
+            scraper.set_cancel_token(cancel_token)
+            scraper.seen_places = self._seen_places(task['job_id'])
+            _, follow_ups = orchestrator.scrape_work_unit(scraper, task['payload']['unit'])
+            scraper.throttle.success()
+            return list(orchestrator.store.iter_rows()), follow_ups
+        finally:
+            orchestrator.close()
+
+    def _seen_places(self, job_id):
+        """Place ids seen for a job on this worker (kept for the most recent jobs only)"""
+        if job_id not in self.seen_places:
+            while len(self.seen_places) >= 16:
+                self.seen_places.pop(next(iter(self.seen_places)))
+            self.seen_places[job_id] = set()
+        return self.seen_places[job_id]
+
+    def run_enrich_task(self, task, cancel_token):
+        """Enrich one batch of businesses with website contact details"""
+        orchestrator = self._orchestrator(task, cancel_token)
+        try:
+            for row in task['payload']['rows']:
+                orchestrator.store.add_business(row)
+            orchestrator.run_stage_2_website_enrichment()
+            return list(orchestrator.store.iter_rows())
+        finally:
+            orchestrator.close()
+
+    def run_task(self, task):
+        """Execute a leased task and report the outcome to the coordinator"""
+        self.log(f"▶️ Task {task['id']} ({task['kind']}) for job {task['job_id']}")
+        done = threading.Event()
+        cancel_token = CancellationToken()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(task['id'], done, cancel_token))
+        heartbeat.daemon = True
+        heartbeat.start()
+        try:
+            units = []
+            if task['kind'] == 'maps':
+                rows, units = self.run_maps_task(task, cancel_token)
+            else:
+                rows = self.run_enrich_task(task, cancel_token)
+            if cancel_token.cancelled:
+                self.log(f"⏹️ Task {task['id']} abandoned: {cancel_token.reason}")
+                # The cancel callback quit the browser, so don't reuse it
+                self.close_scrapers()
+                return
+            response = self._post(f"/api/workers/tasks/{task['id']}/result", {'rows': rows, 'units': units})
+            if response.status_code == 200:
+                self.log(f"✓ Task {task['id']} done: {len(rows)} rows")
+            else:
+                self.log(f"⚠️ Result for task {task['id']} rejected: {response.text}")
+        except MapsBlocked as e:
+            self.log(f"🚧 Task {task['id']} blocked by Google ({e.kind}), handing it back")
+            try:
+                self._post(f"/api/workers/tasks/{task['id']}/release", {'error': str(e)})
+            except requests.RequestException:
+                pass
+            self.cool_off(e)
+        except Exception as e:
+            self.log(f"❌ Task {task['id']} failed: {e}")
+            # A broken browser is not reused for the next task
+            if task['kind'] == 'maps':
+                self.close_scrapers()
+            try:
+                self._post(f"/api/workers/tasks/{task['id']}/fail", {'error': str(e)})
+            except requests.RequestException:
+                pass
+        finally:
+            done.set()
+            self._remove_task_files(task)
+
+    def _remove_task_files(self, task):
+        """Delete a finished task's local CSV, result database and trace files"""
+        for path in glob.glob(os.path.join(self.work_dir, f"task_{task['id']}.*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def run(self):
+        """Lease and run tasks until interrupted"""
+        self.log(f'🛰️ Worker started (kinds: {", ".join(self.kinds)}) → {self.coordinator_url}')
+        try:
+            while self.running:
+                try:
+                    task = self.lease()
+                except requests.RequestException as e:
+                    self.log(f'⚠️ Coordinator unreachable: {e}')
+                    task = None
+                if task is None:
+                    time.sleep(self.poll_interval)
+                    continue
+                self.run_task(task)
+        except KeyboardInterrupt:
+            self.log('⏹️ Worker stopped')
+        finally:
+            self.close_scrapers()
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def cool_off(self, blocked):
+        """Pause leasing after a block page, with a fresh browser after a captcha"""
+        cooloff = self.throttle.cooloff() if self.throttle else 0
+        if blocked.kind == 'captcha':
+            # The session's cookies are flagged; don't keep using them
+            self.close_scrapers()
+        self.log(f'🚧 Cooling off {cooloff:.0f}s')
+        time.sleep(cooloff)
+
+    def close_scrapers(self):
+        for scraper in self.scrapers.values():
+            try:
+                scraper.close()
+            except Exception:
+                pass
+        self.scrapers = {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MapMiner distributed worker')
+    parser.add_argument('--coordinator', default=os.environ.get('COORDINATOR_URL', 'http://localhost:5001'))
+    parser.add_argument('--kinds', default='maps,enrich', help='Comma-separated task kinds to accept')
+    parser.add_argument('--lease-seconds', type=int, default=300)
+    parser.add_argument('--poll-interval', type=float, default=5)
+    parser.add_argument('--worker-id', default=None)
+    args = parser.parse_args()
+
+    worker = Worker(
+        args.coordinator,
+        kinds=[kind.strip() for kind in args.kinds.split(',') if kind.strip()],
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+        worker_id=args.worker_id
+    )
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
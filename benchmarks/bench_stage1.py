@@ -0,0 +1,192 @@
+"""
+Offline Stage 1 benchmark
+
+Replays a Google Maps recording (see maps_replay.py) to a real browser and
+runs search_location, scroll_results and scrape_listings once per
+extraction strategy, reporting search/scroll time and per-listing and
+per-extract latency. Every run is checked field by field: against the
+generated ground truth for synthetic recordings, against the
+'find_element' run for recordings of live pages.
+
+    python benchmarks/bench_stage1.py --browser chrome --headless
+    python benchmarks/bench_stage1.py --recording recordings/berlin --query "Autohaus Berlin, Deutschland"
+    python benchmarks/bench_stage1.py --strategies script --detail-tabs 1,2,4,8 --details-latency 1.5
+
+With --detail-tabs each strategy also runs in tab mode (place pages loaded
+in that many tabs at once); 1 is the click mode.
+
+Record a live run first by setting "record_dir" in the job config.
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maps_scraper_configurable import MapMiner
+from maps_replay import MapsReplayServer, Recording, generate_synthetic_recording
+from result_store import ResultStore
+from tracing import Tracer
+
+COMPARED_FIELDS = ['name', 'address', 'phone', 'website', 'rating', 'reviews']
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def read_spans(trace_path):
+    """Per-listing and per-extract durations (seconds) from a trace file"""
+    listings, extracts = [], []
+    with open(trace_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            span = json.loads(line)
+            if span['name'] != 'listing':
+                continue
+            listings.append(span['duration_ms'] / 1000)
+            extracts.extend(child['duration_ms'] / 1000 for child in span['children'] if child['name'] == 'extract')
+    return listings, extracts
+
+
+def run_strategy(server, query, strategy, expected_count, args, work_dir, detail_tabs=1):
+    """Scrape the replayed query with one extraction strategy and number of details tabs"""
+    name = f'{strategy}_{detail_tabs}tabs'
+    trace_path = os.path.join(work_dir, f'{name}.trace.jsonl')
+    store = ResultStore(os.path.join(work_dir, f'{name}.db'))
+    tracer = Tracer(trace_path)
+    scraper = MapMiner(
+        csv_filename=os.path.join(work_dir, f'{name}.csv'),
+        browser=args.browser,
+        require_website=False,
+        store=store,
+        tracer=tracer,
+        headless=args.headless,
+        maps_url=server.url,
+        extraction_strategy=strategy,
+        sleep_scale=args.sleep_scale,
+        detail_tabs=detail_tabs
+    )
+    try:
+        started = time.perf_counter()
+        scraper.search_location(query)
+        searched = time.perf_counter()
+        scraper.scroll_results(max_scrolls=math.ceil(expected_count / args.card_batch) + 1)
+        scrolled = time.perf_counter()
+        scraper.scrape_listings(max_results=expected_count)
+        finished = time.perf_counter()
+        tab_timing = scraper.tab_stats()
+    finally:
+        scraper.close()
+        tracer.close()
+
+    rows = list(store.iter_rows(fields=COMPARED_FIELDS))
+    store.close()
+    listings, extracts = read_spans(trace_path)
+    return {
+        'strategy': strategy,
+        'detail_tabs': detail_tabs,
+        'listings': len(listings),
+        'saved': len(rows),
+        'search_seconds': round(searched - started, 3),
+        'scroll_seconds': round(scrolled - searched, 3),
+        'listings_seconds': round(finished - scrolled, 3),
+        'listing_p50': round(percentile(listings, 50), 4),
+        'listing_p99': round(percentile(listings, 99), 4),
+        'extract_p50': round(percentile(extracts, 50), 4),
+        'extract_p99': round(percentile(extracts, 99), 4),
+        'tab_timing': tab_timing
+    }, rows
+
+
+def mismatches(rows, reference):
+    """Field values that differ from the reference rows (matched by name)"""
+    by_name = {row['name']: row for row in reference}
+    diffs = []
+    for row in rows:
+        ref = by_name.get(row['name'])
+        if ref is None:
+            diffs.append(f"unexpected listing {row['name']!r}")
+            continue
+        for field in COMPARED_FIELDS:
+            if (row.get(field) or '') != (ref.get(field) or ''):
+                diffs.append(f"{row['name']}: {field} {row.get(field)!r} != {ref.get(field)!r}")
+    missing = set(by_name) - {row['name'] for row in rows}
+    diffs.extend(f'missing listing {name!r}' for name in sorted(missing))
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Stage 1 benchmark against a Maps replay')
+    parser.add_argument('--recording', help='Recording directory (default: generate a synthetic one)')
+    parser.add_argument('--query', default='Autohaus Berlin, Deutschland', help='Recorded query to replay')
+    parser.add_argument('--listings', type=int, default=60, help='Listings in the synthetic recording')
+    parser.add_argument('--strategies', default=','.join(MapMiner.EXTRACTION_STRATEGIES))
+    parser.add_argument('--browser', default='chrome', choices=['chrome', 'edge', 'safari'])
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--sleep-scale', type=float, default=0.05, help='Factor applied to the scraper waits')
+    parser.add_argument('--card-batch', type=int, default=20, help='Cards loaded per scroll')
+    parser.add_argument('--details-latency', type=float, default=0.0, help='Seconds added per details request')
+    parser.add_argument('--detail-tabs', default='1', help='Comma-separated tab counts to compare (1 = click mode)')
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='mapminer_bench1_')
+    try:
+        recording_dir = args.recording
+        expected = None
+        if not recording_dir:
+            recording_dir = os.path.join(work_dir, 'recording')
+            expected = generate_synthetic_recording(recording_dir, args.query, args.listings)
+        expected_count = len(expected) if expected else len(Recording(recording_dir).cards(args.query))
+
+        reports = []
+        failed = False
+        with MapsReplayServer(recording_dir, card_batch=args.card_batch,
+                              details_latency=args.details_latency) as server:
+            print(f'🗺️ Replaying {expected_count} listings from {recording_dir}')
+            runs = [
+                (strategy.strip(), int(tabs))
+                for strategy in args.strategies.split(',') if strategy.strip()
+                for tabs in args.detail_tabs.split(',') if tabs.strip()
+            ]
+            for strategy, tabs in runs:
+                report, rows = run_strategy(server, args.query, strategy, expected_count, args, work_dir, tabs)
+                if expected is None:
+                    expected = rows
+                diffs = mismatches(rows, expected)
+                report['mismatches'] = len(diffs)
+                failed = failed or bool(diffs)
+                reports.append(report)
+                label = strategy if tabs == 1 else f'{strategy}/{tabs}tabs'
+                print(f"  {label:<18} {report['listings_seconds']:>7.2f}s | "
+                      f"listing p50 {report['listing_p50']:.3f}s p99 {report['listing_p99']:.3f}s | "
+                      f"extract p50 {report['extract_p50'] * 1000:.1f}ms p99 {report['extract_p99'] * 1000:.1f}ms | "
+                      f"{report['saved']}/{expected_count} saved, {len(diffs)} mismatches")
+                if report['tab_timing']:
+                    print('     avg load per tab: ' + ', '.join(
+                        f"#{tab} {timing['loads']}× {timing['avg_load_seconds']}s"
+                        for tab, timing in report['tab_timing'].items()
+                    ))
+                for diff in diffs[:5]:
+                    print(f'     ✗ {diff}')
+
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(reports, f, indent=2)
+        if failed:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Offline Stage 2 benchmark
+
+Runs WebsiteScraperConfigurable.process_businesses against a synthetic
+website farm (see website_farm.py) and reports throughput, per-business
+latency, requests per business, CPU time and peak memory. Nothing leaves
+the machine, so the numbers can gate performance regressions:
+
+    python benchmarks/bench_stage2.py --save-baseline benchmarks/stage2_baseline.json
+    python benchmarks/bench_stage2.py --baseline benchmarks/stage2_baseline.json
+    python benchmarks/bench_stage2.py --compare-transports
+    python benchmarks/bench_stage2.py --proxies fast,fast,slow,flaky,dead
+
+The farm gives every site its own 127.x.y.z address; Linux routes the whole
+127/8 block to loopback, on macOS the addresses need `ifconfig lo0 alias`.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website_scraper_configurable import WebsiteScraperConfigurable
+from result_store import ResultStore
+from metrics import STAGE2_CONNECTIONS, STAGE2_WIRE_BYTES, peak_rss_mb
+from website_farm import WebsiteFarm, generate_businesses, serve
+from local_proxies import PROXY_KINDS, start_proxies
+from proxy_pool import ProxyPool
+
+# Metric name -> True if higher is better
+GATED_METRICS = {
+    'throughput': True,
+    'latency_p50': False,
+    'latency_p99': False,
+    'cpu_seconds': False,
+    'peak_rss_mb': False
+}
+# Result quality must never drop, whatever the tolerance
+QUALITY_METRICS = ['emails_found', 'owners_found']
+
+
+class _QuietProgress:
+    """Progress callback that swallows the per-business log lines"""
+
+    def emit_log(self, message, level='info'):
+        pass
+
+    def update_status(self, **kwargs):
+        pass
+
+
+class BenchScraper(WebsiteScraperConfigurable):
+    """Website scraper that records per-business latency and request counts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bench_lock = threading.Lock()
+        self.latencies = []
+        self.requests = 0
+
+    def get_page_content(self, url, *args, **kwargs):
+        with self.bench_lock:
+            self.requests += 1
+        return super().get_page_content(url, *args, **kwargs)
+
+    def process_single_business(self, row_data):
+        started = time.perf_counter()
+        result = super().process_single_business(row_data)
+        if result['status'] in ('processed', 'no_info'):
+            with self.bench_lock:
+                self.latencies.append(time.perf_counter() - started)
+        return result
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def start_farm(num_sites, seed, in_process):
+    """Start the farm in a child process (default) so its CPU isn't counted"""
+    if in_process:
+        farm = WebsiteFarm(num_sites, seed=seed).start()
+        return farm, farm.stop
+
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(num_sites, seed, ready), daemon=True)
+    process.start()
+    port, dead_port = ready.get(timeout=30)
+    farm = WebsiteFarm(num_sites, seed=seed, port=port, dead_port=dead_port)
+
+    def stop():
+        process.terminate()
+        process.join()
+    return farm, stop
+
+
+def counter_value(counter, **labels):
+    return counter.labels(**labels).value
+
+
+def run_benchmark(num_sites, num_businesses, workers, seed, in_process=False, window=None, transport='requests',
+                  proxy_kinds=None):
+    """Run one benchmark pass and return the report dict"""
+    work_dir = tempfile.mkdtemp(prefix='mapminer_bench_')
+    farm, stop_farm = start_farm(num_sites, seed, in_process)
+    proxies = start_proxies(proxy_kinds or [])
+    try:
+        proxy_pool = ProxyPool([proxy.url for proxy in proxies], readmit_after=5) if proxies else None
+        store = ResultStore(os.path.join(work_dir, 'bench.db'))
+        for row in generate_businesses(farm, num_businesses, seed=seed):
+            store.add_business(row)
+
+        scraper = BenchScraper(
+            max_workers=workers,
+            progress_callback=_QuietProgress(),
+            store=store,
+            max_in_flight=window,
+            transport=transport,
+            proxy_pool=proxy_pool
+        )
+
+        wire_started = counter_value(STAGE2_WIRE_BYTES, transport=transport)
+        connections_started = counter_value(STAGE2_CONNECTIONS, transport=transport)
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        stats = scraper.process_businesses()
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        scraper.close()
+        store.close()
+
+        enriched = len(scraper.latencies)
+        report = {
+            'sites': num_sites,
+            'businesses': num_businesses,
+            'workers': workers,
+            'seed': seed,
+            'transport': transport,
+            'wall_seconds': round(wall, 2),
+            'throughput': round(num_businesses / wall, 2),
+            'latency_p50': round(percentile(scraper.latencies, 50), 3),
+            'latency_p99': round(percentile(scraper.latencies, 99), 3),
+            'requests_per_business': round(scraper.requests / enriched, 2) if enriched else 0,
+            'cpu_seconds': round(cpu, 2),
+            'peak_rss_mb': round(peak_rss_mb() or 0.0, 1),
+            'wire_mb': round((counter_value(STAGE2_WIRE_BYTES, transport=transport) - wire_started) / 1e6, 1),
+            'connections': counter_value(STAGE2_CONNECTIONS, transport=transport) - connections_started,
+            'emails_found': stats.get('emails_found', 0),
+            'owners_found': stats.get('owners_found', 0),
+            'no_info': stats.get('no_info', 0)
+        }
+        if proxy_pool is not None:
+            report['proxies'] = [
+                dict(stats, kind=proxy.kind) for proxy, stats in zip(proxies, proxy_pool.stats())
+            ]
+        return report
+    finally:
+        for proxy in proxies:
+            proxy.stop()
+        stop_farm()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regressions of report against baseline"""
+    regressions = []
+    for name in ('sites', 'businesses', 'workers', 'seed', 'transport'):
+        if report.get(name) != baseline.get(name):
+            regressions.append(f'{name} differs from the baseline run ({baseline.get(name)} vs {report.get(name)})')
+    for name, higher_is_better in GATED_METRICS.items():
+        old, new = baseline.get(name), report.get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f'{name}: {old} → {new} ({change:+.1%})')
+    for name in QUALITY_METRICS:
+        if report.get(name, 0) < baseline.get(name, 0):
+            regressions.append(f'{name}: {baseline[name]} → {report[name]}')
+    return regressions
+
+
+def print_report(report):
+    print(f"⚡ Throughput:          {report['throughput']} businesses/s ({report['wall_seconds']}s)")
+    print(f"⏱️ Latency p50 / p99:   {report['latency_p50']}s / {report['latency_p99']}s")
+    print(f"🌐 Requests/business:   {report['requests_per_business']}")
+    print(f"📦 On the wire:         {report['wire_mb']} MB over {report['connections']} connections")
+    print(f"🧮 CPU:                 {report['cpu_seconds']}s")
+    print(f"💾 Peak RSS:            {report['peak_rss_mb']} MB")
+    print(f"📧 Emails / 👤 owners:  {report['emails_found']} / {report['owners_found']}")
+    for proxy in report.get('proxies', []):
+        latency = f"{proxy['latency'] * 1000:.0f}ms" if proxy['latency'] is not None else 'n/a'
+        print(f"🔌 {proxy['kind']:<6} {proxy['proxy']:<16} {proxy['successes']:>6} ok {proxy['failures']:>5} failed "
+              f"{latency:>7} {proxy['bytes'] / 1e6:>6.1f} MB  ejected {proxy['ejections']}x")
+
+
+def compare_transports(args):
+    """Run the same farm with each transport and print them side by side"""
+    reports = {}
+    for transport in ('requests', 'httpx'):
+        print(f'🔌 Transport: {transport}')
+        reports[transport] = run_benchmark(
+            args.sites, args.businesses, args.workers, args.seed, args.in_process, args.window, transport
+        )
+        print_report(reports[transport])
+        print()
+
+    rows = [
+        ('throughput', 'businesses/s'), ('latency_p50', 's'), ('latency_p99', 's'),
+        ('wire_mb', 'MB'), ('connections', ''), ('cpu_seconds', 's'), ('emails_found', ''), ('owners_found', '')
+    ]
+    print(f"{'':<14}{'requests':>12}{'httpx':>12}{'change':>10}")
+    for name, unit in rows:
+        old, new = reports['requests'][name], reports['httpx'][name]
+        change = f'{(new - old) / old:+.0%}' if old else ''
+        print(f'{name:<14}{old:>12}{new:>12}{change:>10} {unit}')
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Stage 2 benchmark against a synthetic website farm')
+    parser.add_argument('--sites', type=int, default=2000, help='Distinct websites in the farm')
+    parser.add_argument('--businesses', type=int, default=1000, help='Businesses to enrich')
+    parser.add_argument('--workers', type=int, default=10, help='Stage 2 max_workers')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--window', type=int, help='Businesses in flight at once (default: 4 × workers)')
+    parser.add_argument('--transport', choices=['requests', 'httpx'], default='requests')
+    parser.add_argument('--compare-transports', action='store_true', help='Run with both transports and compare')
+    parser.add_argument('--proxies', help=f'Route through local stand-in proxies, e.g. fast,slow,flaky,dead '
+                                          f'(kinds: {", ".join(PROXY_KINDS)})')
+    parser.add_argument('--in-process', action='store_true', help='Serve the farm from this process')
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file')
+    parser.add_argument('--baseline', help='Fail if the run regresses against this report')
+    parser.add_argument('--save-baseline', help='Save the report as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed relative regression (default: 0.15)')
+    args = parser.parse_args()
+
+    print(f'🏭 Website farm: {args.sites} sites, {args.businesses} businesses, {args.workers} workers')
+    if args.compare_transports:
+        reports = compare_transports(args)
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(reports, f, indent=2)
+        return
+
+    proxy_kinds = [kind.strip() for kind in args.proxies.split(',')] if args.proxies else None
+    report = run_benchmark(
+        args.sites, args.businesses, args.workers, args.seed, args.in_process, args.window, args.transport,
+        proxy_kinds
+    )
+    print_report(report)
+
+    for path in (args.json_path, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print('❌ Regressions against baseline:')
+            for regression in regressions:
+                print(f'   {regression}')
+            sys.exit(1)
+        print('✅ No regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Local stand-in proxies for testing the proxy pool offline
+
+Each LocalProxy is a small forwarding HTTP proxy on a loopback port that
+adds a fixed delay and fails a share of requests on purpose, so the pool's
+scoring, ejection and re-admission can be watched against the website farm
+without real proxies:
+
+    python benchmarks/bench_stage2.py --proxies fast,fast,slow,flaky,dead
+
+Kinds: 'fast' (no delay), 'slow' (+0.3s per request), 'flaky' (every
+third request drops the connection) and 'dead' (nothing listening). Only
+plain HTTP is forwarded (no CONNECT), which is all the farm speaks.
+"""
+import http.client
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+PROXY_KINDS = {
+    'fast': {'delay': 0.0, 'fail_every': 0},
+    'slow': {'delay': 0.3, 'fail_every': 0},
+    'flaky': {'delay': 0.0, 'fail_every': 3},
+    'dead': None
+}
+
+# Upstream headers not passed on
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'proxy-authorization', 'transfer-encoding'}
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        proxy = self.server.proxy
+        if proxy.should_fail():
+            # Drop the connection without an answer, like a proxy that gave up
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if proxy.delay:
+            time.sleep(proxy.delay)
+
+        target = urlsplit(self.path)
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_HEADERS}
+        try:
+            upstream = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=10)
+            upstream.request('GET', target.path or '/' + ('?' + target.query if target.query else ''), headers=headers)
+            response = upstream.getresponse()
+            body = response.read()
+            status, response_headers = response.status, response.getheaders()
+            upstream.close()
+        except OSError:
+            status, response_headers, body = 502, [('Content-Type', 'text/plain')], b'Bad Gateway'
+
+        with proxy.lock:
+            proxy.requests += 1
+            proxy.bytes += len(body)
+        self.send_response(status)
+        for name, value in response_headers:
+            if name.lower() not in HOP_HEADERS and name.lower() != 'content-length':
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response are expected
+        pass
+
+
+class LocalProxy:
+    """One stand-in proxy on 127.0.0.1"""
+
+    def __init__(self, kind='fast'):
+        """
+        Args:
+            kind: One of PROXY_KINDS
+        """
+        if kind not in PROXY_KINDS:
+            raise ValueError(f'Unknown proxy kind: {kind}')
+        self.kind = kind
+        settings = PROXY_KINDS[kind] or {'delay': 0.0, 'fail_every': 0}
+        self.delay = settings['delay']
+        self.fail_every = settings['fail_every']
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        self.seen = 0
+        self.server = None
+        self.port = None
+
+    def should_fail(self):
+        if not self.fail_every:
+            return False
+        with self.lock:
+            self.seen += 1
+            return self.seen % self.fail_every == 0
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self):
+        if PROXY_KINDS[self.kind] is None:
+            # Bind and close right away: a port nothing listens on
+            with socket.socket() as sock:
+                sock.bind(('127.0.0.1', 0))
+                self.port = sock.getsockname()[1]
+            return self
+        self.server = _ProxyServer(('127.0.0.1', 0), _ProxyHandler)
+        self.server.proxy = self
+        self.port = self.server.server_address[1]
+        thread = threading.Thread(target=self.server.serve_forever, name=f'proxy-{self.kind}-{self.port}')
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def start_proxies(kinds):
+    """Start one LocalProxy per kind; returns the running proxies"""
+    return [LocalProxy(kind).start() for kind in kinds]
@@ -0,0 +1,293 @@
+"""
+Synthetic website farm for offline Stage 2 benchmarks
+
+One threaded HTTP server answers for thousands of fake business sites. Each
+site gets its own loopback address (127.x.y.z, all routed to lo on Linux), so
+the scraper's urljoin(base_url, '/impressum') lands on the right site and the
+server tells sites apart by the Host header. Site behaviour is derived from
+the seed and the site number, so every run serves identical content. Like most
+real web servers the farm compresses pages the client accepts compressed
+(brotli if the brotli package is installed, else gzip); it speaks HTTP/1.1
+without TLS, so no client can negotiate HTTP/2 with it.
+"""
+import gzip
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Where sites keep their impressum; the last two are paths the scraper never probes
+CONTACT_PATHS = [
+    '/impressum', '/impressum/', '/impressum.html', '/imprint', '/kontakt',
+    '/kontakt/', '/kontakt.html', '/contact', '/ueber-uns', '/about',
+    '/datenschutz', '/rechtliches/impressum', '/de/impressum'
+]
+
+# Share of sites per kind; the rest are 'normal'
+SITE_KINDS = [
+    ('slow', 0.05),       # 0.5-2s per response
+    ('dead', 0.05),       # nothing listening, connection refused
+    ('redirect', 0.10),   # / and contact pages redirect elsewhere
+    ('large', 0.03),      # 1-3 MB home page
+    ('soft404', 0.10),    # unknown paths return the home page with 200
+    ('no_contact', 0.12)  # no impressum at all, every probe is a 404
+]
+
+FIRST_NAMES = ['Anna', 'Jonas', 'Lena', 'Lukas', 'Marie', 'Felix', 'Sophie', 'Paul', 'Laura', 'Tim']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Becker', 'Hoffmann', 'Koch']
+FILLER = ('Wir sind Ihr zuverlässiger Partner in der Region. Qualität, Service und faire Preise '
+          'seit über zwanzig Jahren. Besuchen Sie unseren Ausstellungsraum oder rufen Sie uns an. ')
+
+
+def site_address(site_id):
+    """Loopback address of a site (127.0.0.1 is left out)"""
+    n = site_id + 2
+    return f'127.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+
+def site_id_for(host):
+    """Inverse of site_address for a Host header like '127.0.4.2:8000'"""
+    parts = host.split(':')[0].split('.')
+    if len(parts) != 4 or parts[0] != '127':
+        return None
+    return (int(parts[1]) << 16 | int(parts[2]) << 8 | int(parts[3])) - 2
+
+
+class SiteSpec:
+    """Deterministic description of one fake business site"""
+
+    def __init__(self, site_id, seed):
+        rng = random.Random(f'{seed}:{site_id}')
+        self.site_id = site_id
+        self.kind = 'normal'
+        roll = rng.random()
+        for kind, share in SITE_KINDS:
+            if roll < share:
+                self.kind = kind
+                break
+            roll -= share
+
+        self.latency = rng.uniform(0.5, 2.0) if self.kind == 'slow' else rng.uniform(0.005, 0.05)
+        self.owner = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        self.email = f'kontakt{site_id}@firma{site_id}.example'
+        self.email_on_home = rng.random() < 0.25
+        self.owner_on_home = rng.random() < 0.1
+        self.contact_path = rng.choice(CONTACT_PATHS)
+        self.home_size = rng.randint(1_000_000, 3_000_000) if self.kind == 'large' else rng.randint(8_000, 60_000)
+
+    def page(self, body):
+        return (
+            '<html><head><title>Firma</title>'
+            '<style>body { font-family: sans-serif; }</style>'
+            '<script>window.dataLayer = window.dataLayer || [];</script>'
+            '</head><body><nav><a href="/">Start</a> <a href="/kontakt">Kontakt</a></nav>'
+            f'<main>{body}</main><footer>© Firma {self.site_id}</footer></body></html>'
+        ).encode('utf-8')
+
+    def home(self):
+        parts = [FILLER * max(1, self.home_size // len(FILLER))]
+        if self.email_on_home:
+            parts.append(f'\n<p>E-Mail: {self.email}</p>')
+        if self.owner_on_home:
+            parts.append(f'\n<p>Inhaber: {self.owner}</p>')
+        return self.page(''.join(parts))
+
+    def contact(self):
+        return self.page(
+            f'<h1>Impressum</h1>\n<p>Firma {self.site_id} GmbH<br>\nMusterstraße {self.site_id % 200 + 1}</p>\n'
+            f'<p>Geschäftsführer: {self.owner}</p>\n<p>E-Mail: {self.email}</p>\n'
+            '<p>Registergericht: Amtsgericht Musterstadt</p>\n'
+        )
+
+    def respond(self, path):
+        """Return (status, headers, body) for a request path"""
+        if self.kind == 'redirect':
+            if path == '/':
+                return 301, {'Location': '/start/'}, b''
+            if path == self.contact_path:
+                return 302, {'Location': '/rechtliches' + path.rstrip('/')}, b''
+            if path == '/start/':
+                return 200, {}, self.home()
+            if path == '/rechtliches' + self.contact_path.rstrip('/'):
+                return 200, {}, self.contact()
+            return 404, {}, self.page('Seite nicht gefunden')
+
+        if path == '/':
+            return 200, {}, self.home()
+        if path == self.contact_path and self.kind != 'no_contact':
+            return 200, {}, self.contact()
+        if self.kind == 'soft404':
+            return 200, {}, self.home()
+        return 404, {}, self.page('Seite nicht gefunden')
+
+
+def encode_body(body, accept_encoding):
+    """Compress a response body for the client's Accept-Encoding; returns (body, encoding or None)"""
+    accepted = {part.split(';')[0].strip() for part in accept_encoding.lower().split(',')}
+    if len(body) < 512:
+        return body, None
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=5), 'br'
+    if 'gzip' in accepted:
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    return body, None
+
+
+class _FarmHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY a reused
+    # keep-alive connection stalls ~40ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        farm = self.server.farm
+        site_id = site_id_for(self.headers.get('Host', ''))
+        if site_id is None or not 0 <= site_id < farm.num_sites:
+            self.send_error(404)
+            return
+
+        spec = farm.spec(site_id)
+        farm.count_request()
+        time.sleep(spec.latency)
+        status, headers, body = spec.respond(self.path.split('?')[0])
+        body, encoding = encode_body(body, self.headers.get('Accept-Encoding', ''))
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FarmServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # The scraper drops 404 responses without reading them; resets are expected
+        pass
+
+
+class WebsiteFarm:
+    """
+    HTTP server simulating `num_sites` business websites
+
+    Dead sites point at `dead_port`, where nothing listens, so they fail with
+    connection refused like an expired domain. Use as a context manager or
+    call start()/stop(). A farm served by another process (see serve()) is
+    described by passing its port and dead_port without starting it here.
+    """
+
+    def __init__(self, num_sites, seed=42, port=0, dead_port=None):
+        """
+        Args:
+            num_sites: Number of distinct websites
+            seed: Seed for site behaviour and content
+            port: Port to listen on (0 = any free port)
+            dead_port: Port used for dead sites (default: a free port)
+        """
+        self.num_sites = num_sites
+        self.seed = seed
+        self.port = port
+        self.dead_port = dead_port or self._closed_port()
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._specs = {}
+        self.server = None
+        self.thread = None
+
+    @staticmethod
+    def _closed_port():
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            return probe.getsockname()[1]
+
+    def spec(self, site_id):
+        spec = self._specs.get(site_id)
+        if spec is None:
+            spec = self._specs[site_id] = SiteSpec(site_id, self.seed)
+        return spec
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def url(self, site_id):
+        """Base URL of a site as it would appear in the Maps results"""
+        port = self.dead_port if self.spec(site_id).kind == 'dead' else self.port
+        return f'http://{site_address(site_id)}:{port}/'
+
+    def bind(self):
+        """Open the listening socket; fills in self.port when it was 0"""
+        self.server = _FarmServer(('0.0.0.0', self.port), _FarmHandler)
+        self.server.farm = self
+        self.port = self.server.server_address[1]
+        return self
+
+    def start(self):
+        if self.server is None:
+            self.bind()
+        self.thread = threading.Thread(target=self.server.serve_forever, name='website-farm')
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def generate_businesses(farm, num_businesses, shared_share=0.1, seed=42):
+    """
+    Business rows pointing at the farm's sites
+
+    About `shared_share` of the businesses are branches of a chain and point at
+    one of a few shared sites; the rest get a site of their own. Sites are
+    assigned round-robin, so num_businesses should not exceed farm.num_sites.
+    """
+    rng = random.Random(seed)
+    chain_sites = list(range(max(1, farm.num_sites // 100)))
+    rows = []
+    next_site = len(chain_sites)
+    for i in range(num_businesses):
+        if rng.random() < shared_share:
+            site_id = rng.choice(chain_sites)
+        else:
+            site_id = next_site % farm.num_sites
+            next_site += 1
+        rows.append({
+            'name': f'Business {i}',
+            'address': f'Musterstraße {i}, 10115 Berlin',
+            'phone': f'030 {1000000 + i}',
+            'website': farm.url(site_id),
+            'rating': f'{rng.uniform(3, 5):.1f}',
+            'reviews': str(rng.randint(0, 500)),
+            'email': '',
+            'owner': ''
+        })
+    return rows
+
+
+def serve(num_sites, seed, ready):
+    """multiprocessing target: run a farm until the process is terminated"""
+    farm = WebsiteFarm(num_sites, seed=seed).bind()
+    ready.put((farm.port, farm.dead_port))
+    farm.server.serve_forever()
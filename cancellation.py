@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside the scrapers once their cancellation token has fired"""
+
+
+class CancellationToken:
+    """
+    Cooperative stop signal shared by the orchestrator and both scrapers
+
+    Loops call raise_if_cancelled() between units of work and use sleep()
+    instead of time.sleep() so waits end as soon as a stop is requested.
+    Blocking resources (browser, HTTP responses, executors) register
+    on_cancel() callbacks that abort them from the cancelling thread.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._next_handle = 0
+        self.cancelled_at = None
+        self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason='stop requested'):
+        """Fire the token and run all registered callbacks once"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.cancelled_at = time.time()
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks = {}
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ScrapeCancelled(self.reason)
+
+    def sleep(self, seconds):
+        """Sleep for up to `seconds`, raising ScrapeCancelled as soon as the token fires"""
+        if self._event.wait(max(0, seconds)):
+            raise ScrapeCancelled(self.reason)
+
+    def on_cancel(self, callback):
+        """
+        Register a callback to run on cancel and return a handle for remove_callback()
+
+        If the token has already fired the callback runs immediately.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                handle = self._next_handle
+                self._next_handle += 1
+                self._callbacks[handle] = callback
+                return handle
+
+        try:
+            callback()
+        except Exception:
+            pass
+        return None
+
+    def remove_callback(self, handle):
+        if handle is None:
+            return
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def seconds_since_cancel(self):
+        """Seconds elapsed since cancel() was called, or None"""
+        if self.cancelled_at is None:
+            return None
+        return time.time() - self.cancelled_at
@@ -0,0 +1,192 @@
+"""
+Pre-click filtering of Google Maps result cards
+
+A result card already shows name, rating, review count, category and
+opening status. CardFilter checks a job's filter rules against that preview
+so listings that can't qualify are skipped without the click and details
+wait (several seconds each). Rules are compiled once per job; fields a card
+doesn't show never reject it, and the same rules are checked again on the
+clicked details.
+
+Rules (all optional) in the job config under "filters":
+
+    {
+        "required_words": ["GmbH", "AG"],       name contains any of these
+        "excluded_words": ["Vermietung"],       name contains none of these
+        "min_rating": 4.0,
+        "min_reviews": 10,
+        "categories": ["Autohaus"],             category contains any of these
+        "exclude_categories": ["Autovermietung"],
+        "skip_closed": true                     skip temporarily/permanently closed places
+    }
+"""
+import re
+import threading
+
+from metrics import STAGE1_CARD_REJECTIONS
+
+# Collects the card preview in one WebDriver call
+CARD_SCRIPT = """
+var card = arguments[0];
+var text = function (selector) {
+    var element = card.querySelector(selector);
+    return element ? (element.textContent || '').trim() : '';
+};
+var link = card.querySelector('a.hfpxzc');
+var lines = Array.prototype.map.call(card.querySelectorAll('div.W4Efsd'), function (line) {
+    return (line.textContent || '').trim();
+});
+return {
+    name: text('div.fontHeadlineSmall') || (link ? link.getAttribute('aria-label') : ''),
+    rating: text('span.MW4etd'),
+    reviews: text('span.UY7F9'),
+    lines: lines,
+    text: (card.innerText || card.textContent || '')
+};
+"""
+
+CLOSED_MARKERS = (
+    'dauerhaft geschlossen', 'vorübergehend geschlossen',
+    'permanently closed', 'temporarily closed'
+)
+NO_REVIEWS_MARKERS = ('keine rezensionen', 'no reviews')
+NUMBER_PATTERN = re.compile(r'\d[\d.,]*')
+LETTER_PATTERN = re.compile(r'[^\W\d_]')
+
+
+def _word_pattern(words):
+    """One case-insensitive alternation for a word list, or None"""
+    words = [word.strip() for word in words or [] if word and word.strip()]
+    if not words:
+        return None
+    return re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+
+
+def _split_words(value):
+    if isinstance(value, str):
+        return [word.strip() for word in value.split(',') if word.strip()]
+    return list(value or [])
+
+
+def parse_rating(value):
+    """'4,6' or '4.6' -> 4.6; None if there is no number"""
+    match = NUMBER_PATTERN.search(value or '')
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def parse_reviews(value):
+    """'(1.234)' or '1,234 Rezensionen' -> 1234; None if there is no number"""
+    match = NUMBER_PATTERN.search(value or '')
+    if not match:
+        return None
+    return int(re.sub(r'[.,]', '', match.group(0)))
+
+
+def parse_card(raw):
+    """Normalize the CARD_SCRIPT result into the fields the rules check"""
+    text = (raw.get('text') or '').lower()
+    reviews = parse_reviews(raw.get('reviews'))
+    if reviews is None and any(marker in text for marker in NO_REVIEWS_MARKERS):
+        reviews = 0
+    category = None
+    # The line under the name reads "Autohaus · Hauptstraße 1"
+    for line in raw.get('lines') or []:
+        parts = [part.strip() for part in line.split('·') if part.strip()]
+        for part in parts:
+            # Skip the rating "4,5(123)" and price level "€€"
+            if LETTER_PATTERN.search(part):
+                category = part
+                break
+        if category:
+            break
+    return {
+        'name': raw.get('name') or '',
+        'rating': parse_rating(raw.get('rating')),
+        'reviews': reviews,
+        'category': category,
+        'closed': any(marker in text for marker in CLOSED_MARKERS)
+    }
+
+
+class CardFilter:
+    """Compiled filter rules with per-rule rejection counts"""
+
+    RULES = ('required_words', 'excluded_words', 'min_rating', 'min_reviews',
+             'categories', 'exclude_categories', 'skip_closed')
+
+    def __init__(self, rules=None, required_words=None):
+        """
+        Args:
+            rules: Filter rules dict (see module docstring); unknown keys raise ValueError
+            required_words: Legacy required_words setting, merged into the rules
+        """
+        rules = dict(rules or {})
+        unknown = set(rules) - set(self.RULES)
+        if unknown:
+            raise ValueError(f"Unknown filter rules: {', '.join(sorted(unknown))}")
+
+        self.required = _word_pattern(_split_words(rules.get('required_words')) + list(required_words or []))
+        self.excluded = _word_pattern(_split_words(rules.get('excluded_words')))
+        self.categories = _word_pattern(_split_words(rules.get('categories')))
+        self.exclude_categories = _word_pattern(_split_words(rules.get('exclude_categories')))
+        self.min_rating = float(rules['min_rating']) if rules.get('min_rating') not in (None, '') else None
+        self.min_reviews = int(rules['min_reviews']) if rules.get('min_reviews') not in (None, '') else None
+        self.skip_closed = bool(rules.get('skip_closed'))
+
+        self.lock = threading.Lock()
+        self.rejections = {}
+
+    @property
+    def active(self):
+        """True if any rule is set"""
+        return any((self.required, self.excluded, self.categories, self.exclude_categories,
+                    self.min_rating is not None, self.min_reviews is not None, self.skip_closed))
+
+    @property
+    def needs_card_details(self):
+        """True if a rule looks at more of the card than the name"""
+        return any((self.categories, self.exclude_categories, self.min_rating is not None,
+                    self.min_reviews is not None, self.skip_closed))
+
+    def check(self, card):
+        """
+        Name of the first rule the card fails, or None if it passes
+
+        Args:
+            card: dict with any of name, rating (float), reviews (int),
+                category and closed; missing values pass every rule
+        """
+        name = card.get('name')
+        if name and self.required and not self.required.search(name):
+            return 'required_words'
+        if name and self.excluded and self.excluded.search(name):
+            return 'excluded_words'
+        rating = card.get('rating')
+        if self.min_rating is not None and rating is not None and rating < self.min_rating:
+            return 'min_rating'
+        reviews = card.get('reviews')
+        if self.min_reviews is not None and reviews is not None and reviews < self.min_reviews:
+            return 'min_reviews'
+        category = card.get('category')
+        if category and self.categories and not self.categories.search(category):
+            return 'categories'
+        if category and self.exclude_categories and self.exclude_categories.search(category):
+            return 'exclude_categories'
+        if self.skip_closed and card.get('closed'):
+            return 'skip_closed'
+        return None
+
+    def reject(self, rule):
+        """Count a rejection by `rule`"""
+        with self.lock:
+            self.rejections[rule] = self.rejections.get(rule, 0) + 1
+        STAGE1_CARD_REJECTIONS.labels(rule=rule).inc()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.rejections)
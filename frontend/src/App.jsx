@@ -1,12 +1,16 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { io } from 'socket.io-client'
 import ConfigurationPanel from './components/ConfigurationPanel'
 import ProgressDisplay from './components/ProgressDisplay'
 import LogDisplay from './components/LogDisplay'
+import ResultsTable from './components/ResultsTable'
 import StatsDisplay from './components/StatsDisplay'
 import LanguageSelector from './components/LanguageSelector'
 import { LanguageProvider, useLanguage } from './LanguageContext'
-import { Map } from 'lucide-react'
+import { Map as MapIcon } from 'lucide-react'
+
+// Keep the log view bounded; the backend keeps its own ring buffer per job
+const MAX_LOGS = 1000
 
 function AppContent() {
   const { t } = useLanguage()
@@ -42,6 +46,11 @@ function AppContent() {
     require_website: true
   })
   const [csvFilePath, setCsvFilePath] = useState(null)
+  const [jobId, setJobId] = useState(null)
+  // Live result rows keyed by id; lastSeq lets a reconnecting client resume
+  const [rows, setRows] = useState(new Map())
+  const jobIdRef = useRef(null)
+  const lastSeqRef = useRef(0)
 
   useEffect(() => {
     const newSocket = io('http://localhost:5001')
@@ -49,6 +58,11 @@ function AppContent() {
     newSocket.on('connect', () => {
       console.log('Connected to backend')
       addLog(t('connectedToBackend'), 'success')
+      // After a reconnect, rejoin the job and fetch only the rows we missed
+      if (jobIdRef.current) {
+        newSocket.emit('join_job', { job_id: jobIdRef.current })
+        newSocket.emit('resume_rows', { job_id: jobIdRef.current, after_seq: lastSeqRef.current })
+      }
     })
     
     newSocket.on('disconnect', () => {
@@ -68,11 +82,41 @@ function AppContent() {
       addLog(data.message, data.level)
     })
     
+    newSocket.on('log_batch', (data) => {
+      addLogs(data.logs)
+    })
+    
+    newSocket.on('status_delta', (data) => {
+      setStatus(prev => ({
+        ...prev,
+        ...data,
+        stats: { ...prev.stats, ...(data.stats || {}) }
+      }))
+    })
+    
+    newSocket.on('row_delta', (data) => {
+      if (data.resync_after !== undefined) {
+        // The server dropped deltas for this room; re-read from where we are
+        const afterSeq = Math.min(lastSeqRef.current, data.resync_after)
+        newSocket.emit('resume_rows', { job_id: jobIdRef.current, after_seq: afterSeq })
+        return
+      }
+      applyRowDeltas(data.rows)
+      if (data.replay && data.more) {
+        newSocket.emit('resume_rows', { job_id: jobIdRef.current, after_seq: data.last_seq })
+      }
+    })
+    
     newSocket.on('scraping_complete', (data) => {
       setCsvFilePath(data.csv_path)
       addLog(t('scrapingComplete'), 'success')
     })
     
+    newSocket.on('scraping_cancelled', (data) => {
+      setCsvFilePath(data.csv_path)
+      addLog(t('scrapingCancelled'), 'warning')
+    })
+    
     setSocket(newSocket)
     
     return () => newSocket.close()
@@ -83,7 +127,30 @@ function AppContent() {
       message, 
       level, 
       timestamp: new Date().toLocaleTimeString() 
-    }])
+    }].slice(-MAX_LOGS))
+  }
+
+  const addLogs = (entries) => {
+    setLogs(prev => [...prev, ...entries.map(entry => ({
+      message: entry.message,
+      level: entry.level,
+      timestamp: new Date(entry.timestamp).toLocaleTimeString()
+    }))].slice(-MAX_LOGS))
+  }
+
+  const applyRowDeltas = (deltas) => {
+    if (!deltas.length) return
+    setRows(prev => {
+      const next = new Map(prev)
+      for (const delta of deltas) {
+        const current = next.get(delta.id)
+        // Deltas can arrive twice (live and replayed); keep the newest
+        if (current && current.seq >= delta.seq) continue
+        next.set(delta.id, { ...current, ...delta.row, id: delta.id, seq: delta.seq })
+        lastSeqRef.current = Math.max(lastSeqRef.current, delta.seq)
+      }
+      return next
+    })
   }
 
   const handleStart = async () => {
@@ -99,8 +166,17 @@ function AppContent() {
       })
       
       if (response.ok) {
+        const data = await response.json()
         addLog(t('scraperStarted'), 'success')
         setLogs([])
+        if (socket && jobId) {
+          socket.emit('leave_job', { job_id: jobId })
+        }
+        setJobId(data.job_id)
+        jobIdRef.current = data.job_id
+        lastSeqRef.current = 0
+        setRows(new Map())
+        socket?.emit('join_job', { job_id: data.job_id })
       } else {
         const error = await response.json()
         addLog(`${t('failedToStart')} ${error.error}`, 'error')
@@ -114,6 +190,10 @@ function AppContent() {
     try {
       const response = await fetch('http://localhost:5001/api/stop', {
         method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ job_id: jobId }),
       })
       
       if (response.ok) {
@@ -160,7 +240,7 @@ function AppContent() {
           <div className="flex items-center justify-between">
             <div className="flex items-center gap-4">
               <div className="p-3 bg-gradient-to-br from-primary-500 to-primary-600 rounded-2xl shadow-lg shadow-primary-500/20">
-                <Map className="w-7 h-7 text-white" />
+                <MapIcon className="w-7 h-7 text-white" />
               </div>
               <div>
                 <h1 className="text-4xl font-bold tracking-tight bg-gradient-to-r from-slate-900 to-slate-700 bg-clip-text text-transparent">
@@ -192,6 +272,9 @@ function AppContent() {
           <ProgressDisplay status={status} csvFilePath={csvFilePath} onDownload={handleDownload} />
         </div>
 
+        {/* Live Results */}
+        <ResultsTable rows={Array.from(rows.values())} />
+
         {/* Log Display */}
         <LogDisplay logs={logs} />
       </div>
@@ -0,0 +1,68 @@
+import { Table } from 'lucide-react'
+import { useLanguage } from '../LanguageContext'
+
+// Only the newest rows are rendered; the full result set is in the download
+const MAX_VISIBLE_ROWS = 200
+
+export default function ResultsTable({ rows }) {
+  const { t } = useLanguage()
+  const visible = rows.slice(-MAX_VISIBLE_ROWS).reverse()
+
+  const columns = [
+    { key: 'name', label: t('columnName') },
+    { key: 'address', label: t('columnAddress') },
+    { key: 'phone', label: t('columnPhone') },
+    { key: 'website', label: t('columnWebsite') },
+    { key: 'rating', label: t('columnRating') },
+    { key: 'email', label: t('columnEmail') },
+    { key: 'owner', label: t('columnOwner') },
+    { key: 'query', label: t('columnQuery') }
+  ]
+
+  return (
+    <div className="bg-white rounded-3xl shadow-sm border border-slate-100 p-8 mb-6 transition-all hover:shadow-md">
+      <div className="flex items-center justify-between mb-6">
+        <div>
+          <h2 className="text-3xl font-semibold text-slate-900 tracking-tight">{t('liveResults')}</h2>
+          <p className="text-slate-500 mt-1 text-sm">
+            {rows.length} {rows.length === 1 ? t('resultRow') : t('resultRows')}
+          </p>
+        </div>
+        <div className="p-3 bg-gradient-to-br from-primary-500 to-primary-600 rounded-xl shadow-lg shadow-primary-500/20">
+          <Table className="w-6 h-6 text-white" />
+        </div>
+      </div>
+
+      <div className="h-96 overflow-auto rounded-2xl border border-slate-200">
+        {rows.length === 0 ? (
+          <div className="flex items-center justify-center h-full text-slate-400">
+            <p>{t('noResults')}</p>
+          </div>
+        ) : (
+          <table className="min-w-full text-sm">
+            <thead className="bg-slate-50 sticky top-0">
+              <tr>
+                {columns.map(column => (
+                  <th key={column.key} className="px-4 py-3 text-left font-medium text-slate-600 whitespace-nowrap">
+                    {column.label}
+                  </th>
+                ))}
+              </tr>
+            </thead>
+            <tbody className="divide-y divide-slate-100">
+              {visible.map(row => (
+                <tr key={row.id} className="hover:bg-slate-50">
+                  {columns.map(column => (
+                    <td key={column.key} className="px-4 py-2 text-slate-700 whitespace-nowrap max-w-xs truncate">
+                      {row[column.key] || ''}
+                    </td>
+                  ))}
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        )}
+      </div>
+    </div>
+  )
+}
@@ -45,6 +45,7 @@ export const translations = {
     howItWorks: "How it works:",
     howItWorksText: "Stage 1 collects basic business information from Google Maps. Stage 2 visits each website to extract email addresses and owner information. Stage 3 provides your completed CSV file for download.",
     scrapingComplete: "Scraping complete! Click the download button above to get your CSV file.",
+    scrapingCancelled: "Scraping stopped. The results collected so far can still be downloaded.",
     
     // Stats Display
     mapsScraped: "Maps Scraped",
@@ -58,6 +59,20 @@ export const translations = {
     entry: "entry",
     noLogs: "No logs yet. Start scraping to see activity...",
     
+    // Results Table
+    liveResults: "Live Results",
+    resultRow: "business",
+    resultRows: "businesses",
+    noResults: "No results yet. Businesses appear here as soon as they are saved...",
+    columnName: "Name",
+    columnAddress: "Address",
+    columnPhone: "Phone",
+    columnWebsite: "Website",
+    columnRating: "Rating",
+    columnEmail: "Email",
+    columnOwner: "Owner",
+    columnQuery: "Query",
+    
     // Messages
     connectedToBackend: "✅ Connected to backend server",
     disconnectedFromBackend: "⚠️ Disconnected from backend server",
@@ -117,6 +132,7 @@ export const translations = {
     howItWorks: "So funktioniert es:",
     howItWorksText: "Stufe 1 sammelt grundlegende Geschäftsinformationen von Google Maps. Stufe 2 besucht jede Website, um E-Mail-Adressen und Inhaberinformationen zu extrahieren. Stufe 3 stellt Ihre fertige CSV-Datei zum Download bereit.",
     scrapingComplete: "Scraping abgeschlossen! Klicken Sie auf die Download-Schaltfläche oben, um Ihre CSV-Datei zu erhalten.",
+    scrapingCancelled: "Scraping gestoppt. Die bisher gesammelten Ergebnisse können weiterhin heruntergeladen werden.",
     
     // Stats Display
     mapsScraped: "Maps gescraped",
@@ -130,6 +146,20 @@ export const translations = {
     entry: "Eintrag",
     noLogs: "Noch keine Protokolle. Starten Sie das Scraping, um Aktivitäten zu sehen...",
     
+    // Results Table
+    liveResults: "Live-Ergebnisse",
+    resultRow: "Unternehmen",
+    resultRows: "Unternehmen",
+    noResults: "Noch keine Ergebnisse. Unternehmen erscheinen hier, sobald sie gespeichert sind...",
+    columnName: "Name",
+    columnAddress: "Adresse",
+    columnPhone: "Telefon",
+    columnWebsite: "Website",
+    columnRating: "Bewertung",
+    columnEmail: "E-Mail",
+    columnOwner: "Inhaber",
+    columnQuery: "Suche",
+    
     // Messages
     connectedToBackend: "✅ Mit Backend-Server verbunden",
     disconnectedFromBackend: "⚠️ Verbindung zum Backend-Server getrennt",
@@ -0,0 +1,160 @@
+"""
+HTTP transports behind WebsiteScraperConfigurable.get_page_content
+
+'requests' (default) gives every business its own requests session: HTTP/1.1,
+one connection per concurrent request to a host. 'httpx' shares one client
+across all Stage 2 workers: HTTP/2 where the server offers it over TLS (many
+requests to a host multiplexed on one connection), a shared keep-alive pool
+otherwise, and gzip/brotli negotiated on both. It needs the optional packages:
+
+    pip install 'httpx[http2,brotli]'
+
+Both transports count bytes on the wire (before decompression) and opened
+connections in the metrics so they can be compared. With a proxy pool the
+httpx transport keeps one client (and connection pool) per proxy.
+"""
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from metrics import STAGE2_CONNECTIONS, STAGE2_RESPONSES, STAGE2_WIRE_BYTES
+
+TRANSPORTS = ('requests', 'httpx')
+
+# Error pages up to this size are read so their connection stays usable
+MAX_DRAIN_BYTES = 65536
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        STAGE2_CONNECTIONS.labels(transport='requests').inc()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        STAGE2_CONNECTIONS.labels(transport='requests').inc()
+        return super()._new_conn()
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """requests adapter that counts the connections its pools open"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._count_connections(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        self._count_connections(manager)
+        return manager
+
+    @staticmethod
+    def _count_connections(manager):
+        manager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+
+class HttpxTransport:
+    """One thread-safe httpx client shared by all Stage 2 workers"""
+
+    def __init__(self, user_agent, http2=True, max_connections=100):
+        """
+        Args:
+            user_agent: User-Agent header sent with every request
+            http2: Offer HTTP/2 during the TLS handshake
+            max_connections: Connections open (and kept alive) at once across all hosts
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ValueError("The httpx transport needs: pip install 'httpx[http2,brotli]'")
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ValueError("HTTP/2 needs: pip install 'httpx[http2,brotli]'")
+
+        self.httpx = httpx
+        self.user_agent = user_agent
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.lock = threading.Lock()
+        self.client = self._new_client()
+        # Clients per proxy URL, created on first use
+        self.proxy_clients = {}
+
+    def _new_client(self, proxy=None):
+        return self.httpx.Client(
+            http2=self.http2,
+            verify=False,
+            follow_redirects=True,
+            proxy=proxy,
+            headers={'User-Agent': self.user_agent, 'Accept-Encoding': self._accept_encoding()},
+            limits=self.httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=30
+            )
+        )
+
+    def _client_for(self, proxy):
+        if proxy is None:
+            return self.client
+        with self.lock:
+            client = self.proxy_clients.get(proxy)
+            if client is None:
+                client = self.proxy_clients[proxy] = self._new_client(proxy)
+            return client
+
+    @staticmethod
+    def _accept_encoding():
+        try:
+            import brotli  # noqa: F401
+            return 'gzip, deflate, br'
+        except ImportError:
+            return 'gzip, deflate'
+
+    @staticmethod
+    def _trace(event_name, info):
+        # httpcore reports each new TCP connection through the trace extension
+        if event_name == 'connection.connect_tcp.complete':
+            STAGE2_CONNECTIONS.labels(transport='httpx').inc()
+
+    def stream(self, url, timeout, proxy=None):
+        """Context manager yielding the streamed response of a GET request (through `proxy` if given)"""
+        return self._client_for(proxy).stream('GET', url, timeout=timeout, extensions={'trace': self._trace})
+
+    @staticmethod
+    def raise_for_status(response):
+        """Raise on 4xx/5xx, reading small error pages first so the connection can be reused"""
+        if response.is_error:
+            if int(response.headers.get('Content-Length') or MAX_DRAIN_BYTES + 1) <= MAX_DRAIN_BYTES:
+                response.read()
+            response.raise_for_status()
+
+    def is_http_error(self, error):
+        return isinstance(error, self.httpx.HTTPStatusError)
+
+    def is_timeout(self, error):
+        return isinstance(error, self.httpx.TimeoutException)
+
+    def is_connection_error(self, error):
+        return isinstance(error, self.httpx.TransportError)
+
+    @staticmethod
+    def record_response(response):
+        """Count a finished response in the metrics; returns its bytes on the wire"""
+        STAGE2_WIRE_BYTES.labels(transport='httpx').inc(response.num_bytes_downloaded)
+        STAGE2_RESPONSES.labels(http_version=response.http_version).inc()
+        return response.num_bytes_downloaded
+
+    def close(self):
+        self.client.close()
+        with self.lock:
+            clients, self.proxy_clients = list(self.proxy_clients.values()), {}
+        for client in clients:
+            client.close()
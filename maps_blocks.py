@@ -0,0 +1,165 @@
+"""
+Detection of Google's consent, captcha and throttling pages on Maps
+
+Instead of a Maps page Google sometimes serves its cookie consent wall, a
+"sorry / unusual traffic" captcha or a 429 page. MapMiner checks the page
+state with one script call whenever a search or the results list doesn't
+look as expected: the consent wall is accepted automatically, the other
+states raise MapsBlocked. Each browser has an AdaptiveThrottle that slows
+all of its waits down after a block, tells the caller how long to cool off
+and recovers after successful searches.
+
+A results feed that stays empty without a known "no results" message is
+ambiguous (another UI language or a layout change looks the same), so it
+is read again after a grace wait and, if still empty, only counted as an
+empty feed: no cool-off, no slowdown and no requeue.
+"""
+import threading
+import time
+from collections import deque
+
+from metrics import STAGE1_BLOCKS, STAGE1_EMPTY_FEEDS
+
+# Blocks that mean we're going too fast (consent is just a wall to click through)
+THROTTLE_KINDS = ('captcha', 'throttled')
+
+# Seconds to wait before reading an empty results page a second time
+EMPTY_FEED_GRACE = 5
+
+# Button labels of the consent wall's "accept all"
+CONSENT_ACCEPT_LABELS = ('alle akzeptieren', 'accept all', 'tout accepter', 'aceptar todo', 'accetta tutto')
+
+# One round trip for everything the classification needs
+PAGE_STATE_SCRIPT = """
+    var url = location.href;
+    var text = document.body ? document.body.innerText.slice(0, 5000).toLowerCase() : '';
+    var has = function (selector) { return !!document.querySelector(selector); };
+    return {
+        url: url,
+        title: document.title,
+        text: text.slice(0, 300),
+        consent: url.indexOf('consent.google.') !== -1 || has('form[action*="consent.google"]'),
+        captcha: url.indexOf('/sorry/') !== -1 || has('#captcha-form') || has('iframe[src*="recaptcha"]')
+            || text.indexOf('unusual traffic') !== -1 || text.indexOf('ungewöhnlichen datenverkehr') !== -1,
+        throttled: document.title.indexOf('429') !== -1 || text.indexOf('too many requests') !== -1,
+        feed: has('div[role="feed"]'),
+        cards: document.querySelectorAll('div.Nv2PK').length,
+        place: has('h1.DUwDvf'),
+        no_results: text.indexOf("google maps can't find") !== -1 || text.indexOf('keine ergebnisse') !== -1
+            || text.indexOf('google maps kann') !== -1
+    };
+"""
+
+ACCEPT_CONSENT_SCRIPT = """
+    var labels = arguments[0];
+    var buttons = document.querySelectorAll('button, input[type="submit"], div[role="button"]');
+    for (var i = 0; i < buttons.length; i++) {
+        var label = (buttons[i].innerText || buttons[i].value || buttons[i].getAttribute('aria-label') || '')
+            .trim().toLowerCase();
+        for (var j = 0; j < labels.length; j++) {
+            if (label.indexOf(labels[j]) === 0) { buttons[i].click(); return true; }
+        }
+    }
+    return false;
+"""
+
+
+class MapsBlocked(Exception):
+    """Raised when Google serves a block page instead of results; `results` holds what was saved before"""
+
+    def __init__(self, kind, message, results=None):
+        super().__init__(message)
+        self.kind = kind
+        self.results = results or []
+
+
+def classify_page(state, expect_results=False):
+    """
+    Block kind of a page state from PAGE_STATE_SCRIPT, or None if the page is fine
+
+    Args:
+        state: dict returned by PAGE_STATE_SCRIPT
+        expect_results: The page should show search results by now, so a
+            missing or empty feed (without a "no results" message) counts as 'empty'
+    """
+    if state.get('consent'):
+        return 'consent'
+    if state.get('captcha'):
+        return 'captcha'
+    if state.get('throttled'):
+        return 'throttled'
+    if expect_results and not state.get('place') and not state.get('no_results') and not state.get('cards'):
+        return 'empty'
+    return None
+
+
+def accept_consent(driver):
+    """Click the consent wall's "accept all" button; returns whether one was found"""
+    return bool(driver.execute_script(ACCEPT_CONSENT_SCRIPT, list(CONSENT_ACCEPT_LABELS)))
+
+
+class AdaptiveThrottle:
+    """Per-browser slowdown and cool-off after blocks, with a rolling count of block events"""
+
+    def __init__(self, max_slowdown=8.0, base_cooloff=120, max_cooloff=1800, recovery=0.8):
+        """
+        Args:
+            max_slowdown: Largest factor applied to the browser's waits
+            base_cooloff: Seconds to pause after the first block in a row; doubles per further block
+            max_cooloff: Longest pause
+            recovery: Factor the slowdown shrinks by after each successful search
+        """
+        self.max_slowdown = max_slowdown
+        self.base_cooloff = base_cooloff
+        self.max_cooloff = max_cooloff
+        self.recovery = recovery
+        self.slowdown = 1.0
+        self.consecutive = 0
+        self.counts = {}
+        self.empty_feeds = 0
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def record(self, kind):
+        """Count a block event; throttling kinds double the slowdown"""
+        STAGE1_BLOCKS.labels(kind=kind).inc()
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.events.append(time.time())
+            if kind in THROTTLE_KINDS:
+                self.consecutive += 1
+                self.slowdown = min(self.max_slowdown, self.slowdown * 2)
+
+    def record_empty(self):
+        """Count a results feed that stayed empty; not a block, so no slowdown or cool-off"""
+        STAGE1_EMPTY_FEEDS.inc()
+        with self.lock:
+            self.empty_feeds += 1
+
+    def cooloff(self):
+        """Seconds to pause before the next search after the latest blocks"""
+        with self.lock:
+            if not self.consecutive:
+                return 0
+            return min(self.max_cooloff, self.base_cooloff * 2 ** (self.consecutive - 1))
+
+    def success(self):
+        """A search went through: reset the cool-off and ease the slowdown"""
+        with self.lock:
+            self.consecutive = 0
+            self.slowdown = max(1.0, self.slowdown * self.recovery)
+
+    def blocks_last_hour(self):
+        with self.lock:
+            cutoff = time.time() - 3600
+            while self.events and self.events[0] < cutoff:
+                self.events.popleft()
+            return len(self.events)
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            empty_feeds = self.empty_feeds
+            slowdown = self.slowdown
+        return {'blocks': counts, 'blocks_last_hour': self.blocks_last_hour(), 'empty_feeds': empty_feeds,
+                'slowdown': round(slowdown, 2)}
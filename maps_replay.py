@@ -0,0 +1,326 @@
+"""
+Record and replay Google Maps pages for offline Stage 1 runs
+
+MapsRecorder is passed to MapMiner during a real run and saves the results
+feed of every search and the details panel of every clicked listing.
+MapsReplayServer serves those snapshots from a small local page that
+behaves like Maps where the scraper touches it: a search box, a results
+feed that loads more cards on scroll and a details panel that appears on
+click. Card links point to local place pages showing the same details, for
+MapMiner's detail_tabs mode. Point MapMiner at it with maps_url=server.url.
+
+Recording layout:
+
+    <dir>/index.json                 {"queries": {"Autohaus Berlin, Deutschland": "0001", ...}}
+    <dir>/0001/feed.html             outerHTML of div[role="feed"] after scrolling
+    <dir>/0001/details/0003.html     details panel after clicking card 3
+"""
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from bs4 import BeautifulSoup
+
+
+class MapsRecorder:
+    """Saves feed and details snapshots of a live run into a recording directory"""
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Recording directory (created if needed; existing recordings are extended)
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'index.json')
+        self.index = {'queries': {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def _query_dir(self, query):
+        with self.lock:
+            key = self.index['queries'].get(query)
+            if key is None:
+                key = f"{len(self.index['queries']) + 1:04d}"
+                self.index['queries'][query] = key
+                with open(self.index_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.index, f, indent=2, ensure_ascii=False)
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.join(path, 'details'), exist_ok=True)
+        return path
+
+    def record_feed(self, query, html):
+        with open(os.path.join(self._query_dir(query), 'feed.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    def record_details(self, query, index, html):
+        path = os.path.join(self._query_dir(query), 'details', f'{index:04d}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+
+class Recording:
+    """Read access to a recording directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json'), 'r', encoding='utf-8') as f:
+            self.queries = json.load(f)['queries']
+        self._cards = {}
+        self.lock = threading.Lock()
+
+    def cards(self, query):
+        """Listing cards (div.Nv2PK outerHTML) of a query in feed order"""
+        with self.lock:
+            cards = self._cards.get(query)
+            if cards is None:
+                cards = []
+                key = self.queries.get(query)
+                path = os.path.join(self.directory, key, 'feed.html') if key else None
+                if path and os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        soup = BeautifulSoup(f.read(), 'html.parser')
+                    cards = [str(card) for card in soup.select('div.Nv2PK')]
+                self._cards[query] = cards
+            return cards
+
+    def details(self, query, index):
+        """Details panel HTML for a card, or None if it wasn't recorded"""
+        key = self.queries.get(query)
+        if key is None:
+            return None
+        path = os.path.join(self.directory, key, 'details', f'{index:04d}.html')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+REPLAY_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Maps replay</title>
+<style>
+  body { margin: 0; display: flex; font-family: sans-serif; }
+  #side { width: 420px; height: 100vh; display: flex; flex-direction: column; }
+  #results { flex: 1; min-height: 0; }
+  div[role="feed"] { height: 100%; overflow-y: auto; }
+  .Nv2PK { display: block; min-height: 96px; border-bottom: 1px solid #ddd; cursor: pointer; position: relative; }
+  #details { flex: 1; height: 100vh; overflow: auto; }
+</style></head>
+<body>
+<div id="side">
+  <input id="searchboxinput" name="q" aria-label="Search Google Maps" placeholder="Search Google Maps">
+  <div id="results"></div>
+</div>
+<div id="details"></div>
+<script>
+  var query = null, offset = 0, total = null, loading = false;
+  var search = document.getElementById('searchboxinput');
+  var details = document.getElementById('details');
+  var feed = null;
+
+  function loadMore() {
+    if (loading || (total !== null && offset >= total)) { return; }
+    loading = true;
+    fetch('/replay/cards?q=' + encodeURIComponent(query) + '&offset=' + offset)
+      .then(function (r) { return r.json(); })
+      .then(function (data) {
+        total = data.total;
+        data.cards.forEach(function (card) {
+          var holder = document.createElement('div');
+          holder.innerHTML = card.html;
+          var element = holder.firstElementChild;
+          element.setAttribute('data-replay-index', card.index);
+          var link = element.querySelector('a.hfpxzc');
+          if (link) {
+            link.href = '/replay/place/' + card.index + '?q=' + encodeURIComponent(query);
+          }
+          feed.appendChild(element);
+        });
+        offset += data.cards.length;
+        loading = false;
+      });
+  }
+
+  search.addEventListener('keydown', function (event) {
+    if (event.key !== 'Enter') { return; }
+    query = search.value;
+    offset = 0;
+    total = null;
+    details.innerHTML = '';
+    var results = document.getElementById('results');
+    results.innerHTML = '<div role="feed" aria-label="Results"></div>';
+    feed = results.firstElementChild;
+    feed.addEventListener('scroll', function () {
+      if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 50) { loadMore(); }
+    });
+    feed.addEventListener('click', function (event) {
+      var card = event.target.closest('.Nv2PK');
+      if (!card) { return; }
+      event.preventDefault();
+      details.innerHTML = '';
+      fetch('/replay/details?q=' + encodeURIComponent(query) + '&i=' + card.getAttribute('data-replay-index'))
+        .then(function (r) { return r.ok ? r.text() : ''; })
+        .then(function (html) { details.innerHTML = html; });
+    });
+    loadMore();
+  });
+</script>
+</body></html>
+"""
+
+
+# Stand-alone place page opened from a card link
+PLACE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Maps replay place</title></head>
+<body><div role="main">{details}</div></body></html>
+"""
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server.replay
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        query = params.get('q', [''])[0]
+
+        if url.path in ('/', '/maps'):
+            self._send(200, 'text/html; charset=utf-8', REPLAY_PAGE.encode('utf-8'))
+        elif url.path == '/replay/cards':
+            time.sleep(server.feed_latency)
+            cards = server.recording.cards(query)
+            offset = int(params.get('offset', ['0'])[0])
+            batch = [
+                {'index': i, 'html': cards[i]}
+                for i in range(offset, min(len(cards), offset + server.card_batch))
+            ]
+            body = json.dumps({'total': len(cards), 'cards': batch}).encode('utf-8')
+            self._send(200, 'application/json', body)
+        elif url.path.startswith('/replay/place/'):
+            time.sleep(server.details_latency)
+            html = server.recording.details(query, int(url.path.rsplit('/', 1)[1]))
+            if html is None:
+                self._send(404, 'text/plain', b'not recorded')
+            else:
+                page = PLACE_PAGE.format(details=html)
+                self._send(200, 'text/html; charset=utf-8', page.encode('utf-8'))
+        elif url.path == '/replay/details':
+            time.sleep(server.details_latency)
+            html = server.recording.details(query, int(params.get('i', ['-1'])[0]))
+            if html is None:
+                self._send(404, 'text/plain', b'not recorded')
+            else:
+                self._send(200, 'text/html; charset=utf-8', html.encode('utf-8'))
+        else:
+            self._send(404, 'text/plain', b'not found')
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MapsReplayServer:
+    """
+    Local HTTP server replaying a recording to MapMiner
+
+    Cards are handed out `card_batch` at a time, the next batch when the feed
+    is scrolled to the bottom, like the live results list. The latency
+    settings add a fixed delay to feed and details requests to mimic the
+    network.
+    """
+
+    def __init__(self, recording_dir, port=0, card_batch=20, feed_latency=0.0, details_latency=0.0):
+        """
+        Args:
+            recording_dir: Directory written by MapsRecorder (or generate_synthetic_recording)
+            port: Port to listen on (0 = any free port)
+            card_batch: Cards loaded per scroll
+            feed_latency: Seconds added to each feed request
+            details_latency: Seconds added to each details request
+        """
+        self.recording = Recording(recording_dir)
+        self.card_batch = card_batch
+        self.feed_latency = feed_latency
+        self.details_latency = details_latency
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), _ReplayHandler)
+        self.server.daemon_threads = True
+        self.server.replay = self
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/maps'
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='maps-replay')
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def generate_synthetic_recording(directory, query, count, seed=42):
+    """
+    Write a recording with `count` fake listings using the Maps markup the scraper reads
+
+    Returns the expected rows (name, address, phone, website, rating, reviews)
+    so replays can be verified field by field.
+    """
+    rng = random.Random(seed)
+    recorder = MapsRecorder(directory)
+    streets = ['Hauptstraße', 'Bahnhofstraße', 'Gartenweg', 'Lindenallee', 'Kirchplatz']
+    kinds = ['Autohaus', 'Bäckerei', 'Zahnarzt', 'Friseur', 'Elektro']
+    expected = []
+    cards = []
+    for i in range(count):
+        name = f'{rng.choice(kinds)} {rng.choice(["Müller", "Schmidt", "Weber", "Koch"])} {i}'
+        row = {
+            'name': name,
+            'address': f'{rng.choice(streets)} {rng.randint(1, 120)}, 10115 Berlin',
+            'phone': f'030 {rng.randint(1000000, 9999999)}',
+            'website': f'https://firma-{i}.example/' if rng.random() < 0.8 else '',
+            'rating': f'{rng.uniform(3, 5):.1f}'.replace('.', ','),
+            'reviews': f'{rng.randint(1, 900)} Rezensionen'
+        }
+        expected.append(row)
+        cards.append(
+            f'<div class="Nv2PK THOPZb CpccDe"><a class="hfpxzc" aria-label="{name}" '
+            f'href="https://www.google.com/maps/place/{i}"></a>'
+            f'<div class="bfdHYd"><div class="qBF1Pd fontHeadlineSmall">{name}</div>'
+            f'<span class="MW4etd">{row["rating"]}</span></div></div>'
+        )
+        website = (
+            f'<a class="CsEnBe" data-item-id="authority" href="{row["website"]}">'
+            f'<div class="Io6YTe">{row["website"]}</div></a>'
+        ) if row['website'] else ''
+        recorder.record_details(query, i, (
+            f'<div role="main" aria-label="{name}"><div class="TIHn2"><h1 class="DUwDvf lfPIob">{name}</h1>'
+            f'<div class="F7nice"><span><span aria-hidden="true">{row["rating"]}</span></span>'
+            f'<span><span role="img" aria-label="{row["reviews"]}">({row["reviews"].split()[0]})</span></span></div></div>'
+            f'<div class="m6QErb"><button class="CsEnBe" data-item-id="address" aria-label="Adresse: {row["address"]}">'
+            f'<div class="Io6YTe">{row["address"]}</div></button>'
+            f'{website}'
+            f'<button class="CsEnBe" data-item-id="phone:tel:{row["phone"].replace(" ", "")}" '
+            f'aria-label="Telefon: {row["phone"]}"><div class="Io6YTe">{row["phone"]}</div></button></div></div>'
+        ))
+    recorder.record_feed(query, '<div role="feed" aria-label="Results">' + ''.join(
+        f'<div>{card}</div>' for card in cards
+    ) + '</div>')
+    return expected
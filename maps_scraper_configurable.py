@@ -9,25 +9,302 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.safari.options import Options as SafariOptions
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, InvalidSessionIdException, WebDriverException
+)
+from urllib3.exceptions import HTTPError as TransportError
+from bs4 import BeautifulSoup
 import random
+import re
+import subprocess
 import sys
+import threading
+from urllib.parse import quote
+from cancellation import CancellationToken, ScrapeCancelled
+from metrics import STAGE1_STEP_SECONDS, STAGE1_LISTINGS, STAGE1_TAB_LOAD_SECONDS, BROWSERS_OPEN
+from tracing import NullTracer
+from card_filters import CardFilter, CARD_SCRIPT, parse_card, parse_rating, parse_reviews
+from maps_blocks import (
+    EMPTY_FEED_GRACE, PAGE_STATE_SCRIPT, THROTTLE_KINDS, AdaptiveThrottle, MapsBlocked, accept_consent, classify_page
+)
+
+# WebDriver errors that mean the browser itself is gone or hung, not a missing element
+DRIVER_FAILURE_MARKERS = (
+    'timed out receiving message from renderer', 'session deleted', 'disconnected',
+    'no such window', 'invalid session id', 'not reachable', 'tab crashed'
+)
+
+
+class DriverUnresponsive(Exception):
+    """Raised when the browser stops answering; `results` holds what was saved before"""
+    
+    def __init__(self, message, results=None):
+        super().__init__(message)
+        self.results = results or []
+
+
+# Driver binaries found by Selenium Manager, per browser; resolving takes a
+# subprocess call (and a network check) on every launch otherwise
+_driver_paths = {}
+_driver_paths_lock = threading.Lock()
+DRIVER_PATH_VARIABLES = {'chrome': 'CHROMEDRIVER_PATH', 'edge': 'EDGEDRIVER_PATH'}
+
+
+def resolve_driver_path(browser, options):
+    """
+    Path of the WebDriver binary for Chrome or Edge, resolved once per process
+    
+    CHROMEDRIVER_PATH / EDGEDRIVER_PATH override the lookup. Returns None if
+    Selenium Manager can't resolve it; the driver then resolves it itself.
+    """
+    override = os.environ.get(DRIVER_PATH_VARIABLES.get(browser, ''))
+    if override:
+        return override
+    with _driver_paths_lock:
+        path = _driver_paths.get(browser)
+        if path and os.path.isfile(path):
+            return path
+        try:
+            from selenium.webdriver.common.selenium_manager import SeleniumManager
+            started = time.perf_counter()
+            path = SeleniumManager().driver_location(options)
+            print(f"✓ {browser.capitalize()} driver resolved in {time.perf_counter() - started:.1f}s: {path}")
+        except Exception as e:
+            print(f"⚠️ Driver lookup failed, leaving it to Selenium: {str(e)}")
+            return None
+        _driver_paths[browser] = path
+        return path
+
+
+def is_driver_failure(error):
+    """True if an exception means the WebDriver session is dead or hung"""
+    if isinstance(error, (TransportError, ConnectionError, TimeoutError, InvalidSessionIdException)):
+        return True
+    if isinstance(error, WebDriverException):
+        message = str(error).lower()
+        return any(marker in message for marker in DRIVER_FAILURE_MARKERS)
+    return False
+
+def set_command_timeout(driver, timeout):
+    """
+    Time out one driver's WebDriver HTTP calls after `timeout` seconds
+
+    RemoteConnection.set_timeout() is class-wide and would change the timeout
+    of every other job's, the warm pool's and the render pool's browsers, so
+    the timeout goes on this driver's own connection pool instead.
+    """
+    executor = driver.command_executor
+    client_config = getattr(executor, '_client_config', None)
+    if client_config is not None:
+        # Newer Selenium reads the timeout from the connection's ClientConfig
+        client_config.timeout = timeout
+    conn = getattr(executor, '_conn', None)
+    if conn is not None:
+        conn.connection_pool_kw['timeout'] = timeout
+        # Pools opened so far keep the old timeout; they reopen on the next call
+        conn.clear()
+
+def launch_driver(browser, headless=False, proxy=None):
+    """Start a Safari, Chrome or Edge browser for Maps (Chrome/Edge optionally behind `proxy`) and return its WebDriver"""
+    browser = browser.lower()
+    driver_initialized = False
+    last_error = None
+
+    print(f"Browser selected: {browser.capitalize()}")
+
+    # Try the selected browser
+    if browser == 'safari':
+        try:
+            safari_options = SafariOptions()
+            driver = webdriver.Safari(options=safari_options)
+            driver_initialized = True
+            print("✓ Safari browser initialized successfully")
+        except Exception as e:
+            last_error = e
+            print(f"⚠️ Safari initialization failed: {str(e)}")
+            print("Note: Enable Safari WebDriver in Safari > Develop > Allow Remote Automation")
+            print("Or run: safaridriver --enable")
+
+    elif browser == 'chrome':
+        try:
+            chrome_options = ChromeOptions()
+            chrome_options.add_argument('--no-sandbox')
+            chrome_options.add_argument('--disable-dev-shm-usage')
+            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            chrome_options.add_experimental_option('useAutomationExtension', False)
+            if headless:
+                chrome_options.add_argument('--headless=new')
+                chrome_options.add_argument('--window-size=1920,1080')
+            if proxy:
+                chrome_options.add_argument(f'--proxy-server={proxy}')
+
+            # Selenium Manager finds (or downloads) the matching ChromeDriver; resolved once per process
+            from selenium.webdriver.chrome.service import Service as ChromeService
+            service = ChromeService(executable_path=resolve_driver_path('chrome', chrome_options))
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver_initialized = True
+            print("✓ Chrome browser initialized successfully")
+        except Exception as e:
+            last_error = e
+            print(f"⚠️ Chrome initialization failed: {str(e)}")
+
+    elif browser == 'edge':
+        try:
+            from selenium.webdriver.edge.service import Service as EdgeService
+            edge_options = Options()
+
+            edge_binary_path = '/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge'
+            if os.path.exists(edge_binary_path):
+                edge_options.binary_location = edge_binary_path
+
+            edge_options.add_argument('--no-sandbox')
+            edge_options.add_argument('--disable-dev-shm-usage')
+            edge_options.add_argument('--disable-gpu')
+            edge_options.add_argument('--disable-blink-features=AutomationControlled')
+            edge_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            edge_options.add_experimental_option('useAutomationExtension', False)
+            if headless:
+                edge_options.add_argument('--headless=new')
+                edge_options.add_argument('--window-size=1920,1080')
+            if proxy:
+                edge_options.add_argument(f'--proxy-server={proxy}')
+
+            service = EdgeService(executable_path=resolve_driver_path('edge', edge_options))
+            driver = webdriver.Edge(service=service, options=edge_options)
+            driver_initialized = True
+            print("✓ Edge browser initialized successfully")
+        except Exception as e:
+            last_error = e
+            print(f"⚠️ Edge initialization failed: {str(e)}")
+
+    if not driver_initialized:
+        error_msg = (
+            f"Failed to initialize {browser.capitalize()} browser. Last error: {str(last_error)}\n\n"
+            f"Troubleshooting steps:\n"
+        )
+        if browser == 'safari':
+            error_msg += (
+                f"1. Enable Safari WebDriver: Safari > Develop > Allow Remote Automation\n"
+                f"2. Or run in Terminal: safaridriver --enable\n"
+                f"3. Try selecting a different browser (Chrome or Edge)\n"
+            )
+        elif browser == 'chrome':
+            error_msg += (
+                f"1. Ensure Google Chrome is installed\n"
+                f"2. Check your internet connection (ChromeDriver download may be blocked)\n"
+                f"3. Try selecting a different browser (Safari or Edge)\n"
+            )
+        else:  # edge
+            error_msg += (
+                f"1. Ensure Microsoft Edge is installed\n"
+                f"2. Check your internet connection (EdgeDriver download may be blocked)\n"
+                f"3. Try selecting a different browser (Safari or Chrome)\n"
+            )
+        raise RuntimeError(error_msg)
+
+    return driver
+
 
 class MapMiner:
-    def __init__(self, csv_filename='businesses.csv', browser='safari', delays=None, required_words=None, require_website=True):
+    # Details panel fields: (field, CSS selector, attribute or None for the text, label prefixes to strip)
+    DETAIL_FIELDS = [
+        ('name', 'h1.DUwDvf', None, ()),
+        ('address', 'button[data-item-id="address"]', 'aria-label', ('Adresse: ', 'Address: ')),
+        ('phone', 'button[data-item-id*="phone"]', 'aria-label', ('Telefon: ', 'Phone: ')),
+        ('website', 'a[data-item-id="authority"]', 'href', ()),
+        ('rating', 'div.F7nice span[aria-hidden="true"]', None, ()),
+        ('reviews', 'div.F7nice span[aria-label*="reviews"], div.F7nice span[aria-label*="Rezensionen"]', 'aria-label', ())
+    ]
+    
+    # One WebDriver round trip for all fields (used by the 'script' strategy)
+    EXTRACT_SCRIPT = """
+        var fields = arguments[0], out = {};
+        fields.forEach(function (field) {
+            var el = document.querySelector(field[1]);
+            if (el) { out[field[0]] = field[2] ? el.getAttribute(field[2]) : el.innerText; }
+        });
+        return out;
+    """
+    
+    EXTRACTION_STRATEGIES = ('find_element', 'script', 'page_source')
+    
+    # Details tabs: the flag marks the previous page as stale until the new document replaces it
+    OPEN_PLACE_SCRIPT = "window.__mapminerStale = true; window.location.href = arguments[0];"
+    PLACE_READY_SCRIPT = """
+        return !window.__mapminerStale && document.readyState === 'complete'
+            && !!document.querySelector('h1.DUwDvf');
+    """
+    
+    # Feature id in a place link (".../data=!4m7!3m6!1s0x47a8...:0x8e1b...!8m2...")
+    PLACE_ID_PATTERN = re.compile(r'!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)')
+    # Listing outcomes after which a place is not opened again by an overlapping search
+    SETTLED_OUTCOMES = ('saved', 'duplicate', 'filtered', 'skipped_no_website')
+    
+    def __init__(self, csv_filename='businesses.csv', browser='safari', delays=None, required_words=None, require_website=True,
+                 store=None, cancel_token=None, tracer=None, headless=False, maps_url=None,
+                 extraction_strategy='find_element', recorder=None, sleep_scale=1.0, card_filter=None,
+                 command_timeout=60, browser_pool=None, throttle=None, proxy_pool=None, detail_tabs=1):
         """
         Initialize the scraper with browser options
         
         Args:
-            csv_filename: Path to CSV file for output
+            csv_filename: Path to CSV file for output (used when no store is given)
             browser: Browser to use ('safari', 'chrome', or 'edge')
             delays: Dictionary with delay configurations
             required_words: List of words that must be in company name (case-insensitive)
             require_website: Only save entries that have a website (default: True)
+            store: Optional ResultStore used as the output sink instead of the CSV file
+            cancel_token: Optional CancellationToken; cancelling it interrupts waits
+                and quits the browser
+            tracer: Optional Tracer that records a span tree per listing
+            headless: Run Chrome/Edge without a window (Safari has no headless mode)
+            maps_url: Start page (default: Google Maps; a MapsReplayServer URL for offline runs)
+            extraction_strategy: How details are read after a click: 'find_element'
+                (one WebDriver call per field), 'script' (one execute_script for all
+                fields) or 'page_source' (parse the page HTML locally)
+            recorder: Optional MapsRecorder that snapshots the feed and details panels
+            sleep_scale: Factor applied to every wait (e.g. 0.05 against a local replay)
+            card_filter: Optional CardFilter checked on the card preview before clicking
+                (default: one built from required_words)
+            command_timeout: Seconds before a WebDriver call, page load or script
+                is abandoned as hung (default: 60)
+            browser_pool: Optional WarmBrowserPool; a browser already launched there
+                is used instead of starting one (also on restart)
+            throttle: AdaptiveThrottle that slows this browser down after blocks
+                (default: one with standard settings)
+            proxy_pool: Optional ProxyPool; the browser (Chrome/Edge) keeps one
+                proxy until it fails or is ejected
+            detail_tabs: Place pages loaded at once in tabs of this browser
+                (default: 1, click each card in the results list instead)
         """
+        if extraction_strategy not in self.EXTRACTION_STRATEGIES:
+            raise ValueError(f"Unknown extraction strategy: {extraction_strategy}")
+        
         self.csv_filename = csv_filename
+        self.store = store
+        self.tracer = tracer or NullTracer()
+        self.current_query = None
+        # Query recorded with saved businesses (set per work unit; default: the search text)
+        self.query_label = None
+        # Places already handled by this scraper, so overlapping searches don't click them twice
+        self.seen_places = set()
+        self.cancel_token = None
+        self._cancel_handle = None
+        self._close_lock = threading.Lock()
+        self._closed = False
         self.required_words = required_words or []
+        self.card_filter = card_filter or CardFilter(required_words=self.required_words)
         self.require_website = require_website
+        self.headless = headless
+        self.maps_url = maps_url or 'https://www.google.com/maps'
+        self.extraction_strategy = extraction_strategy
+        self.recorder = recorder
+        self.sleep_scale = sleep_scale
+        self.throttle = throttle or AdaptiveThrottle()
+        self.detail_tabs = max(1, int(detail_tabs))
+        # Per details tab: [pages loaded, seconds spent loading]
+        self.tab_timing = {}
         self.browser = browser.lower()
         self.delays = delays or {
             'delay_min': 2,
@@ -38,107 +315,136 @@ class MapMiner:
             'click_delay_max': 7
         }
         
-        driver_initialized = False
-        last_error = None
+        self.command_timeout = command_timeout
+        self.browser_pool = browser_pool
+        self.proxy_pool = proxy_pool
+        self.proxy = None
+        # Proxy to move away from on the next (re)start, after it failed or got blocked
+        self._avoid_proxy = None
+        # Whether the current browser came from the warm pool, and how long getting it took
+        self.warm_start = False
+        self.startup_seconds = None
+        self.driver = self._create_driver()
+        BROWSERS_OPEN.inc()
+        self.set_cancel_token(cancel_token or CancellationToken())
+        self._configure_driver()
+        self.csv_headers = ['name', 'address', 'phone', 'website', 'rating', 'reviews', 'email', 'owner', 'query']
+        if self.store is None:
+            self._initialize_csv()
         
-        print(f"Browser selected: {self.browser.capitalize()}")
+    def _create_driver(self):
+        """Take a warm browser from the pool or start the selected one; returns its WebDriver"""
+        started = time.perf_counter()
         
-        # Try the selected browser
-        if self.browser == 'safari':
-            try:
-                safari_options = SafariOptions()
-                self.driver = webdriver.Safari(options=safari_options)
-                driver_initialized = True
-                print("✓ Safari browser initialized successfully")
-            except Exception as e:
-                last_error = e
-                print(f"⚠️ Safari initialization failed: {str(e)}")
-                print("Note: Enable Safari WebDriver in Safari > Develop > Allow Remote Automation")
-                print("Or run: safaridriver --enable")
-        
-        elif self.browser == 'chrome':
-            try:
-                chrome_options = ChromeOptions()
-                chrome_options.add_argument('--no-sandbox')
-                chrome_options.add_argument('--disable-dev-shm-usage')
-                chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-                chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                chrome_options.add_experimental_option('useAutomationExtension', False)
-                
-                # Let Selenium Manager download the correct ChromeDriver automatically
-                self.driver = webdriver.Chrome(options=chrome_options)
-                driver_initialized = True
-                print("✓ Chrome browser initialized successfully")
-            except Exception as e:
-                last_error = e
-                print(f"⚠️ Chrome initialization failed: {str(e)}")
-        
-        elif self.browser == 'edge':
-            try:
-                from selenium.webdriver.edge.service import Service as EdgeService
-                edge_options = Options()
-                
-                edge_binary_path = '/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge'
-                if os.path.exists(edge_binary_path):
-                    edge_options.binary_location = edge_binary_path
-                
-                edge_options.add_argument('--no-sandbox')
-                edge_options.add_argument('--disable-dev-shm-usage')
-                edge_options.add_argument('--disable-gpu')
-                edge_options.add_argument('--disable-blink-features=AutomationControlled')
-                edge_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                edge_options.add_experimental_option('useAutomationExtension', False)
-                
-                service = EdgeService()
-                self.driver = webdriver.Edge(service=service, options=edge_options)
-                driver_initialized = True
-                print("✓ Edge browser initialized successfully")
-            except Exception as e:
-                last_error = e
-                print(f"⚠️ Edge initialization failed: {str(e)}")
-        
-        if not driver_initialized:
-            error_msg = (
-                f"Failed to initialize {self.browser.capitalize()} browser. Last error: {str(last_error)}\n\n"
-                f"Troubleshooting steps:\n"
-            )
+        proxy = None
+        if self.proxy_pool is not None:
             if self.browser == 'safari':
-                error_msg += (
-                    f"1. Enable Safari WebDriver: Safari > Develop > Allow Remote Automation\n"
-                    f"2. Or run in Terminal: safaridriver --enable\n"
-                    f"3. Try selecting a different browser (Chrome or Edge)\n"
-                )
-            elif self.browser == 'chrome':
-                error_msg += (
-                    f"1. Ensure Google Chrome is installed\n"
-                    f"2. Check your internet connection (ChromeDriver download may be blocked)\n"
-                    f"3. Try selecting a different browser (Safari or Edge)\n"
-                )
-            else:  # edge
-                error_msg += (
-                    f"1. Ensure Microsoft Edge is installed\n"
-                    f"2. Check your internet connection (EdgeDriver download may be blocked)\n"
-                    f"3. Try selecting a different browser (Safari or Chrome)\n"
-                )
-            raise RuntimeError(error_msg)
+                print("⚠️ Safari uses the system proxy settings; proxy pool ignored for Maps")
+            else:
+                self.proxy = self.proxy_pool.assign(id(self), avoid=self._avoid_proxy)
+                self._avoid_proxy = None
+                proxy = self.proxy.server
+                print(f"🔌 Maps browser using proxy {self.proxy.label}")
         
-        self.driver.maximize_window()
+        # Pooled browsers connect directly, so a proxied one is always launched
+        driver = self.browser_pool.acquire(self.browser, self.headless) if self.browser_pool and not proxy else None
+        self.warm_start = driver is not None
+        if driver is None:
+            driver = launch_driver(self.browser, self.headless, proxy=proxy)
+        self.startup_seconds = time.perf_counter() - started
+        return driver
+
+
+    def _configure_driver(self):
+        """Window size, page/script/command timeouts and the default wait of a fresh driver"""
+        # Every WebDriver HTTP call times out instead of hanging on a stuck browser
+        set_command_timeout(self.driver, self.command_timeout)
+        if not self.headless:
+            self.driver.maximize_window()
+        self.driver.set_page_load_timeout(self.command_timeout)
+        self.driver.set_script_timeout(self.command_timeout)
         self.wait = WebDriverWait(self.driver, 10)
-        self.csv_headers = ['name', 'address', 'phone', 'website', 'rating', 'reviews', 'email', 'owner']
-        self._initialize_csv()
+    
+    def restart(self):
+        """
+        Quit the browser and start a fresh one, e.g. after a hang or to free memory
         
+        Job state (seen places, store, query) is kept. Raises ScrapeCancelled if
+        the scraper was closed meanwhile.
+        """
+        with self._close_lock:
+            if self._closed:
+                raise ScrapeCancelled(self.cancel_token.reason)
+            old_driver = self.driver
+        self._quit_driver(old_driver)
+        driver = self._create_driver()
+        with self._close_lock:
+            closed = self._closed
+            if not closed:
+                self.driver = driver
+        if closed:
+            self._quit_driver(driver)
+            raise ScrapeCancelled(self.cancel_token.reason)
+        self._configure_driver()
+    
+    def _quit_driver(self, driver):
+        """Quit a driver, killing its service process if quitting fails"""
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"⚠️ Browser did not quit cleanly: {str(e)}")
+            process = getattr(getattr(driver, 'service', None), 'process', None)
+            if process is not None:
+                try:
+                    process.kill()
+                except Exception:
+                    pass
+    
+    def driver_rss_mb(self):
+        """Resident memory of the driver and browser processes in MB, or None if unavailable"""
+        process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        if process is None:
+            return None
+        try:
+            output = subprocess.run(
+                ['ps', '-A', '-o', 'pid=,ppid=,rss='], capture_output=True, text=True, timeout=5
+            ).stdout
+        except Exception:
+            return None
+        children, rss = {}, {}
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) != 3:
+                continue
+            pid, ppid, kilobytes = (int(part) for part in parts)
+            children.setdefault(ppid, []).append(pid)
+            rss[pid] = kilobytes
+        total, stack = 0, [process.pid]
+        while stack:
+            pid = stack.pop()
+            total += rss.get(pid, 0)
+            stack.extend(children.get(pid, []))
+        return total / 1024
+    
     def search_location(self, query):
         """Search for a specific query on Google Maps"""
         print(f"Searching for: {query}")
+        self.cancel_token.raise_if_cancelled()
+        self.current_query = query
+        started = time.perf_counter()
         try:
             print("Step 1: Loading Google Maps...")
-            self.driver.get("https://www.google.com/maps")
+            self._load(self.maps_url)
             print("Step 2: Waiting for page load...")
-            time.sleep(random.uniform(3, 6))
+            self._sleep(random.uniform(3, 6))
             
             print("Step 3: Checking page ready state...")
             # Wait for page to fully load
             self.wait.until(lambda d: d.execute_script('return document.readyState') == 'complete')
+            if self.check_blocks() == 'consent':
+                self._load(self.maps_url)
+                self.wait.until(lambda d: d.execute_script('return document.readyState') == 'complete')
+                self.check_blocks()
             print("✓ Page loaded")
             
             print("Step 4: Looking for search box...")
@@ -165,6 +471,7 @@ class MapMiner:
                     continue
             
             if not search_box:
+                self.check_blocks()
                 # Take a screenshot for debugging
                 screenshot_path = "/tmp/google_maps_debug.png"
                 self.driver.save_screenshot(screenshot_path)
@@ -173,52 +480,131 @@ class MapMiner:
             
             print("Step 5: Clearing search box...")
             search_box.clear()
-            time.sleep(0.5)
+            self._sleep(0.5)
             
             print(f"Step 6: Typing query: {query}")
             search_box.send_keys(query)
-            time.sleep(0.5)
+            self._sleep(0.5)
             
             print("Step 7: Pressing ENTER...")
             search_box.send_keys(Keys.ENTER)
             
             print("Step 8: Waiting for results...")
-            time.sleep(random.uniform(4, 7))
+            self._sleep(random.uniform(4, 7))
             print("✓ Search completed")
+        except (ScrapeCancelled, MapsBlocked):
+            raise
         except Exception as e:
             print(f"❌ Error during search at current step: {str(e)}")
             import traceback
             traceback.print_exc()
             raise
+        finally:
+            STAGE1_STEP_SECONDS.labels(step='search').observe(time.perf_counter() - started)
+    
+    def search_area(self, search_term, lat, lng, zoom):
+        """Search within a map viewport by opening the search URL centred on lat/lng"""
+        query = f"{search_term} @{lat:.5f},{lng:.5f},{zoom}z"
+        print(f"Searching area: {query}")
+        self.cancel_token.raise_if_cancelled()
+        self.current_query = query
+        started = time.perf_counter()
+        try:
+            self._load(
+                f"{self.maps_url.rstrip('/')}/search/{quote(search_term)}/@{lat:.6f},{lng:.6f},{zoom}z"
+            )
+            self.wait.until(lambda d: d.execute_script('return document.readyState') == 'complete')
+            if self.check_blocks() == 'consent':
+                self._load(
+                    f"{self.maps_url.rstrip('/')}/search/{quote(search_term)}/@{lat:.6f},{lng:.6f},{zoom}z"
+                )
+                self.wait.until(lambda d: d.execute_script('return document.readyState') == 'complete')
+                self.check_blocks()
+            self._sleep(random.uniform(4, 7))
+            print("✓ Area search completed")
+        except (ScrapeCancelled, MapsBlocked):
+            raise
+        except Exception as e:
+            print(f"❌ Error during area search: {str(e)}")
+            raise
+        finally:
+            STAGE1_STEP_SECONDS.labels(step='search').observe(time.perf_counter() - started)
+        
+    def scroll_results(self, max_scrolls=10, until_end=False):
+        """
+        Scroll through the results panel to load more listings
         
-    def scroll_results(self, max_scrolls=10):
-        """Scroll through the results panel to load more listings"""
+        With until_end, scrolling stops early once Maps shows its end-of-list
+        marker or two scrolls in a row load no new cards.
+        
+        Returns:
+            dict with the number of loaded 'cards' and whether the list 'reached_end'
+        """
         print("Scrolling through results...")
+        started = time.perf_counter()
+        stats = {'cards': 0, 'reached_end': False}
         
         try:
             # Wait for results to load
-            time.sleep(2)
-            scrollable_div = self.wait.until(
-                EC.presence_of_element_located((By.XPATH, '//div[@role="feed"]'))
-            )
+            self._sleep(2)
+            try:
+                scrollable_div = self.wait.until(
+                    EC.presence_of_element_located((By.XPATH, '//div[@role="feed"]'))
+                )
+            except TimeoutException:
+                # No feed: a block page, a single place or no results at all
+                self.check_blocks(expect_results=True)
+                raise
             
+            unchanged = 0
             for i in range(max_scrolls):
+                self.cancel_token.raise_if_cancelled()
                 try:
                     self.driver.execute_script(
                         'arguments[0].scrollTo(0, arguments[0].scrollHeight)', 
                         scrollable_div
                     )
-                    time.sleep(random.uniform(
+                    self._sleep(random.uniform(
                         self.delays['scroll_delay_min'],
                         self.delays['scroll_delay_max']
                     ))
                     print(f"Scroll {i+1}/{max_scrolls}")
+                    if until_end:
+                        cards, reached_end = self.driver.execute_script(
+                            "return [arguments[0].querySelectorAll('div.Nv2PK').length, "
+                            "!!document.querySelector('span.HlvSq')];",
+                            scrollable_div
+                        )
+                        unchanged = unchanged + 1 if cards == stats['cards'] else 0
+                        stats['cards'] = cards
+                        if reached_end or unchanged >= 2:
+                            stats['reached_end'] = True
+                            break
+                except (ScrapeCancelled, DriverUnresponsive, MapsBlocked):
+                    raise
                 except Exception as scroll_error:
+                    self._raise_if_driver_failed(scroll_error)
                     print(f"Error on scroll {i+1}: {scroll_error}")
                     break
+            
+            if not until_end:
+                stats['cards'] = len(scrollable_div.find_elements(By.CSS_SELECTOR, 'div.Nv2PK'))
+            
+            if self.recorder is not None:
+                self.recorder.record_feed(
+                    self.current_query,
+                    self.driver.execute_script('return arguments[0].outerHTML', scrollable_div)
+                )
                 
+        except (ScrapeCancelled, DriverUnresponsive, MapsBlocked):
+            raise
         except Exception as e:
+            self._raise_if_driver_failed(e)
             print(f"Error while scrolling: {e}")
+        finally:
+            STAGE1_STEP_SECONDS.labels(step='scroll').observe(time.perf_counter() - started)
+        
+        return stats
     
     def extract_business_info(self, element):
         """Extract information from a single business listing"""
@@ -233,92 +619,135 @@ class MapMiner:
             'owner': ''
         }
         
+        extract_started = None
         try:
             # Scroll element into view first
+            click_started = time.perf_counter()
             self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-            time.sleep(0.5)
+            self._sleep(0.5)
             
             element.click()
-            time.sleep(random.uniform(
+            self._sleep(random.uniform(
                 self.delays['click_delay_min'],
                 self.delays['click_delay_max']
             ))
             
             # Wait for details panel to load
-            time.sleep(1)
+            self._sleep(1)
+            extract_started = time.perf_counter()
+            STAGE1_STEP_SECONDS.labels(step='click').observe(extract_started - click_started)
+            self.tracer.record('click', extract_started - click_started)
             
-            # Extract name
+            # Wait for the details panel of the clicked listing
+            name_elem = None
             try:
                 name_elem = WebDriverWait(self.driver, 5).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, 'h1.DUwDvf'))
                 )
-                data['name'] = name_elem.text
             except TimeoutException:
                 print("  ⚠️ Could not find business name")
             except Exception as e:
                 print(f"  ⚠️ Error extracting name: {e}")
             
-            # Extract address
-            try:
-                address_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    'button[data-item-id="address"]'
-                )
-                data['address'] = address_elem.get_attribute('aria-label').replace('Adresse: ', '').replace('Address: ', '')
-            except:
-                pass
-            
-            # Extract phone
-            try:
-                phone_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    'button[data-item-id*="phone"]'
-                )
-                data['phone'] = phone_elem.get_attribute('aria-label').replace('Telefon: ', '').replace('Phone: ', '')
-            except:
-                pass
-            
-            # Extract website
-            try:
-                website_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    'a[data-item-id="authority"]'
-                )
-                data['website'] = website_elem.get_attribute('href')
-            except:
-                pass
-            
-            # Extract rating
-            try:
-                rating_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    'div.F7nice span[aria-hidden="true"]'
-                )
-                data['rating'] = rating_elem.text
-            except:
-                pass
+            if self.recorder is not None:
+                self._record_details(element)
             
-            # Extract number of reviews
-            try:
-                reviews_elem = self.driver.find_element(
-                    By.CSS_SELECTOR, 
-                    'div.F7nice span[aria-label*="reviews"], div.F7nice span[aria-label*="Rezensionen"]'
-                )
-                data['reviews'] = reviews_elem.get_attribute('aria-label')
-            except:
-                pass
+            self._extract_details(data, name_elem)
                 
+        except (ScrapeCancelled, DriverUnresponsive, MapsBlocked):
+            raise
         except Exception as e:
+            self._raise_if_driver_failed(e)
             print(f"Error extracting business info: {e}")
+        finally:
+            if extract_started is not None:
+                extract_seconds = time.perf_counter() - extract_started
+                STAGE1_STEP_SECONDS.labels(step='extract').observe(extract_seconds)
+                self.tracer.record('extract', extract_seconds)
         
         return data
     
+    def _extract_details(self, data, name_elem):
+        """Read the shown details panel into `data` with the configured strategy"""
+        if self.extraction_strategy == 'script':
+            self._extract_with_script(data)
+        elif self.extraction_strategy == 'page_source':
+            self._extract_with_page_source(data)
+        else:
+            self._extract_with_find_element(data, name_elem)
+    
+    def _clean_field(self, value, prefixes):
+        """Strip label prefixes such as 'Adresse: ' from an extracted value"""
+        if not value:
+            return ''
+        for prefix in prefixes:
+            value = value.replace(prefix, '')
+        return value
+    
+    def _extract_with_find_element(self, data, name_elem):
+        """One WebDriver round trip per field"""
+        if name_elem is not None:
+            try:
+                data['name'] = name_elem.text
+            except Exception as e:
+                print(f"  ⚠️ Error extracting name: {e}")
+        
+        for field, selector, attribute, prefixes in self.DETAIL_FIELDS[1:]:
+            try:
+                elem = self.driver.find_element(By.CSS_SELECTOR, selector)
+                value = elem.get_attribute(attribute) if attribute else elem.text
+                data[field] = self._clean_field(value, prefixes)
+            except:
+                pass
+    
+    def _extract_with_script(self, data):
+        """All fields in a single execute_script call"""
+        fields = [[field, selector, attribute] for field, selector, attribute, _ in self.DETAIL_FIELDS]
+        try:
+            values = self.driver.execute_script(self.EXTRACT_SCRIPT, fields) or {}
+        except Exception as e:
+            print(f"  ⚠️ Error extracting details: {e}")
+            return
+        for field, _, _, prefixes in self.DETAIL_FIELDS:
+            if values.get(field):
+                data[field] = self._clean_field(values[field], prefixes)
+    
+    def _extract_with_page_source(self, data):
+        """Fetch the page HTML once and read the fields locally with BeautifulSoup"""
+        try:
+            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+        except Exception as e:
+            print(f"  ⚠️ Error reading page source: {e}")
+            return
+        for field, selector, attribute, prefixes in self.DETAIL_FIELDS:
+            elem = soup.select_one(selector)
+            if elem is None:
+                continue
+            value = elem.get(attribute) if attribute else elem.get_text().strip()
+            data[field] = self._clean_field(value, prefixes)
+    
+    def _record_details(self, element):
+        """Snapshot the details panel of the clicked listing for later replay"""
+        try:
+            index, html = self.driver.execute_script(
+                """
+                var index = Array.prototype.indexOf.call(document.querySelectorAll('div.Nv2PK'), arguments[0]);
+                var name = document.querySelector('h1.DUwDvf');
+                var panel = (name && name.closest('div[role="main"]')) || document.body;
+                return [index, panel.outerHTML];
+                """,
+                element
+            )
+            self.recorder.record_details(self.current_query, index, html)
+        except Exception as e:
+            print(f"  ⚠️ Could not record details panel: {e}")
+    
     def scrape_listings(self, max_results=100):
         """Scrape listings until we have max_results that match all filters"""
         results = []
         
         try:
-            time.sleep(random.uniform(4, 8))
+            self._sleep(random.uniform(4, 8))
             
             # Wait for listings to be present
             try:
@@ -326,6 +755,7 @@ class MapMiner:
                     EC.presence_of_element_located((By.CSS_SELECTOR, 'div.Nv2PK'))
                 )
             except TimeoutException:
+                self.check_blocks(expect_results=True)
                 print("⚠️ No listings found on page")
                 return results
             
@@ -337,66 +767,308 @@ class MapMiner:
             print(f"Found {len(listings)} listings on page")
             print(f"Target: {max_results} matching results")
             
-            # Process listings until we have enough matching results or run out of listings
-            processed = 0
-            skipped_early = 0
-            for idx, listing in enumerate(listings):
-                # Stop if we have enough matching results
-                if len(results) >= max_results:
-                    print(f"✓ Reached target of {max_results} matching results")
-                    break
-                
-                processed += 1
-                
-                try:
-                    # Check if element is still valid
-                    if not listing.is_displayed():
-                        print(f"  ⚠️ Listing not visible, skipping")
-                        continue
-                    
-                    # OPTIMIZATION: Check name in preview BEFORE clicking to save time
-                    preview_name = self._get_listing_name_preview(listing)
-                    if preview_name and self.required_words:
-                        if not self._matches_required_words(preview_name):
-                            skipped_early += 1
-                            print(f"[{processed}/{len(listings)}] ⊘ {preview_name} - SKIPPED (doesn't match required words)")
-                            continue
-                    
-                    print(f"[{processed}/{len(listings)}] Processing (saved: {len(results)}/{max_results})")
-                    
-                    data = self.extract_business_info(listing)
-                    if data['name']:
-                        if self.require_website and not data['website']:
-                            print(f"  ⊘ {data['name']} - SKIPPED (no website)")
-                        elif self.save_business(data):
-                            results.append(data)
-                            print(f"  ✓ {data['name']} - SAVED ({len(results)}/{max_results})")
-                        else:
-                            print(f"  ✗ Failed to save: {data['name']}")
-                    else:
-                        print(f"  ⚠️ No name found for listing")
-                    
-                    time.sleep(random.uniform(
-                        self.delays['delay_min'],
-                        self.delays['delay_max']
-                    ))
-                    
-                except Exception as e:
-                    print(f"  ✗ Error processing listing: {e}")
-                    # Continue with next listing instead of crashing
-                    continue
+            # Recordings need the clicked card, so they always use click mode
+            if self.detail_tabs > 1 and self.recorder is None:
+                processed, skipped_early = self._scrape_in_tabs(listings, results, max_results)
+            else:
+                processed, skipped_early = self._scrape_by_clicking(listings, results, max_results)
             
             if len(results) < max_results:
                 print(f"⚠️ Only found {len(results)}/{max_results} matching results")
                 print(f"   Processed: {processed} listings | Skipped early: {skipped_early} | Clicked: {processed - skipped_early}")
                     
+        except ScrapeCancelled:
+            raise
+        except (DriverUnresponsive, MapsBlocked) as e:
+            e.results = results
+            raise
         except Exception as e:
+            if is_driver_failure(e):
+                self.cancel_token.raise_if_cancelled()
+                raise DriverUnresponsive(str(e), results) from e
             print(f"Error scraping listings: {e}")
             import traceback
             traceback.print_exc()
         
         return results
     
+    def _scrape_by_clicking(self, listings, results, max_results):
+        """Click the listings one by one in the results list; returns (processed, skipped_early)"""
+        # Process listings until we have enough matching results or run out of listings
+        processed = 0
+        skipped_early = 0
+        for idx, listing in enumerate(listings):
+            self.cancel_token.raise_if_cancelled()
+            
+            # Stop if we have enough matching results
+            if len(results) >= max_results:
+                print(f"✓ Reached target of {max_results} matching results")
+                break
+            
+            processed += 1
+            
+            with self.tracer.span('listing', query=self.current_query, position=processed) as span:
+                outcome = self._process_listing(listing, processed, len(listings), results, max_results)
+                span.set(outcome=outcome)
+            STAGE1_LISTINGS.labels(outcome=outcome).inc()
+            if outcome in ('skipped_preview', 'duplicate_place'):
+                skipped_early += 1
+        return processed, skipped_early
+    
+    def _scrape_in_tabs(self, listings, results, max_results):
+        """
+        Load the listings' place pages in parallel tabs; returns (processed, skipped_early)
+        
+        The place URLs come from the cards' links (a.hfpxzc). Up to
+        detail_tabs pages load at once in tabs of this browser, the results
+        list stays untouched in its own tab, and whichever tab shows its
+        details first is extracted and handed the next place.
+        """
+        main = self.driver.current_window_handle
+        counts = {'processed': 0, 'skipped_early': 0}
+        candidates = self._tab_candidates(listings, main, counts)
+        tabs = []
+        # Tab handle -> (position, url, place ID, load started)
+        loading = {}
+        started = time.perf_counter()
+        extracted = 0
+        try:
+            for _ in range(self.detail_tabs):
+                self.driver.switch_to.new_window('tab')
+                tabs.append(self.driver.current_window_handle)
+            idle = list(tabs)
+            exhausted = False
+            
+            while True:
+                self.cancel_token.raise_if_cancelled()
+                # Hand idle tabs the next places, but no more than could still be saved
+                while idle and not exhausted and len(results) + len(loading) < max_results:
+                    candidate = next(candidates, None)
+                    if candidate is None:
+                        exhausted = True
+                        break
+                    handle = idle.pop()
+                    self.driver.switch_to.window(handle)
+                    self.driver.execute_script(self.OPEN_PLACE_SCRIPT, candidate[1])
+                    loading[handle] = (*candidate, time.perf_counter())
+                    # Keep the usual pacing between listings, spread over the tabs
+                    self._sleep(random.uniform(
+                        self.delays['delay_min'],
+                        self.delays['delay_max']
+                    ) / self.detail_tabs)
+                if not loading:
+                    break
+                
+                handle, ready = self._wait_for_tab(loading)
+                position, url, place_id, load_started = loading.pop(handle)
+                load_seconds = time.perf_counter() - load_started
+                tab = tabs.index(handle) + 1
+                timing = self.tab_timing.setdefault(tab, [0, 0.0])
+                timing[0] += 1
+                timing[1] += load_seconds
+                STAGE1_TAB_LOAD_SECONDS.labels(tabs=str(self.detail_tabs)).observe(load_seconds)
+                
+                with self.tracer.span('listing', query=self.current_query, position=position, tab=tab) as span:
+                    self.tracer.record('tab_load', load_seconds)
+                    outcome = self._extract_tab(handle, url, place_id, ready, position, len(listings), results,
+                                                max_results)
+                    span.set(outcome=outcome)
+                STAGE1_LISTINGS.labels(outcome=outcome).inc()
+                extracted += 1
+                idle.append(handle)
+            
+            if len(results) >= max_results:
+                print(f"✓ Reached target of {max_results} matching results")
+            elapsed = time.perf_counter() - started
+            per_tab = ', '.join(
+                f"#{tab} {loads}× {seconds / loads:.1f}s" for tab, (loads, seconds) in sorted(self.tab_timing.items())
+            )
+            print(f"🗂️ {extracted} places in {elapsed:.1f}s with {self.detail_tabs} tabs "
+                  f"({extracted / elapsed * 60 if elapsed else 0:.0f}/min) | avg load per tab: {per_tab}")
+        finally:
+            self._close_tabs(tabs, main)
+        return counts['processed'], counts['skipped_early']
+    
+    def _tab_candidates(self, listings, main, counts):
+        """Yield (position, place URL, place ID) of the listings worth opening, checked on the cards in the results tab"""
+        for position, listing in enumerate(listings, 1):
+            self.cancel_token.raise_if_cancelled()
+            self.driver.switch_to.window(main)
+            counts['processed'] += 1
+            try:
+                outcome, place_id = self._check_card(listing, position, len(listings))
+                url = None if outcome else listing.find_element(By.CSS_SELECTOR, 'a.hfpxzc').get_attribute('href')
+            except (ScrapeCancelled, DriverUnresponsive, MapsBlocked):
+                raise
+            except Exception as e:
+                self._raise_if_driver_failed(e)
+                print(f"  ✗ Error reading listing card: {e}")
+                outcome, url = 'error', None
+            if url:
+                yield position, url, place_id
+                continue
+            STAGE1_LISTINGS.labels(outcome=outcome or 'no_link').inc()
+            if outcome in ('skipped_preview', 'duplicate_place'):
+                counts['skipped_early'] += 1
+    
+    def _wait_for_tab(self, loading):
+        """Poll the loading tabs until one shows its details; returns (handle, ready), ready False on timeout"""
+        while True:
+            for handle, (_, _, _, load_started) in loading.items():
+                self.driver.switch_to.window(handle)
+                if self.driver.execute_script(self.PLACE_READY_SCRIPT):
+                    return handle, True
+                if time.perf_counter() - load_started > self.command_timeout:
+                    return handle, False
+            self.cancel_token.sleep(0.1)
+    
+    def _extract_tab(self, handle, url, place_id, ready, position, total, results, max_results):
+        """Extract and save the place shown in a details tab (the current window); returns the outcome"""
+        data = {field: '' for field in ('name', 'address', 'phone', 'website', 'rating', 'reviews', 'email', 'owner')}
+        try:
+            if not ready:
+                # A block page instead of the place raises MapsBlocked; a consent wall is accepted
+                if self.check_blocks() == 'consent':
+                    self.driver.get(url)
+                    ready = bool(self.driver.execute_script(self.PLACE_READY_SCRIPT))
+                if not ready:
+                    print(f"[{position}/{total}] ⚠️ Place page did not load: {url[:100]}")
+                    return 'no_name'
+            
+            print(f"[{position}/{total}] Processing (saved: {len(results)}/{max_results})")
+            extract_started = time.perf_counter()
+            name_elem = None
+            if self.extraction_strategy == 'find_element':
+                name_elem = self.driver.find_element(By.CSS_SELECTOR, 'h1.DUwDvf')
+            self._extract_details(data, name_elem)
+            extract_seconds = time.perf_counter() - extract_started
+            STAGE1_STEP_SECONDS.labels(step='extract').observe(extract_seconds)
+            self.tracer.record('extract', extract_seconds)
+            return self._save_listing(data, results, max_results, place_id)
+        except (ScrapeCancelled, DriverUnresponsive, MapsBlocked):
+            raise
+        except Exception as e:
+            self._raise_if_driver_failed(e)
+            print(f"  ✗ Error processing listing: {e}")
+            return 'error'
+    
+    def tab_stats(self):
+        """Places loaded and average load time per details tab so far"""
+        return {
+            str(tab): {'loads': loads, 'avg_load_seconds': round(seconds / loads, 2)}
+            for tab, (loads, seconds) in sorted(self.tab_timing.items())
+        }
+    
+    def _close_tabs(self, tabs, main):
+        """Close the details tabs and return to the results list"""
+        for handle in tabs:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        try:
+            self.driver.switch_to.window(main)
+        except Exception:
+            pass
+    
+    def _process_listing(self, listing, position, total, results, max_results):
+        """Filter, click, extract and save one listing card; returns the outcome"""
+        try:
+            outcome, place_id = self._check_card(listing, position, total)
+            if outcome:
+                return outcome
+            
+            print(f"[{position}/{total}] Processing (saved: {len(results)}/{max_results})")
+            
+            data = self.extract_business_info(listing)
+            outcome = self._save_listing(data, results, max_results, place_id)
+            
+            self._sleep(random.uniform(
+                self.delays['delay_min'],
+                self.delays['delay_max']
+            ))
+            return outcome
+            
+        except (ScrapeCancelled, DriverUnresponsive, MapsBlocked):
+            raise
+        except Exception as e:
+            self._raise_if_driver_failed(e)
+            print(f"  ✗ Error processing listing: {e}")
+            # Continue with next listing instead of crashing
+            return 'error'
+    
+    def _check_card(self, listing, position, total):
+        """
+        Checks before opening a listing's details
+        
+        Returns:
+            (skip outcome or None to open it, place ID or None)
+        """
+        # Check if element is still valid
+        if not listing.is_displayed():
+            print(f"  ⚠️ Listing not visible, skipping")
+            return 'not_visible', None
+        
+        # Skip places an overlapping search (e.g. a neighbouring tile) already handled
+        place_id = self._get_place_id(listing)
+        if place_id and place_id in self.seen_places:
+            return 'duplicate_place', place_id
+        
+        # OPTIMIZATION: Check the filter rules on the card preview BEFORE clicking to save time
+        with self.tracer.span('card'):
+            card = self._get_card_preview(listing)
+        rule = self.card_filter.check(card) if card else None
+        if rule:
+            self.card_filter.reject(rule)
+            self._mark_seen(place_id)
+            print(f"[{position}/{total}] ⊘ {card['name'] or 'Listing'} - SKIPPED ({rule})")
+            return 'skipped_preview', place_id
+        return None, place_id
+    
+    def _mark_seen(self, place_id):
+        """Remember a place that was saved or deliberately skipped, so overlapping searches skip it"""
+        if place_id:
+            self.seen_places.add(place_id)
+    
+    def _save_listing(self, data, results, max_results, place_id=None):
+        """Check the extracted details against the filters and save them; returns the outcome"""
+        # Details show what the card may not have (e.g. an unlabelled rating)
+        rule = self.card_filter.check({
+            'name': data['name'],
+            'rating': parse_rating(data.get('rating')),
+            'reviews': parse_reviews(data.get('reviews'))
+        }) if data['name'] else None
+        if rule:
+            self.card_filter.reject(rule)
+            outcome = 'filtered'
+            print(f"  ⊘ {data['name']} - SKIPPED ({rule})")
+        elif data['name']:
+            if self.require_website and not data['website']:
+                outcome = 'skipped_no_website'
+                print(f"  ⊘ {data['name']} - SKIPPED (no website)")
+            else:
+                data['query'] = self.query_label or self.current_query or ''
+                with self.tracer.span('save'):
+                    saved = self.save_business(data)
+                if saved:
+                    results.append(data)
+                    outcome = 'saved'
+                    print(f"  ✓ {data['name']} - SAVED ({len(results)}/{max_results})")
+                elif self.store is not None:
+                    outcome = 'duplicate'
+                    print(f"  ⊘ {data['name']} - SKIPPED (already saved)")
+                else:
+                    outcome = 'save_failed'
+                    print(f"  ✗ Failed to save: {data['name']}")
+        else:
+            outcome = 'no_name'
+            print(f"  ⚠️ No name found for listing")
+        # Places that failed to load or save stay open for a retry of the search
+        if outcome in self.SETTLED_OUTCOMES:
+            self._mark_seen(place_id)
+        return outcome
+    
     def _initialize_csv(self):
         """Initialize CSV file with headers if it doesn't exist"""
         if not os.path.exists(self.csv_filename):
@@ -407,16 +1079,16 @@ class MapMiner:
         else:
             print(f"✓ Appending to existing CSV file: {self.csv_filename}")
     
-    def _matches_required_words(self, company_name):
-        """Check if company name contains any of the required words (case-insensitive)"""
-        if not self.required_words:
-            return True
-        
-        company_name_lower = company_name.lower()
-        for word in self.required_words:
-            if word.lower() in company_name_lower:
-                return True
-        return False
+    def _get_card_preview(self, listing_element):
+        """Card fields the filter rules need, read without clicking (None if no rule is set)"""
+        if not self.card_filter.active:
+            return None
+        if self.card_filter.needs_card_details:
+            try:
+                return parse_card(self.driver.execute_script(CARD_SCRIPT, listing_element) or {})
+            except Exception:
+                pass
+        return {'name': self._get_listing_name_preview(listing_element)}
     
     def _get_listing_name_preview(self, listing_element):
         """Extract company name from listing preview without clicking"""
@@ -432,11 +1104,25 @@ class MapMiner:
             except:
                 return None
     
+    def _get_place_id(self, listing_element):
+        """Stable place identity from the card's place link (feature id, else the link path)"""
+        try:
+            href = listing_element.find_element(By.CSS_SELECTOR, 'a.hfpxzc').get_attribute('href') or ''
+        except Exception:
+            return None
+        match = self.PLACE_ID_PATTERN.search(href)
+        if match:
+            return match.group(1)
+        return href.split('?')[0] or None
+    
     def save_business(self, data):
-        """Save a single business to CSV file immediately"""
+        """Save a single business to the store (or CSV file) immediately"""
         if not data or not data.get('name'):
             return False
         
+        if self.store is not None:
+            return self.store.add_business(data)
+        
         with open(self.csv_filename, 'a', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=self.csv_headers)
             writer.writerow(data)
@@ -444,7 +1130,10 @@ class MapMiner:
         return True
     
     def get_saved_count(self):
-        """Get the number of businesses already saved in CSV"""
+        """Get the number of businesses already saved in the store or CSV"""
+        if self.store is not None:
+            return self.store.count()
+        
         if not os.path.exists(self.csv_filename):
             return 0
         
@@ -452,6 +1141,101 @@ class MapMiner:
             reader = csv.reader(f)
             return sum(1 for row in reader) - 1
     
+    def set_cancel_token(self, cancel_token):
+        """Bind the scraper (e.g. a reused browser) to a job's cancellation token"""
+        if self.cancel_token is not None:
+            self.cancel_token.remove_callback(self._cancel_handle)
+        self.cancel_token = cancel_token
+        # Quit the browser as soon as the job is cancelled so in-flight WebDriver calls fail fast
+        self._cancel_handle = cancel_token.on_cancel(self.close)
+    
+    def _raise_if_driver_failed(self, error):
+        """Re-raise an error that means cancellation or a dead/hung browser instead of skipping it"""
+        self.cancel_token.raise_if_cancelled()
+        if is_driver_failure(error):
+            raise DriverUnresponsive(str(error)) from error
+    
+    def _load(self, url):
+        """Open a page, reporting the outcome to the proxy pool when the browser uses a proxy"""
+        if self.proxy is None:
+            self.driver.get(url)
+            return
+        started = time.perf_counter()
+        try:
+            self.driver.get(url)
+            failed = self.driver.execute_script('return location.href').startswith('chrome-error:')
+        except Exception:
+            self.proxy_pool.record(self.proxy, ok=False, stage='maps')
+            raise
+        if failed:
+            # Chrome shows its own error page when the proxy is down
+            self.proxy_pool.record(self.proxy, ok=False, stage='maps')
+            self._avoid_proxy = self.proxy
+            raise DriverUnresponsive(f"Proxy {self.proxy.label} failed to load {url[:120]}")
+        self.proxy_pool.record(self.proxy, ok=True, seconds=time.perf_counter() - started, stage='maps')
+    
+    def check_blocks(self, expect_results=False):
+        """
+        Look for Google's consent, captcha and throttling pages
+        
+        A consent wall is accepted and 'consent' returned, so the caller can
+        reload its page; block pages raise MapsBlocked. A results page that
+        stays empty after a second look is counted and 'empty' returned.
+        Returns None when the page is fine.
+        """
+        state = self._page_state()
+        if state is None:
+            return None
+        kind = classify_page(state, expect_results)
+        if kind == 'empty':
+            # Late results or an unknown "no results" text look the same at first
+            self._sleep(EMPTY_FEED_GRACE)
+            state = self._page_state()
+            if state is None:
+                return None
+            kind = classify_page(state, expect_results)
+            if kind == 'empty':
+                self.throttle.record_empty()
+                print(f"⚠️ Results stayed empty at {state.get('url', '')[:120]}")
+                return 'empty'
+        if kind is None:
+            return None
+        
+        self.throttle.record(kind)
+        if self.proxy is not None and kind in THROTTLE_KINDS:
+            self.proxy_pool.record(self.proxy, ok=False, stage='maps')
+            if kind == 'captcha':
+                # Google flagged this IP; the restarted browser moves to another proxy
+                self._avoid_proxy = self.proxy
+        if kind == 'consent':
+            if accept_consent(self.driver):
+                print("✓ Accepted Google consent page")
+                self._sleep(2)
+                return 'consent'
+            raise MapsBlocked(kind, f"Consent page without an accept button at {state.get('url', '')[:120]}")
+        raise MapsBlocked(kind, f"Google served a {kind} page at {state.get('url', '')[:120]} ({state.get('title', '')})")
+    
+    def _page_state(self):
+        """PAGE_STATE_SCRIPT result, or None if the script failed on a live browser"""
+        try:
+            return self.driver.execute_script(PAGE_STATE_SCRIPT) or {}
+        except Exception as e:
+            self._raise_if_driver_failed(e)
+            return None
+    
+    def _sleep(self, seconds):
+        """Sleep that ends early (raising ScrapeCancelled) when the job is cancelled"""
+        # Slower after blocks, see AdaptiveThrottle
+        self.cancel_token.sleep(seconds * self.sleep_scale * self.throttle.slowdown)
+    
     def close(self):
-        """Close the browser"""
+        """Close the browser (safe to call more than once and from another thread)"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.cancel_token.remove_callback(self._cancel_handle)
+        if self.proxy_pool is not None:
+            self.proxy_pool.release(id(self))
+        BROWSERS_OPEN.dec()
         self.driver.quit()
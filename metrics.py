@@ -0,0 +1,382 @@
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class _Metric(ABC):
+    """Base class: a named metric with optional labels and one child per label set"""
+
+    TYPE = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.children = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values, **kwargs):
+        """Child metric for one combination of label values"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}')
+        with self.lock:
+            child = self.children.get(key)
+            if child is None:
+                child = self.children[key] = self._new_child()
+            return child
+
+    def _default(self):
+        """Child used when the metric has no labels"""
+        return self.labels()
+
+    @abstractmethod
+    def _new_child(self):
+        """Child metric holding the value(s) of one label set"""
+
+    def samples(self):
+        """Yield (suffix, labels, value) tuples for the exposition format"""
+        with self.lock:
+            children = list(self.children.items())
+        for key, child in children:
+            labels = list(zip(self.labelnames, key))
+            for suffix, extra, value in child.samples():
+                yield suffix, labels + extra, value
+
+
+class _CounterChild:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self):
+        yield '', [], self.value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (name should end in _total)"""
+
+    TYPE = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def samples(self):
+        yield '', [], self.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    TYPE = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def track_inprogress(self):
+        return self._default().track_inprogress()
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        with self.lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        with self.lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            yield '_bucket', [('le', _format_value(bound))], cumulative
+        yield '_sum', [], total
+        yield '_count', [], count
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    TYPE = 'histogram'
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None, registry=None):
+        bounds = sorted(buckets or self.DEFAULT_BUCKETS)
+        if bounds[-1] != float('inf'):
+            bounds.append(float('inf'))
+        self.buckets = tuple(bounds)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f'Duplicate metric: {metric.name}')
+            self.metrics[metric.name] = metric
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.TYPE}')
+            for suffix, labels, value in metric.samples():
+                lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it can't be read (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Stage 1: Google Maps
+STAGE1_STEP_SECONDS = Histogram(
+    'mapminer_stage1_step_seconds',
+    'Duration of Stage 1 steps (search, scroll, click, extract), including configured delays',
+    ['step']
+)
+STAGE1_TAB_LOAD_SECONDS = Histogram(
+    'mapminer_stage1_tab_load_seconds',
+    'Time from opening a place page in a details tab until its details show, by number of tabs',
+    ['tabs'],
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+)
+STAGE1_LISTINGS = Counter(
+    'mapminer_stage1_listings_total',
+    'Stage 1 listings by outcome',
+    ['outcome']
+)
+STAGE1_CARD_REJECTIONS = Counter(
+    'mapminer_stage1_card_rejections_total',
+    'Stage 1 listings skipped by a filter rule before clicking',
+    ['rule']
+)
+STAGE1_DRIVER_RESTARTS = Counter(
+    'mapminer_stage1_driver_restarts_total',
+    'Stage 1 browser restarts by reason (recycle, hung)',
+    ['reason']
+)
+STAGE1_BLOCKS = Counter(
+    'mapminer_stage1_blocks_total',
+    'Consent walls, captchas and throttling pages Google served to Stage 1',
+    ['kind']
+)
+STAGE1_EMPTY_FEEDS = Counter(
+    'mapminer_stage1_empty_feeds_total',
+    'Stage 1 searches whose results stayed empty without a "no results" message, after a second look'
+)
+BROWSERS_OPEN = Gauge(
+    'mapminer_browsers_open',
+    'WebDriver browsers currently running'
+)
+
+WARM_BROWSER_REQUESTS = Counter(
+    'mapminer_warm_browser_requests_total',
+    'Stage 1 browser starts served from the warm pool (hit) or launched cold (miss)',
+    ['outcome']
+)
+
+# Stage 2: website enrichment
+STAGE2_FETCH_SECONDS = Histogram(
+    'mapminer_stage2_fetch_seconds',
+    'Stage 2 page fetch latency by outcome',
+    ['outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+)
+STAGE2_REQUESTS_PER_BUSINESS = Histogram(
+    'mapminer_stage2_requests_per_business',
+    'HTTP requests issued per enriched business',
+    buckets=(1, 2, 3, 5, 10, 15, 20, 25, 30)
+)
+STAGE2_BUSINESS_SECONDS = Histogram(
+    'mapminer_stage2_business_seconds',
+    'Time to enrich one business',
+    buckets=(0.5, 1, 2, 5, 10, 20, 40, 80, 160)
+)
+STAGE2_BUSINESSES = Counter(
+    'mapminer_stage2_businesses_total',
+    'Stage 2 businesses by result status',
+    ['status']
+)
+STAGE2_WIRE_BYTES = Counter(
+    'mapminer_stage2_wire_bytes_total',
+    'Bytes Stage 2 received on the wire (before decompression), by transport',
+    ['transport']
+)
+STAGE2_CONNECTIONS = Counter(
+    'mapminer_stage2_connections_total',
+    'Connections Stage 2 opened, by transport',
+    ['transport']
+)
+STAGE2_RESPONSES = Counter(
+    'mapminer_stage2_responses_total',
+    'Stage 2 responses by negotiated HTTP version',
+    ['http_version']
+)
+STAGE2_RENDER_SECONDS = Histogram(
+    'mapminer_stage2_render_seconds',
+    'Time to look up one business in the headless browser fallback, by outcome (recovered, no_info)',
+    ['outcome'],
+    buckets=(1, 2, 5, 10, 20, 40, 80)
+)
+STAGE2_BYTES = Counter(
+    'mapminer_stage2_bytes_downloaded_total',
+    'Bytes of page content downloaded by Stage 2'
+)
+
+# Proxies
+PROXY_REQUESTS = Counter(
+    'mapminer_proxy_requests_total',
+    'Requests sent through each proxy, by stage and outcome (ok, failed)',
+    ['proxy', 'stage', 'outcome']
+)
+PROXY_BYTES = Counter(
+    'mapminer_proxy_bytes_total',
+    'Response bytes received through each proxy',
+    ['proxy']
+)
+PROXY_LATENCY = Gauge(
+    'mapminer_proxy_latency_seconds',
+    'Smoothed response time through each proxy',
+    ['proxy']
+)
+PROXY_HEALTHY = Gauge(
+    'mapminer_proxy_healthy',
+    'Whether each proxy is in rotation (1) or ejected (0)',
+    ['proxy']
+)
+PROXY_EJECTIONS = Counter(
+    'mapminer_proxy_ejections_total',
+    'Times each proxy was taken out of rotation after repeated failures',
+    ['proxy']
+)
+
+# Jobs
+JOB_TIME_TO_FIRST_RESULT = Histogram(
+    'mapminer_job_time_to_first_result_seconds',
+    'Time from a job starting to run until its first result row',
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+
+# Scheduling
+QUEUE_DEPTH = Gauge(
+    'mapminer_queue_depth',
+    'Items waiting in each queue',
+    ['queue']
+)
+ACTIVE_WORKERS = Gauge(
+    'mapminer_active_workers',
+    'Workers currently busy, by kind',
+    ['kind']
+)
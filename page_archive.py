@@ -0,0 +1,108 @@
+"""
+Compressed, content-addressed archive of the pages Stage 2 fetched
+
+Pages are stored once per distinct content (sha256 of the page text),
+gzip-compressed under blobs/<2 hex>/<digest>.gz, so jobs that share an
+archive directory never store the same impressum twice. A SQLite index
+records every capture like a WARC index: which site (the business website)
+a URL was fetched for, when, and the digest of what came back.
+
+    <dir>/index.db
+    <dir>/blobs/3f/3f9c...e1.gz
+
+reextract.py replays the archive through the extractors without network
+access.
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class PageArchive:
+    """Content-addressed page store with a per-site capture index"""
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Archive directory (created if needed; shared across jobs)
+        """
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, 'blobs')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(directory, 'index.db'), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS captures ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, site TEXT NOT NULL, url TEXT NOT NULL, '
+                'digest TEXT NOT NULL, size INTEGER NOT NULL, fetched_at REAL NOT NULL)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_captures_url ON captures(url, id)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_captures_site ON captures(site, id)')
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest + '.gz')
+
+    def put(self, site, url, content):
+        """Archive the text fetched from `url` for a site; returns its digest"""
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a temporary name so readers never see a partial blob
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO captures (site, url, digest, size, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                (site, url, digest, len(data), time.time())
+            )
+        return digest
+
+    def get(self, url):
+        """Text of the latest capture of `url`, or None if it was never archived"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT digest FROM captures WHERE url = ? ORDER BY id DESC LIMIT 1', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            with gzip.open(self._blob_path(row['digest']), 'rb') as f:
+                return f.read().decode('utf-8')
+        except OSError:
+            return None
+
+    def captures(self, site):
+        """Capture records of a site, oldest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT url, digest, size, fetched_at FROM captures WHERE site = ? ORDER BY id', (site,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        """Number of captures, distinct pages and their raw size in bytes"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT COUNT(*) AS captures, COUNT(DISTINCT digest) AS pages FROM captures'
+            ).fetchone()
+            raw = self.conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT digest, MAX(size) AS size FROM captures GROUP BY digest)'
+            ).fetchone()[0]
+        return {'captures': row['captures'], 'pages': row['pages'], 'raw_bytes': raw}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,154 @@
+"""
+Offline re-extraction of Stage 2 results from the page archive
+
+After improving extract_owner_name or the email filters, run the
+extractors again over the pages archived during earlier jobs instead of
+re-crawling every website. Pages are parsed in worker processes (parsing is
+CPU-bound, so threads wouldn't help) and changed emails/owners are written
+back to the job's result database:
+
+    python reextract.py backend/output/Autohaus_20260203_104530_3f9c2a7b1d04.db \\
+        --archive backend/output/page_archive --workers 8
+
+Only businesses whose pages were archived (job config "page_archive") are
+re-extracted; the others keep their stored email and owner. Nothing is
+fetched from the network.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from page_archive import PageArchive
+from result_store import ResultStore
+from website_scraper_configurable import WebsiteScraperConfigurable
+
+# Scraper of a worker process, created once by _init_worker
+_scraper = None
+
+
+class _QuietProgress:
+    """Progress callback that swallows the scraper's log lines"""
+
+    def emit_log(self, message, level='info'):
+        pass
+
+    def update_status(self, **kwargs):
+        pass
+
+
+def _init_worker(archive_dir):
+    global _scraper
+    _scraper = WebsiteScraperConfigurable(
+        progress_callback=_QuietProgress(),
+        archive=PageArchive(archive_dir),
+        offline=True
+    )
+
+
+def _extract_batch(rows):
+    """
+    Re-extract a batch of businesses; returns (row, email, owner) tuples
+
+    Businesses without archived pages come back with email and owner None,
+    so their stored values are kept.
+    """
+    results = []
+    for row in rows:
+        if not _scraper.has_archived_pages(row['website']):
+            results.append((row, None, None))
+            continue
+        results.append((row, *(value or '' for value in _scraper.scrape_website_info(row['website']))))
+    return results
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def reextract(store, archive_dir, workers=None, batch_size=100, log=print):
+    """
+    Run the extractors over the archived pages of every business in a store
+
+    Args:
+        store: ResultStore of the job to update
+        archive_dir: PageArchive directory the job's pages were saved to
+        workers: Worker processes (default: CPU count)
+        batch_size: Businesses per task handed to a worker
+        log: Callable for progress messages
+
+    Returns:
+        dict with businesses (re-extracted), changed, emails_found, owners_found,
+        not_archived (left unchanged) and seconds
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    stats = {'businesses': 0, 'changed': 0, 'emails_found': 0, 'owners_found': 0, 'not_archived': 0}
+    rows = (
+        row for row in store.iter_rows(fields=WebsiteScraperConfigurable.INPUT_FIELDS)
+        if row['website'].strip() and 'mobile.de' not in row['website'].lower()
+    )
+    batches = _batches(rows, batch_size)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(archive_dir,)) as pool:
+        in_flight = set()
+        while True:
+            # Keep two batches per worker queued so memory stays bounded
+            while len(in_flight) < workers * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                in_flight.add(pool.submit(_extract_batch, batch))
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                for row, email, owner in future.result():
+                    if email is None:
+                        stats['not_archived'] += 1
+                        continue
+                    stats['businesses'] += 1
+                    stats['emails_found'] += bool(email)
+                    stats['owners_found'] += bool(owner)
+                    if email != row['email'] or owner != row['owner']:
+                        store.update_business({
+                            'name': row['name'],
+                            'address': row['address'],
+                            'email': email,
+                            'owner': owner
+                        })
+                        stats['changed'] += 1
+            log(f"🔁 Re-extracted {stats['businesses']} businesses ({stats['changed']} changed)")
+
+    stats['seconds'] = round(time.perf_counter() - started, 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-run Stage 2 extraction over archived pages')
+    parser.add_argument('db', help='Result database (.db) of the job to update')
+    parser.add_argument('--archive', required=True, help='Page archive directory')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+    try:
+        stats = reextract(store, args.archive, workers=args.workers, batch_size=args.batch_size)
+    finally:
+        store.close()
+    print(f"✅ {stats['businesses']} businesses in {stats['seconds']}s: {stats['changed']} changed, "
+          f"📧 {stats['emails_found']} with email, 👤 {stats['owners_found']} with owner, "
+          f"{stats['not_archived']} without archived pages left unchanged")
+
+
+if __name__ == '__main__':
+    main()
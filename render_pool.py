@@ -0,0 +1,136 @@
+"""
+Small pool of reusable headless browsers for JavaScript-rendered websites
+
+Stage 2 fetches pages with requests, which only sees the static HTML. Sites
+built with JS frameworks or website builders render their impressum in the
+browser, so Stage 2 hands the few businesses where static extraction found
+nothing on a script-rendered page to this pool. Browsers are started on
+first use, reused across pages and capped at `size`, independent of the
+Stage 2 worker count. Images, media, fonts and stylesheets are blocked
+since only the text is needed.
+"""
+import queue
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.edge.options import Options as EdgeOptions
+from selenium.webdriver.edge.service import Service as EdgeService
+
+from maps_scraper_configurable import resolve_driver_path
+from metrics import BROWSERS_OPEN
+
+# Resources that don't affect the page text
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm', '*.mp3', '*.css',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*facebook.net*'
+]
+
+
+class BrowserRenderPool:
+    """Headless Chrome/Edge instances shared by Stage 2's fallback tier"""
+
+    def __init__(self, size=2, browser='chrome', page_timeout=20, settle_seconds=1.0, log=print):
+        """
+        Args:
+            size: Maximum number of browsers (and concurrent renders)
+            browser: 'chrome' or 'edge'
+            page_timeout: Seconds a page may take to load
+            settle_seconds: Wait after load for client-side rendering to finish
+            log: Callable for progress messages
+        """
+        if browser not in ('chrome', 'edge'):
+            raise ValueError(f'Render pool needs Chrome or Edge, not {browser}')
+        self.size = size
+        self.browser = browser
+        self.page_timeout = page_timeout
+        self.settle_seconds = settle_seconds
+        self.log = log
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.drivers = []
+        self.closed = False
+
+    def _create_driver(self):
+        options = ChromeOptions() if self.browser == 'chrome' else EdgeOptions()
+        options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--window-size=1280,1024')
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        path = resolve_driver_path(self.browser, options)
+        if self.browser == 'chrome':
+            driver = webdriver.Chrome(service=ChromeService(executable_path=path), options=options)
+        else:
+            driver = webdriver.Edge(service=EdgeService(executable_path=path), options=options)
+        driver.set_page_load_timeout(self.page_timeout)
+        driver.set_script_timeout(self.page_timeout)
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+        with self.lock:
+            self.drivers.append(driver)
+        BROWSERS_OPEN.inc()
+        return driver
+
+    def _discard(self, driver):
+        with self.lock:
+            if driver not in self.drivers:
+                return
+            self.drivers.remove(driver)
+        BROWSERS_OPEN.dec()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def render(self, url):
+        """Rendered HTML of `url`, or None if it failed to load"""
+        with self.slots:
+            if self.closed:
+                return None
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                try:
+                    driver = self._create_driver()
+                except Exception as e:
+                    self.log(f'⚠️ Render browser failed to start: {e}')
+                    return None
+
+            try:
+                driver.get(url)
+                # Let client-side rendering settle: stop once the text stops growing
+                deadline = time.perf_counter() + self.settle_seconds * 3
+                length = -1
+                while time.perf_counter() < deadline:
+                    time.sleep(self.settle_seconds / 2)
+                    current = driver.execute_script(
+                        'return document.body ? document.body.innerText.length : 0'
+                    )
+                    if current == length:
+                        break
+                    length = current
+                html = driver.page_source
+            except Exception:
+                # A browser in an unknown state is not reused
+                self._discard(driver)
+                return None
+
+            if self.closed:
+                self._discard(driver)
+            else:
+                self.idle.put(driver)
+            return html
+
+    def close(self):
+        """Quit every browser; renders in progress fail and return None"""
+        self.closed = True
+        with self.lock:
+            drivers = list(self.drivers)
+        for driver in drivers:
+            self._discard(driver)
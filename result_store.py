@@ -0,0 +1,291 @@
+import sqlite3
+import threading
+import time
+import csv
+import io
+import json
+import os
+import urllib.parse
+
+
+class ResultStore:
+    """SQLite-backed result store shared by the Maps and website stages"""
+
+    FIELDS = ['name', 'address', 'phone', 'website', 'rating', 'reviews', 'email', 'owner', 'query']
+    KEY_FIELDS = ('name', 'address')
+
+    def __init__(self, db_path, fields=None, read_only=False):
+        """
+        Open (or create) the result database
+
+        Args:
+            db_path: Path to the SQLite database file
+            fields: Business columns to store (default: ResultStore.FIELDS)
+            read_only: Open an existing database without creating or migrating
+                it (raises FileNotFoundError if it doesn't exist)
+        """
+        self.db_path = db_path
+        self.fields = list(fields or self.FIELDS)
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._listeners = []
+        if read_only:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(db_path)
+            # Older databases may lack some columns; only offer the ones present
+            existing = {row['name'] for row in self._connect().execute('PRAGMA table_info(businesses)')}
+            self.fields = [field for field in self.fields if field in existing]
+        else:
+            self._initialize_db()
+
+    def _connect(self):
+        """Return the connection for the calling thread, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.read_only:
+                uri = f'file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro'
+                conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+            else:
+                conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self.lock:
+                self._connections.append(conn)
+        return conn
+
+    def _initialize_db(self):
+        """Create the businesses table and its indexes if they don't exist"""
+        conn = self._connect()
+        columns = ', '.join(f"{field} TEXT NOT NULL DEFAULT ''" for field in self.fields)
+        with self.lock, conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS businesses ('
+                f'id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, '
+                f'created_at REAL NOT NULL, updated_at REAL NOT NULL, seq INTEGER NOT NULL DEFAULT 0)'
+            )
+            # Older databases may predate some columns
+            existing = {row['name'] for row in conn.execute('PRAGMA table_info(businesses)')}
+            for field in self.fields:
+                if field not in existing:
+                    conn.execute(f"ALTER TABLE businesses ADD COLUMN {field} TEXT NOT NULL DEFAULT ''")
+            if 'seq' not in existing:
+                conn.execute('ALTER TABLE businesses ADD COLUMN seq INTEGER NOT NULL DEFAULT 0')
+                conn.execute('UPDATE businesses SET seq = id')
+            conn.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS idx_businesses_key ON businesses(name, address)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_businesses_seq ON businesses(seq)')
+
+    def _clean(self, data):
+        """Keep only known columns and normalize missing values to empty strings"""
+        return {field: (data.get(field) or '') for field in self.fields if field in data}
+
+    def add_listener(self, callback):
+        """
+        Call `callback(delta)` after every stored change
+
+        A delta is {'id', 'seq', 'row'}: the full (non-empty) row for a new
+        business, only the changed fields for an update. seq increases with
+        every change, so changes_since() can replay what a listener missed.
+        """
+        with self.lock:
+            self._listeners.append(callback)
+
+    def _notify(self, delta):
+        for callback in list(self._listeners):
+            try:
+                callback(delta)
+            except Exception as e:
+                print(f'⚠️ Result listener failed: {e}')
+
+    def add_business(self, data):
+        """Insert a business; returns False if it is missing a name or already stored"""
+        if not data or not data.get('name'):
+            return False
+
+        row = self._clean(data)
+        now = time.time()
+        columns = list(row.keys()) + ['created_at', 'updated_at']
+        placeholders = ', '.join('?' for _ in columns)
+        conn = self._connect()
+        with self.lock, conn:
+            cursor = conn.execute(
+                f'INSERT OR IGNORE INTO businesses ({", ".join(columns)}, seq) VALUES ({placeholders}, '
+                f'(SELECT COALESCE(MAX(seq), 0) + 1 FROM businesses))',
+                list(row.values()) + [now, now]
+            )
+            if cursor.rowcount != 1:
+                return False
+            changed = conn.execute('SELECT id, seq FROM businesses WHERE id = ?', (cursor.lastrowid,)).fetchone()
+        if self._listeners:
+            self._notify({
+                'id': changed['id'],
+                'seq': changed['seq'],
+                'row': {field: value for field, value in row.items() if value}
+            })
+        return True
+
+    def update_business(self, data):
+        """Update the non-key fields of the business identified by name and address"""
+        row = self._clean(data)
+        updates = {field: value for field, value in row.items() if field not in self.KEY_FIELDS}
+        if not updates:
+            return False
+
+        assignments = ', '.join(f'{field} = ?' for field in updates)
+        key = [data.get('name', ''), data.get('address', '')]
+        conn = self._connect()
+        with self.lock, conn:
+            cursor = conn.execute(
+                f'UPDATE businesses SET {assignments}, updated_at = ?, '
+                f'seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM businesses) WHERE name = ? AND address = ?',
+                list(updates.values()) + [time.time()] + key
+            )
+            if cursor.rowcount == 0:
+                return False
+            changed = conn.execute('SELECT id, seq FROM businesses WHERE name = ? AND address = ?', key).fetchone()
+        if self._listeners:
+            self._notify({'id': changed['id'], 'seq': changed['seq'], 'row': updates})
+        return True
+
+    def count(self):
+        """Number of stored businesses"""
+        return self._connect().execute('SELECT COUNT(*) FROM businesses').fetchone()[0]
+
+    def check_fields(self, fields):
+        """Return the requested columns, raising ValueError for unknown ones"""
+        fields = list(fields or self.fields)
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise ValueError(f'Unknown field(s): {", ".join(unknown)}')
+        return fields
+
+    def _filter_sql(self, filters):
+        """
+        WHERE conditions and parameters for result filters
+
+        Supported filters: has_email (bool), city (substring of the address)
+        and min_rating (ratings are stored as text such as '4,5').
+        """
+        conditions, params = [], []
+        filters = filters or {}
+        if filters.get('has_email'):
+            conditions.append("email != ''")
+        if filters.get('city'):
+            city = filters['city'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("address LIKE ? ESCAPE '\\'")
+            params.append(f'%{city}%')
+        if filters.get('min_rating') is not None:
+            conditions.append("rating != '' AND CAST(REPLACE(rating, ',', '.') AS REAL) >= ?")
+            params.append(float(filters['min_rating']))
+        return conditions, params
+
+    def page(self, fields=None, after_id=0, limit=100, filters=None):
+        """
+        One page of businesses after a cursor
+
+        Returns (rows, next_cursor); rows include their 'id' and next_cursor is
+        None on the last page. Pages are keyset-paginated by id, so a cursor
+        stays valid while new rows are being added.
+        """
+        fields = self.check_fields(fields)
+        conditions, params = self._filter_sql(filters)
+        where = ' AND '.join(['id > ?'] + conditions)
+        rows = self._connect().execute(
+            f'SELECT id, {", ".join(fields)} FROM businesses WHERE {where} ORDER BY id LIMIT ?',
+            [after_id] + params + [limit + 1]
+        ).fetchall()
+        next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+        return [dict(row) for row in rows[:limit]], next_cursor
+
+    def last_seq(self):
+        """Sequence number of the most recent change (0 for an empty store)"""
+        return self._connect().execute('SELECT COALESCE(MAX(seq), 0) FROM businesses').fetchone()[0]
+
+    def changes_since(self, after_seq, limit=500):
+        """
+        Businesses changed after a sequence number, as deltas in seq order
+
+        Each business appears once with its current full row, so replaying
+        the deltas on top of what a client had at `after_seq` brings it up to
+        date. Returns (deltas, more).
+        """
+        rows = self._connect().execute(
+            f'SELECT id, seq, {", ".join(self.fields)} FROM businesses WHERE seq > ? ORDER BY seq LIMIT ?',
+            (after_seq, limit + 1)
+        ).fetchall()
+        deltas = [
+            {'id': row['id'], 'seq': row['seq'], 'row': {field: row[field] for field in self.fields}}
+            for row in rows[:limit]
+        ]
+        return deltas, len(rows) > limit
+
+    def iter_rows(self, fields=None, batch_size=500, filters=None):
+        """
+        Yield stored businesses as dicts in insertion order
+
+        Rows are fetched in keyset-paginated batches so no read transaction is
+        held open while the caller works and memory stays bounded.
+        """
+        fields = self.check_fields(fields)
+        last_id = 0
+        while last_id is not None:
+            rows, last_id = self.page(fields, last_id, batch_size, filters)
+            for row in rows:
+                del row['id']
+                yield row
+
+    def iter_csv(self, fields=None, batch_size=500, filters=None):
+        """Yield the store as CSV text chunks (header first)"""
+        fields = self.check_fields(fields)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        pending = 0
+        for row in self.iter_rows(fields=fields, batch_size=batch_size, filters=filters):
+            writer.writerow(row)
+            pending += 1
+            if pending >= batch_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue()
+
+    def iter_jsonl(self, fields=None, batch_size=500, filters=None):
+        """Yield the store as JSON Lines text chunks"""
+        lines = []
+        for row in self.iter_rows(fields=fields, batch_size=batch_size, filters=filters):
+            lines.append(json.dumps(row, ensure_ascii=False))
+            if len(lines) >= batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    def export_csv(self, csv_path):
+        """Write the full store to a CSV file"""
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in self.iter_csv():
+                f.write(chunk)
+
+    def close(self):
+        """Close all connections opened by this store"""
+        with self.lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+
+def store_path_for(output_path):
+    """Database path that backs a given CSV output path"""
+    return os.path.splitext(output_path)[0] + '.db'
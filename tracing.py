@@ -0,0 +1,249 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Span:
+    """A timed operation with attributes and child spans"""
+
+    __slots__ = ('name', 'attrs', 'start', 'end', 'children', 'thread_id')
+
+    def __init__(self, name, attrs, thread_id):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.end = None
+        self.children = []
+        self.thread_id = thread_id
+
+    def set(self, **attrs):
+        """Attach attributes once they are known (e.g. HTTP status, bytes)"""
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(((self.end or time.time()) - self.start) * 1000, 3),
+            'attrs': self.attrs,
+            'thread': self.thread_id,
+            'children': [child.to_dict() for child in self.children]
+        }
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+
+class NullTracer:
+    """Tracer used when tracing is off; spans cost one context manager"""
+
+    enabled = False
+
+    @contextmanager
+    def span(self, name, **attrs):
+        yield _NullSpan()
+
+    def record(self, name, duration, **attrs):
+        pass
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    """
+    Collects span trees per business and appends each finished tree to a JSONL file
+
+    Spans nest per thread: a span opened while another is active on the same
+    thread becomes its child, and a span opened with nothing active is a
+    root (one business, one search). Each root is written as one JSON line
+    when it ends, so memory stays flat for large jobs.
+    """
+
+    enabled = True
+
+    def __init__(self, jsonl_path):
+        self.jsonl_path = jsonl_path
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self._file = open(jsonl_path, 'a', encoding='utf-8')
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        span = Span(name, attrs, threading.get_ident())
+        if stack:
+            stack[-1].children.append(span)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.end = time.time()
+            stack.pop()
+            if not stack:
+                self._write(span)
+
+    def record(self, name, duration, **attrs):
+        """
+        Attach an already-timed step that just finished as a child of the active span
+
+        Used where the caller measures a step with perf_counter anyway (for
+        metrics) and wrapping it in span() would mean restructuring the code.
+        """
+        stack = self._stack()
+        span = Span(name, attrs, threading.get_ident())
+        span.end = time.time()
+        span.start = span.end - duration
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            self._write(span)
+
+    def _write(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False)
+        with self.lock:
+            if not self._file.closed:
+                self._file.write(line + '\n')
+
+    def close(self):
+        with self.lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def export_chrome_trace(jsonl_path, trace_path):
+    """
+    Convert a span JSONL file to the Chrome trace event format
+
+    The output opens in chrome://tracing, Perfetto or speedscope, which
+    render it as a flame chart per thread.
+    """
+    pid = os.getpid()
+    with open(jsonl_path, 'r', encoding='utf-8') as source, open(trace_path, 'w', encoding='utf-8') as target:
+        target.write('{"traceEvents": [\n')
+        first = True
+        for line in source:
+            if not line.strip():
+                continue
+            pending = [json.loads(line)]
+            while pending:
+                span = pending.pop()
+                event = {
+                    'name': span['name'],
+                    'ph': 'X',
+                    'ts': span['start'] * 1_000_000,
+                    'dur': span['duration_ms'] * 1000,
+                    'pid': pid,
+                    'tid': span['thread'],
+                    'args': span['attrs']
+                }
+                target.write(('' if first else ',\n') + json.dumps(event, ensure_ascii=False))
+                first = False
+                pending.extend(span['children'])
+        target.write('\n]}\n')
+
+
+class JobProfiler:
+    """
+    cProfile across the threads of one job
+
+    cProfile only sees the thread that enables it, so each thread doing job
+    work gets its own profile; save() merges them into one .prof file.
+    From Python 3.12 cProfile runs on sys.monitoring, which allows one
+    active profiler per process: there a block is profiled only while no
+    other thread is, and the rest run unprofiled (counted in `skipped`).
+    """
+
+    # One active cProfile.Profile per process from 3.12 on
+    EXCLUSIVE = sys.version_info >= (3, 12)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = threading.Lock()
+        self._local = threading.local()
+        self.profiles = []
+        self.skipped = 0
+
+    def _profile(self):
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
+
+    def _enable(self):
+        """Start profiling the calling thread; returns False if it has to run unprofiled"""
+        if self.EXCLUSIVE and not self.active.acquire(blocking=False):
+            return False
+        try:
+            self._profile().enable()
+            return True
+        except ValueError:
+            # Another profiler (debugger, coverage) holds sys.monitoring
+            if self.EXCLUSIVE:
+                self.active.release()
+            return False
+
+    @contextmanager
+    def thread(self):
+        """Profile the calling thread for the duration of the block"""
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            # Nested block: the outer one is already profiling (or skipping)
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+
+        enabled = self._enable()
+        if not enabled:
+            with self.lock:
+                self.skipped += 1
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            if enabled:
+                self._profile().disable()
+                if self.EXCLUSIVE:
+                    self.active.release()
+
+    def save(self, path):
+        """Merge all thread profiles into one pstats file"""
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return path
+
+
+class NullProfiler:
+    """Profiler used when profiling is off"""
+
+    @contextmanager
+    def thread(self):
+        yield
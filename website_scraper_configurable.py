@@ -6,22 +6,81 @@ import random
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, CancelledError, FIRST_COMPLETED, wait
 import threading
+from cancellation import CancellationToken
+from tracing import NullTracer, NullProfiler
+from http_transport import TRANSPORTS, CountingHTTPAdapter, HttpxTransport
+from metrics import (
+    STAGE2_FETCH_SECONDS, STAGE2_REQUESTS_PER_BUSINESS, STAGE2_BUSINESS_SECONDS,
+    STAGE2_BUSINESSES, STAGE2_BYTES, STAGE2_WIRE_BYTES, STAGE2_RESPONSES, STAGE2_RENDER_SECONDS,
+    QUEUE_DEPTH, ACTIVE_WORKERS, peak_rss_mb
+)
 
 class WebsiteScraperConfigurable:
-    def __init__(self, csv_filename='businesses.csv', max_workers=10, delays=None, progress_callback=None):
+    # Columns Stage 2 reads; rows are loaded with only these to keep them small
+    INPUT_FIELDS = ['name', 'address', 'website', 'email', 'owner']
+    
+    USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    
+    # Markers of pages whose content is rendered by JavaScript in the browser
+    SCRIPT_RENDERED_MARKERS = [
+        'id="root"></div>', 'id="app"></div>', 'id="__next"', 'id="___gatsby"', '__next_data__',
+        'window.__nuxt__', 'ng-version=', 'data-reactroot', 'wix-warmup-data', 'static.parastorage.com',
+        'jimdo', 'enable javascript', 'javascript aktivieren'
+    ]
+    
+    def __init__(self, csv_filename='businesses.csv', max_workers=10, delays=None, progress_callback=None, store=None,
+                 cancel_token=None, tracer=None, profiler=None, max_in_flight=None, archive=None, offline=False,
+                 render_pool=None, render_backlog=1000, transport='requests', http2=True, proxy_pool=None):
         """
         Initialize the website scraper
         
         Args:
-            csv_filename: Path to CSV file
+            csv_filename: Path to CSV file (used when no store is given)
             max_workers: Number of parallel workers
             delays: Dictionary with delay configurations
             progress_callback: Callback object for progress updates
+            store: Optional ResultStore to read businesses from and write updates to
+            cancel_token: Optional CancellationToken; cancelling it drops queued
+                businesses and aborts in-flight page downloads
+            tracer: Optional Tracer that records a span tree per business
+            profiler: Optional JobProfiler that profiles the worker threads
+            max_in_flight: Businesses queued or running at once (default: 4 × max_workers)
+            archive: Optional PageArchive that keeps every fetched page
+            offline: Read pages from the archive instead of the network and
+                re-extract businesses that already have contact details
+            render_pool: Optional BrowserRenderPool; businesses without results on a
+                script-rendered website are looked up again in a headless browser
+            render_backlog: Businesses waiting for the browser tier at most; further
+                candidates keep their static result
+            transport: 'requests' (a session per business, HTTP/1.1) or 'httpx'
+                (one shared client, HTTP/2 multiplexing and brotli; optional dependency)
+            http2: Negotiate HTTP/2 with the httpx transport
+            proxy_pool: Optional ProxyPool; every request goes through a proxy picked by score
         """
         self.csv_filename = csv_filename
+        self.store = store
+        self.cancel_token = cancel_token or CancellationToken()
+        self.tracer = tracer or NullTracer()
+        self.profiler = profiler or NullProfiler()
         self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or max_workers * 4
+        self.archive = archive
+        self.offline = offline
+        if offline and archive is None:
+            raise ValueError('Offline mode needs a page archive')
+        self.render_pool = None if offline else render_pool
+        self.render_backlog = render_backlog
+        self.proxy_pool = proxy_pool
+        if transport not in TRANSPORTS:
+            raise ValueError(f'Unknown transport: {transport}')
+        self.transport = transport
+        self.http_client = None
+        if transport == 'httpx' and not offline:
+            self.http_client = HttpxTransport(
+                self.USER_AGENT, http2=http2, max_connections=max(max_workers * 4, 40)
+            )
         self.lock = threading.Lock()
         self.progress = progress_callback
         
@@ -70,6 +129,9 @@ class WebsiteScraperConfigurable:
             '/privacy.htm'
         ]
         
+        # Rendering costs seconds per page, so the browser tier only tries the likeliest pages
+        self.render_paths = ['/impressum', '/imprint', '/kontakt', '/contact']
+        
         # Email regex pattern
         self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
         
@@ -105,25 +167,150 @@ class WebsiteScraperConfigurable:
         return url
     
     def create_session(self):
-        """Create a new session for each thread"""
+        """Create a new session for each thread (None with the shared httpx client)"""
+        if self.http_client is not None:
+            return None
         session = requests.Session()
         session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            'User-Agent': self.USER_AGENT
         })
         session.verify = False
+        adapter = CountingHTTPAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
         return session
     
+    def _fetch_outcome(self, error):
+        """Metric outcome of a failed fetch"""
+        client = self.http_client
+        if isinstance(error, requests.HTTPError) or (client and client.is_http_error(error)):
+            return 'http_error'
+        if isinstance(error, requests.Timeout) or (client and client.is_timeout(error)):
+            return 'timeout'
+        if isinstance(error, requests.ConnectionError) or (client and client.is_connection_error(error)):
+            return 'cancelled' if self.cancel_token.cancelled else 'connection_error'
+        return 'error'
+    
     def get_page_content(self, url, timeout=8, session=None):
         """Get page content with error handling"""
-        if session is None:
+        if session is None and self.http_client is None:
             session = self.create_session()
         
-        try:
-            response = session.get(url, timeout=timeout, allow_redirects=True)
-            response.raise_for_status()
-            return response.text
-        except Exception:
+        if self.cancel_token.cancelled:
             return None
+        
+        if self.proxy_pool is None:
+            return self._fetch_page(url, timeout, session)[0]
+        proxy = self.proxy_pool.pick()
+        content, outcome = self._fetch_page(url, timeout, session, proxy)
+        if outcome == 'connection_error':
+            # Most likely the proxy's fault (a site that is down answers 502 through a proxy)
+            content, outcome = self._fetch_page(url, timeout, session, self.proxy_pool.pick(avoid=proxy))
+        return content
+    
+    def _fetch_page(self, url, timeout, session, proxy=None):
+        """Fetch one page (through `proxy` if given); returns (text or None, metric outcome)"""
+        started = time.perf_counter()
+        outcome = 'ok'
+        size = 0
+        wire = 0
+        try:
+            if self.http_client is not None:
+                request = self.http_client.stream(url, timeout, proxy=proxy.url if proxy else None)
+            else:
+                request = session.get(
+                    url, timeout=timeout, allow_redirects=True, stream=True,
+                    proxies={'http': proxy.url, 'https': proxy.url} if proxy else None
+                )
+            with request as response:
+                if self.http_client is not None:
+                    self.http_client.raise_for_status(response)
+                else:
+                    response.raise_for_status()
+                
+                # Closing the response from the cancelling thread aborts the body download
+                cancel_handle = self.cancel_token.on_cancel(response.close)
+                try:
+                    chunks = []
+                    if self.http_client is not None:
+                        body_chunks = response.iter_bytes(chunk_size=16384)
+                    else:
+                        body_chunks = response.iter_content(chunk_size=16384)
+                    for chunk in body_chunks:
+                        if self.cancel_token.cancelled:
+                            outcome = 'cancelled'
+                            return None, outcome
+                        chunks.append(chunk)
+                finally:
+                    self.cancel_token.remove_callback(cancel_handle)
+                
+                if self.http_client is not None:
+                    wire = self.http_client.record_response(response)
+                else:
+                    # tell() counts the bytes read from the socket, before decompression
+                    wire = response.raw.tell()
+                    STAGE2_WIRE_BYTES.labels(transport='requests').inc(wire)
+                    STAGE2_RESPONSES.labels(http_version='HTTP/1.0' if response.raw.version == 10 else 'HTTP/1.1').inc()
+                
+                body = b''.join(chunks)
+                size = len(body)
+                STAGE2_BYTES.inc(size)
+                return body.decode(response.encoding or 'utf-8', errors='replace'), outcome
+        except Exception as e:
+            outcome = self._fetch_outcome(e)
+            return None, outcome
+        finally:
+            elapsed = time.perf_counter() - started
+            STAGE2_FETCH_SECONDS.labels(outcome=outcome).observe(elapsed)
+            if proxy is not None and outcome != 'cancelled':
+                # An HTTP error still means the proxy delivered the site's answer
+                self.proxy_pool.record(
+                    proxy, ok=outcome in ('ok', 'http_error'),
+                    seconds=elapsed if outcome == 'ok' else None, nbytes=wire
+                )
+            self.tracer.record('fetch', elapsed, url=url, outcome=outcome, bytes=size)
+    
+    def close(self):
+        """Close the shared httpx client, if any"""
+        if self.http_client is not None:
+            self.http_client.close()
+    
+    def load_page(self, site, url, session=None):
+        """Page text from the network (archiving it if enabled) or, offline, from the archive"""
+        if self.offline:
+            return self.archive.get(url)
+        content = self.get_page_content(url, session=session)
+        if content and self.archive is not None:
+            try:
+                self.archive.put(site, url, content)
+            except Exception as e:
+                self.log(f"⚠️ Could not archive {url}: {e}", 'warning')
+        return content
+    
+    def render_page(self, site, url, session=None):
+        """Page HTML rendered by the browser pool (archived like static pages)"""
+        content = self.render_pool.render(url)
+        if content and self.archive is not None:
+            try:
+                self.archive.put(site, url, content)
+            except Exception as e:
+                self.log(f"⚠️ Could not archive {url}: {e}", 'warning')
+        return content
+    
+    def looks_script_rendered(self, html):
+        """Check if a page's content is likely built by JavaScript rather than served as HTML"""
+        if not html:
+            return False
+        lower = html.lower()
+        if any(marker in lower for marker in self.SCRIPT_RENDERED_MARKERS):
+            return True
+        if '<script' not in lower:
+            return False
+        # A page of scripts with hardly any text of its own
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag in soup(['script', 'style', 'noscript', 'template']):
+            tag.decompose()
+        return len(' '.join(soup.get_text().split())) < 200
     
     def extract_emails(self, text):
         """Extract email addresses from text"""
@@ -160,47 +347,82 @@ class WebsiteScraperConfigurable:
     
     def scrape_website_info(self, base_url, session=None):
         """Scrape email and owner info from a website"""
+        email, owner, _ = self._scrape_site(base_url, session)
+        return email, owner
+    
+    def _scrape_site(self, base_url, session=None, loader=None, paths=None):
+        """
+        Scrape email and owner info from a website
+        
+        Args:
+            base_url: The business website
+            session: requests session for static fetches
+            loader: Callable(site, url, session) returning page text (default: load_page)
+            paths: Info paths to try after the start page (default: info_paths)
+        
+        Returns:
+            (email, owner, start page text)
+        """
         if not base_url or self.is_mobile_de(base_url):
-            return None, None
+            return None, None, None
         
         base_url = self.clean_url(base_url)
         if not base_url:
-            return None, None
+            return None, None, None
         
-        if session is None:
+        static = loader is None
+        loader = loader or self.load_page
+        if session is None and static and not self.offline:
             session = self.create_session()
         
         all_emails = []
         owner_name = None
+        homepage = None
         
-        urls_to_try = [base_url] + [urljoin(base_url, path) for path in self.info_paths]
+        paths = self.info_paths if paths is None else paths
+        urls_to_try = [base_url] + [urljoin(base_url, path) for path in paths]
+        requests_made = 0
         
         for url in urls_to_try:
-            content = self.get_page_content(url, session=session)
+            if self.cancel_token.cancelled:
+                break
+            
+            requests_made += 1
+            content = loader(base_url, url, session)
+            if url == base_url:
+                homepage = content
             if content:
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                
-                text = soup.get_text()
-                
-                emails = self.extract_emails(text)
-                all_emails.extend(emails)
+                with self.tracer.span('parse'):
+                    soup = BeautifulSoup(content, 'html.parser')
+                    
+                    for script in soup(["script", "style"]):
+                        script.decompose()
+                    
+                    text = soup.get_text()
                 
-                if not owner_name:
-                    owner_name = self.extract_owner_name(text)
+                with self.tracer.span('extract'):
+                    emails = self.extract_emails(text)
+                    all_emails.extend(emails)
+                    
+                    if not owner_name:
+                        owner_name = self.extract_owner_name(text)
                 
                 if all_emails and owner_name:
                     break
         
+        if static and not self.offline:
+            STAGE2_REQUESTS_PER_BUSINESS.observe(requests_made)
+        
         unique_emails = list(set(all_emails))
         email_result = ', '.join(unique_emails[:3]) if unique_emails else None
         
-        return email_result, owner_name
+        return email_result, owner_name, homepage
     
     def read_csv_data(self):
-        """Read existing CSV data"""
+        """Read existing business data from the store or CSV"""
+        if self.store is not None:
+            return list(self.store.iter_rows())
+        
         if not os.path.exists(self.csv_filename):
             self.log(f"❌ CSV file not found: {self.csv_filename}", 'error')
             return []
@@ -213,8 +435,50 @@ class WebsiteScraperConfigurable:
         
         return data
     
+    def count_input_rows(self):
+        """Number of businesses process_businesses will go through"""
+        if self.store is not None:
+            return self.store.count()
+        return len(self.read_csv_data())
+    
+    def iter_input_rows(self):
+        """
+        Yield businesses to enrich, reduced to INPUT_FIELDS
+        
+        The store is read lazily in batches. A CSV is read up front because
+        every update rewrites the file.
+        """
+        if self.store is not None:
+            yield from self.store.iter_rows(fields=self.INPUT_FIELDS)
+            return
+        
+        for row in self.read_csv_data():
+            yield {field: row.get(field, '') for field in self.INPUT_FIELDS}
+    
+    def _precheck_business(self, row_data):
+        """Result for a business that needs no lookup, or None if it should be scraped"""
+        website = (row_data.get('website') or '').strip()
+        name = row_data.get('name', 'Unknown')
+        if not website or self.is_mobile_de(website):
+            return {'status': 'skipped', 'reason': 'no website or mobile.de', 'name': name}
+        if row_data.get('email') and row_data.get('owner') and not self.offline:
+            return {'status': 'already_processed', 'name': name}
+        if self.offline and not self.has_archived_pages(website):
+            # Nothing to re-extract from; keep the stored email and owner
+            return {'status': 'skipped', 'reason': 'no archived pages', 'name': name}
+        return None
+    
+    def has_archived_pages(self, website):
+        """Whether the page archive holds any capture of a business website"""
+        site = self.clean_url(website)
+        return bool(site and self.archive is not None and self.archive.captures(site))
+    
     def update_single_row_csv(self, row_data):
-        """Thread-safe update of a single row in CSV"""
+        """Thread-safe update of a single row in the store or CSV"""
+        if self.store is not None:
+            self.store.update_business(row_data)
+            return
+        
         with self.lock:
             data = self.read_csv_data()
             if not data:
@@ -239,20 +503,36 @@ class WebsiteScraperConfigurable:
     
     def process_single_business(self, row_data):
         """Process a single business (for parallel execution)"""
+        with self.profiler.thread(), self.tracer.span('website', business=row_data.get('name', 'Unknown')) as span:
+            result = self._enrich_business(row_data)
+            span.set(status=result['status'])
+            return result
+    
+    def _enrich_business(self, row_data):
+        """Look up and write back the contact details of one business"""
         website = row_data.get('website', '').strip()
         name = row_data.get('name', 'Unknown')
         
-        if not website or self.is_mobile_de(website):
-            return {'status': 'skipped', 'reason': 'no website or mobile.de', 'name': name}
+        settled = self._precheck_business(row_data)
+        if settled is not None:
+            return settled
         
-        if row_data.get('email') and row_data.get('owner'):
-            return {'status': 'already_processed', 'name': name}
+        session = None if self.offline else self.create_session()
         
-        session = self.create_session()
+        started = time.perf_counter()
+        with ACTIVE_WORKERS.labels(kind='stage2').track_inprogress():
+            email, owner, homepage = self._scrape_site(website, session)
+        STAGE2_BUSINESS_SECONDS.observe(time.perf_counter() - started)
         
-        email, owner = self.scrape_website_info(website, session)
+        # Partial lookups of a cancelled job are not written back
+        if self.cancel_token.cancelled:
+            return {'status': 'cancelled', 'name': name}
         
         result = {'status': 'processed', 'name': name}
+        if self.offline:
+            # Re-extraction replaces earlier results, including ones the fixed extractors drop
+            row_data['email'] = email or ''
+            row_data['owner'] = owner or ''
         if email:
             row_data['email'] = email
             result['email'] = email
@@ -262,24 +542,71 @@ class WebsiteScraperConfigurable:
         
         if not email and not owner:
             result['status'] = 'no_info'
+            # The browser tier may still find them if the content is rendered client-side
+            if self.render_pool is not None and self.looks_script_rendered(homepage):
+                result['render'] = True
         
-        self.update_single_row_csv(row_data)
+        with self.tracer.span('write'):
+            self.update_single_row_csv(row_data)
         
         return result
     
+    def process_rendered_business(self, row_data):
+        """Look up a business again with the browser pool (fallback tier)"""
+        name = row_data.get('name', 'Unknown')
+        with self.profiler.thread(), self.tracer.span('website_render', business=name) as span:
+            started = time.perf_counter()
+            with ACTIVE_WORKERS.labels(kind='stage2_render').track_inprogress():
+                email, owner, _ = self._scrape_site(
+                    row_data.get('website', '').strip(), loader=self.render_page, paths=self.render_paths
+                )
+            elapsed = time.perf_counter() - started
+            
+            if self.cancel_token.cancelled:
+                return {'status': 'cancelled', 'name': name, 'rendered': True, 'seconds': elapsed}
+            
+            result = {'status': 'processed' if email or owner else 'no_info', 'name': name,
+                      'rendered': True, 'seconds': elapsed}
+            STAGE2_RENDER_SECONDS.labels(
+                outcome='recovered' if result['status'] == 'processed' else 'no_info'
+            ).observe(elapsed)
+            span.set(status=result['status'])
+            if email:
+                row_data['email'] = email
+                result['email'] = email
+            if owner:
+                row_data['owner'] = owner
+                result['owner'] = owner
+            
+            if result['status'] == 'processed':
+                with self.tracer.span('write'):
+                    self.update_single_row_csv(row_data)
+            return result
+    
     def process_businesses(self):
-        """Main processing function with parallel execution"""
+        """
+        Main processing function with parallel execution
+        
+        Rows are read lazily and at most max_in_flight businesses are queued
+        or running at any time, so memory stays flat for very large inputs
+        and the first results arrive right away. Rows that need no lookup are
+        counted without being submitted.
+        
+        With a render pool, businesses whose static lookup found nothing on a
+        script-rendered site go to a second executor sized to the pool, so
+        slow browser renders never hold up the static workers.
+        """
         self.log(f"🚀 Starting parallel website scraping ({self.max_workers} workers)...", 'info')
         
-        data = self.read_csv_data()
-        if not data:
+        total = self.count_input_rows()
+        if not total:
             return {'processed': 0, 'skipped': 0, 'no_info': 0, 'already_processed': 0}
         
-        self.log(f"📊 Found {len(data)} businesses to process", 'info')
+        self.log(f"📊 Found {total} businesses to process", 'info')
         
         # Update progress total
         if self.progress:
-            self.progress.update_status(total=len(data))
+            self.progress.update_status(total=total)
         
         processed = 0
         skipped = 0
@@ -287,59 +614,180 @@ class WebsiteScraperConfigurable:
         already_processed = 0
         emails_found = 0
         owners_found = 0
+        finished = 0
+        render_attempts = 0
+        render_recovered = 0
+        render_skipped = 0
+        render_seconds = 0.0
         
         start_time = time.time()
-        
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_row = {executor.submit(self.process_single_business, row): i 
-                           for i, row in enumerate(data)}
-            
-            for future in as_completed(future_to_row):
-                row_index = future_to_row[future]
-                try:
-                    result = future.result()
-                    
+        static_done_at = None
+        
+        # future -> (row index, row, tier); tier is 'static' or 'render'
+        in_flight = {}
+        static_in_flight = 0
+        rows_left = True
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        render_executor = None
+        if self.render_pool is not None:
+            render_executor = ThreadPoolExecutor(max_workers=self.render_pool.size)
+        
+        # Submitting and the shutdown on cancel must not interleave
+        submit_lock = threading.Lock()
+        
+        def submit(pool, fn, row):
+            """Queue a business unless the job was cancelled (and the pools shut down); returns the future or None"""
+            with submit_lock:
+                if self.cancel_token.cancelled:
+                    return None
+                return pool.submit(fn, row)
+        
+        def cancel_all():
+            # Drop every queued business at once when the job is cancelled
+            with submit_lock:
+                executor.shutdown(wait=False, cancel_futures=True)
+                if render_executor is not None:
+                    render_executor.shutdown(wait=False, cancel_futures=True)
+            if render_executor is not None:
+                # Quitting the browsers aborts renders in progress
+                self.render_pool.close()
+        
+        cancel_handle = self.cancel_token.on_cancel(cancel_all)
+        rows = enumerate(self.iter_input_rows())
+        try:
+            while True:
+                # Top up the window; rows that need no lookup are settled here
+                while rows_left and static_in_flight < self.max_in_flight and not self.cancel_token.cancelled:
+                    next_row = next(rows, None)
+                    if next_row is None:
+                        rows_left = False
+                        break
+                    row_index, row = next_row
+                    result = self._precheck_business(row)
+                    if result is None:
+                        future = submit(executor, self.process_single_business, row)
+                        if future is None:
+                            break
+                        in_flight[future] = (row_index, row, 'static')
+                        static_in_flight += 1
+                        # Shared by concurrent jobs, so adjust by deltas rather than setting it
+                        QUEUE_DEPTH.labels(queue='stage2_businesses').inc()
+                        continue
+                    finished += 1
+                    STAGE2_BUSINESSES.labels(status=result['status']).inc()
                     if result['status'] == 'skipped':
                         skipped += 1
-                        self.log(f"[{row_index+1}/{len(data)}] ⏭️  Skipped: {result['name']}", 'info')
-                    elif result['status'] == 'already_processed':
+                        self.log(f"[{row_index+1}/{total}] ⏭️  Skipped: {result['name']}", 'info')
+                    else:
                         already_processed += 1
-                        self.log(f"[{row_index+1}/{len(data)}] ✅ Already: {result['name']}", 'info')
-                    elif result['status'] == 'processed':
-                        processed += 1
-                        if result.get('email'):
-                            emails_found += 1
-                        if result.get('owner'):
-                            owners_found += 1
-                        info_parts = []
-                        if result.get('email'):
-                            info_parts.append(f"📧 {result['email']}")
-                        if result.get('owner'):
-                            info_parts.append(f"👤 {result['owner']}")
-                        info_str = ' | '.join(info_parts) if info_parts else '❌ No info'
-                        self.log(f"[{row_index+1}/{len(data)}] ✅ {result['name']} - {info_str}", 'success')
-                    elif result['status'] == 'no_info':
-                        no_info += 1
-                        self.log(f"[{row_index+1}/{len(data)}] ❌ {result['name']} - No contact info", 'warning')
-                    
-                    # Update progress
-                    if self.progress:
-                        self.progress.update_status(
-                            progress=row_index + 1,
-                            current_item=result['name']
-                        )
+                        self.log(f"[{row_index+1}/{total}] ✅ Already: {result['name']}", 'info')
+                
+                if static_in_flight == 0 and not rows_left and static_done_at is None:
+                    static_done_at = time.time()
+                if not in_flight or self.cancel_token.cancelled:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row_index, row, tier = in_flight.pop(future)
+                    if tier == 'static':
+                        static_in_flight -= 1
+                        QUEUE_DEPTH.labels(queue='stage2_businesses').dec()
+                    else:
+                        QUEUE_DEPTH.labels(queue='stage2_render').dec()
+                    try:
+                        result = future.result()
                         
-                except Exception as e:
-                    self.log(f"[{row_index+1}/{len(data)}] ❌ Error: {e}", 'error')
+                        if result.get('render'):
+                            if len(in_flight) - static_in_flight < self.render_backlog:
+                                future = submit(render_executor, self.process_rendered_business, row)
+                                if future is None:
+                                    # Cancelled while this business was in the static tier
+                                    continue
+                                in_flight[future] = (row_index, row, 'render')
+                                QUEUE_DEPTH.labels(queue='stage2_render').inc()
+                                continue
+                            render_skipped += 1
+                        if result.get('rendered') and result['status'] != 'cancelled':
+                            render_attempts += 1
+                            render_seconds += result['seconds']
+                            if result['status'] == 'processed':
+                                render_recovered += 1
+                        
+                        finished += 1
+                        STAGE2_BUSINESSES.labels(status=result['status']).inc()
+                        
+                        if result['status'] == 'skipped':
+                            skipped += 1
+                            self.log(f"[{row_index+1}/{total}] ⏭️  Skipped: {result['name']}", 'info')
+                        elif result['status'] == 'already_processed':
+                            already_processed += 1
+                            self.log(f"[{row_index+1}/{total}] ✅ Already: {result['name']}", 'info')
+                        elif result['status'] == 'processed':
+                            processed += 1
+                            if result.get('email'):
+                                emails_found += 1
+                            if result.get('owner'):
+                                owners_found += 1
+                            info_parts = []
+                            if result.get('email'):
+                                info_parts.append(f"📧 {result['email']}")
+                            if result.get('owner'):
+                                info_parts.append(f"👤 {result['owner']}")
+                            info_str = ' | '.join(info_parts) if info_parts else '❌ No info'
+                            marker = '🖥️' if result.get('rendered') else '✅'
+                            self.log(f"[{row_index+1}/{total}] {marker} {result['name']} - {info_str}", 'success')
+                        elif result['status'] == 'no_info':
+                            no_info += 1
+                            self.log(f"[{row_index+1}/{total}] ❌ {result['name']} - No contact info", 'warning')
+                        elif result['status'] == 'cancelled':
+                            continue
+                        
+                        # Update progress
+                        if self.progress:
+                            self.progress.update_status(
+                                progress=finished,
+                                current_item=result['name']
+                            )
+                            
+                    except CancelledError:
+                        continue
+                    except Exception as e:
+                        finished += 1
+                        self.log(f"[{row_index+1}/{total}] ❌ Error: {e}", 'error')
+        finally:
+            QUEUE_DEPTH.labels(queue='stage2_businesses').dec(static_in_flight)
+            QUEUE_DEPTH.labels(queue='stage2_render').dec(len(in_flight) - static_in_flight)
+            self.cancel_token.remove_callback(cancel_handle)
+            # Running lookups notice the token within one request, so this wait is bounded
+            executor.shutdown(wait=True, cancel_futures=True)
+            if render_executor is not None:
+                render_executor.shutdown(wait=True, cancel_futures=True)
         
         elapsed_time = time.time() - start_time
+        # Time the job ran on after the static lookups were done, i.e. what the browser tier added
+        render_tail = time.time() - static_done_at if static_done_at else 0.0
+        rss_mb = peak_rss_mb()
+        
+        if self.cancel_token.cancelled:
+            finished = processed + no_info + already_processed + skipped
+            self.log(f"⏹️ Website scraping cancelled after {finished}/{total} businesses", 'warning')
         
         self.log(f"🎉 Parallel processing completed in {elapsed_time:.1f} seconds!", 'success')
         self.log(f"📈 Processed: {processed}", 'info')
         self.log(f"❌ No info found: {no_info}", 'info')
         self.log(f"✅ Already processed: {already_processed}", 'info')
         self.log(f"⏭️  Skipped: {skipped}", 'info')
-        self.log(f"⚡ Speed: {len(data)/elapsed_time:.1f} businesses/second", 'info')
+        self.log(f"⚡ Speed: {total/elapsed_time:.1f} businesses/second", 'info')
+        if rss_mb is not None:
+            self.log(f"💾 Peak memory: {rss_mb:.0f} MB", 'info')
+        if self.render_pool is not None:
+            self.log(
+                f"🖥️ Browser fallback: {render_recovered}/{render_attempts} recovered, "
+                f"{render_seconds:.1f}s render time, +{render_tail:.1f}s after the static pass"
+                + (f", {render_skipped} skipped (backlog full)" if render_skipped else ''),
+                'info'
+            )
         
         return {
             'processed': processed,
@@ -347,5 +795,12 @@ class WebsiteScraperConfigurable:
             'no_info': no_info,
             'already_processed': already_processed,
             'emails_found': emails_found,
-            'owners_found': owners_found
+            'owners_found': owners_found,
+            'peak_rss_mb': rss_mb,
+            'render_attempts': render_attempts,
+            'render_recovered': render_recovered,
+            'render_skipped': render_skipped,
+            'render_seconds': round(render_seconds, 1),
+            'render_tail_seconds': round(render_tail, 1),
+            'cancelled': self.cancel_token.cancelled
         }